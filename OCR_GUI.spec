@@ -5,8 +5,8 @@ a = Analysis(
     ['gui.py'],
     pathex=[],
     binaries=[],
-    datas=[('processor.py', '.'), ('rasterize.py', '.'), ('review_tool.py', '.'), ('imagotipo', 'imagotipo')],
-    hiddenimports=['google.generativeai', 'dotenv', 'pdf2image', 'PIL', 'reportlab'],
+    datas=[('processor.py', '.'), ('backends.py', '.'), ('cache.py', '.'), ('chunking.py', '.'), ('upload_registry.py', '.'), ('scanner.py', '.'), ('page_index.py', '.'), ('preprocess.py', '.'), ('textlayer.py', '.'), ('translation_memory.py', '.'), ('page_dedup.py', '.'), ('pdf_export.py', '.'), ('result.py', '.'), ('metrics.py', '.'), ('ratelimit.py', '.'), ('work_queue.py', '.'), ('batch.py', '.'), ('jobs.py', '.'), ('rasterize.py', '.'), ('review_tool.py', '.'), ('imagotipo', 'imagotipo')],
+    hiddenimports=['google.generativeai', 'dotenv', 'pdf2image', 'PIL', 'reportlab', 'pypdf'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
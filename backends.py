@@ -0,0 +1,302 @@
+"""
+Model backends used by processor.py.
+
+processor.py makes every remote call (upload, file state polling and
+generation) through the backend returned by get_backend():
+
+- GeminiBackend: the real service, through google.generativeai. The SDK is
+  imported and GEMINI_API_KEY read on the first call.
+- FakeBackend: a local stand-in that needs no network or key. It returns
+  canned sectioned responses (one page marker per page of the uploaded PDF)
+  after a configurable upload latency and bandwidth, processing delay,
+  time to first token and generation throughput, fails a configurable
+  share of requests and can enforce a requests-per-minute quota with 429s.
+  It is meant for load tests and benchmarks of our own concurrency,
+  caching, retry and rate limiting behaviour.
+
+Select the fake with OCR_BACKEND=fake (configured from the OCR_FAKE_*
+variables, see FakeBackend.from_env) or set_backend(FakeBackend(...)).
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+PAGE_PROMPT_TOKENS = 258  # Input tokens Gemini bills per PDF page
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_TOKENS = 32
+FAKE_WORDS = (
+    "el trabajador tendrá derecho al disfrute de una jornada de cuarenta horas "
+    "semanales con treinta días de vacaciones retribuidas por año de servicio"
+).split()
+
+
+class GeminiBackend:
+    """Calls the Gemini API through google.generativeai."""
+
+    persistent_files = True  # Uploads outlive the process (see upload_registry.py)
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        # The SDK takes most of a second to import, so it is only loaded and
+        # configured when a request is first made
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+                from dotenv import load_dotenv
+
+                load_dotenv()
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY not found in .env file")
+                genai.configure(api_key=api_key)
+                self._genai = genai
+            return self._genai
+
+    def warm_up(self):
+        """Imports and configures the SDK now rather than on the first request."""
+        self._client()
+
+    def upload_file(self, path, mime_type=None):
+        return self._client().upload_file(path, mime_type=mime_type)
+
+    def get_file(self, name):
+        return self._client().get_file(name)
+
+    def generate_content(self, contents, stream=False):
+        model = self._client().GenerativeModel(model_name=self.model_name)
+        return model.generate_content(contents, stream=stream)
+
+
+class FakeBackendError(Exception):
+    """A failure injected by FakeBackend."""
+
+
+class FakeQuotaError(FakeBackendError):
+    """A 429 from FakeBackend's quota, with the server-style retry hint."""
+
+    code = 429
+
+    def __init__(self, retry_after):
+        super().__init__(
+            "429 Resource has been exhausted (e.g. check quota). "
+            f"Please retry in {retry_after:.2f}s."
+        )
+        self.retry_after = retry_after
+
+
+class FakeBackend:
+    """
+    Offline backend with configurable latency, throughput and error rate.
+
+    upload_latency and processing_delay are in seconds, upload_bandwidth in
+    bytes/s (None: unlimited), first_token_latency in seconds and
+    tokens_per_second in output tokens/s (None: instant). error_rate is the
+    probability that an upload or generation fails with FakeBackendError.
+    With quota_rpm set, a generation beyond quota_rpm in the last minute
+    fails with FakeQuotaError, as Gemini's ResourceExhausted does.
+    Text-only requests (translations) echo their text, which keeps segment
+    markers intact.
+    """
+
+    persistent_files = False
+
+    def __init__(
+        self,
+        upload_latency=0.0,
+        upload_bandwidth=None,
+        processing_delay=0.0,
+        first_token_latency=0.0,
+        tokens_per_second=None,
+        error_rate=0.0,
+        quota_rpm=None,
+        words_per_page=250,
+        seed=None,
+    ):
+        self.upload_latency = upload_latency
+        self.upload_bandwidth = upload_bandwidth
+        self.processing_delay = processing_delay
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.quota_rpm = quota_rpm
+        self.words_per_page = words_per_page
+        self.calls = {"upload": 0, "get_file": 0, "generate": 0, "errors": 0, "throttled": 0}
+        self._generations = deque()  # Times of the generations admitted in the last minute
+        self._files = {}
+        self._uploads = 0  # Names stay unique even after files are deleted
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Builds a FakeBackend from OCR_FAKE_* environment variables."""
+
+        def number(name, default=None):
+            value = os.getenv(f"OCR_FAKE_{name}")
+            return float(value) if value else default
+
+        seed = number("SEED")
+        return cls(
+            upload_latency=number("UPLOAD_LATENCY", 0.0),
+            upload_bandwidth=number("UPLOAD_BANDWIDTH"),
+            processing_delay=number("PROCESSING_DELAY", 0.0),
+            first_token_latency=number("FIRST_TOKEN_LATENCY", 0.0),
+            tokens_per_second=number("TOKENS_PER_SECOND"),
+            error_rate=number("ERROR_RATE", 0.0),
+            quota_rpm=number("QUOTA_RPM"),
+            seed=int(seed) if seed is not None else None,
+        )
+
+    def _count(self, call):
+        with self._lock:
+            self.calls[call] += 1
+
+    def _maybe_fail(self, what):
+        with self._lock:
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.calls["errors"] += 1
+        if failed:
+            raise FakeBackendError(f"Injected {what} failure")
+
+    def warm_up(self):
+        pass
+
+    def _check_quota(self):
+        if not self.quota_rpm:
+            return
+        now = time.monotonic()
+        with self._lock:
+            while self._generations and self._generations[0] <= now - 60:
+                self._generations.popleft()
+            if len(self._generations) >= self.quota_rpm:
+                self.calls["throttled"] += 1
+                raise FakeQuotaError(self._generations[0] + 60 - now)
+            self._generations.append(now)
+
+    def upload_file(self, path, mime_type=None):
+        from pypdf import PdfReader
+
+        self._count("upload")
+        size = os.path.getsize(path)
+        delay = self.upload_latency
+        if self.upload_bandwidth:
+            delay += size / self.upload_bandwidth
+        time.sleep(delay)
+        self._maybe_fail("upload")
+
+        pages = len(PdfReader(path).pages) if mime_type == "application/pdf" else 1
+        with self._lock:
+            self._uploads += 1
+            name = f"files/fake-{self._uploads}"
+            self._files[name] = {
+                "pages": pages,
+                "ready_at": time.monotonic() + self.processing_delay,
+                "display_name": os.path.basename(path),
+            }
+        return self.get_file(name)
+
+    def get_file(self, name):
+        self._count("get_file")
+        with self._lock:
+            entry = self._files.get(name)
+        if entry is None:
+            raise FakeBackendError(f"File {name} not found")
+        state = "ACTIVE" if time.monotonic() >= entry["ready_at"] else "PROCESSING"
+        return SimpleNamespace(
+            name=name,
+            uri=f"fake://{name}",
+            display_name=entry["display_name"],
+            state=SimpleNamespace(name=state),
+            expiration_time=None,
+            pages=entry["pages"],
+        )
+
+    def _response_text(self, contents):
+        from page_index import PAGE_MARKER
+
+        file, prompt = contents[0], contents[-1]
+        if isinstance(file, str):
+            # Text-only request: the text to translate follows the prompt
+            return contents[1], len(contents[1]) // CHARS_PER_TOKEN
+
+        words = " ".join(
+            FAKE_WORDS[i % len(FAKE_WORDS)] for i in range(self.words_per_page)
+        ).capitalize()
+        pages = "\n\n".join(
+            f"{PAGE_MARKER.format(page=page)}\n{words}." for page in range(1, file.pages + 1)
+        )
+        text = f"--- TRANSCRIPCIÓN ---\n{pages}\n\n"
+        if "TRADUCCIÓN" in prompt:
+            text += f"--- TRADUCCIÓN ---\n{pages}\n\n"
+        text += "--- QUALITY ASSESSMENT ---\nConfidence Score: 95%\nFake backend response.\n"
+        return text, file.pages * PAGE_PROMPT_TOKENS
+
+    def generate_content(self, contents, stream=False):
+        self._count("generate")
+        self._check_quota()
+        text, prompt_tokens = self._response_text(contents)
+        time.sleep(self.first_token_latency)
+        self._maybe_fail("generation")
+
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        usage = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+        step = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+        parts = [text[i : i + step] for i in range(0, len(text), step)]
+        if not stream:
+            self._generation_delay(len(parts))
+            return SimpleNamespace(text=text, usage_metadata=usage)
+        return self._stream(parts, usage)
+
+    def _generation_delay(self, num_parts):
+        if self.tokens_per_second:
+            time.sleep(num_parts * STREAM_CHUNK_TOKENS / self.tokens_per_second)
+
+    def _stream(self, parts, usage):
+        for i, part in enumerate(parts):
+            self._generation_delay(1)
+            # Usage is reported on the final chunk, as with the real API
+            yield SimpleNamespace(text=part, usage_metadata=usage if i == len(parts) - 1 else None)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name, model_name):
+    """Returns a new backend by name: 'gemini' or 'fake'."""
+    if name == "gemini":
+        return GeminiBackend(model_name)
+    if name == "fake":
+        return FakeBackend.from_env()
+    raise ValueError(f"Unknown backend '{name}' (expected 'gemini' or 'fake')")
+
+
+def get_backend(model_name):
+    """Returns the process-wide backend, chosen by OCR_BACKEND (default gemini)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(os.getenv("OCR_BACKEND", "gemini"), model_name)
+        return _backend
+
+
+def set_backend(backend):
+    """Replaces the process-wide backend, e.g. with a FakeBackend; returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous = _backend
+        _backend = backend
+        return previous
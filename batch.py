@@ -0,0 +1,132 @@
+"""
+Batch processing helpers: expand directories/globs into PDF lists and run
+them through a bounded worker pool.
+
+The pipeline is bound by network latency (upload, file activation polling
+and generation), not CPU, so threads are enough to overlap the stages of
+different documents.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_WORKERS = 4
+
+
+def collect_pdfs(inputs):
+    """
+    Expands files, directories and glob patterns into a sorted,
+    de-duplicated list of PDF paths.
+    """
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                found.extend(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.lower().endswith(".pdf")
+                )
+        elif glob.has_magic(item):
+            found.extend(
+                path
+                for path in glob.glob(item, recursive=True)
+                if os.path.isfile(path) and path.lower().endswith(".pdf")
+            )
+        elif os.path.isfile(item):
+            found.append(item)
+        else:
+            print(f"Warning: '{item}' not found, skipping.")
+
+    seen = set()
+    unique = []
+    for path in sorted(found):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def output_paths_for(pdf_paths, output_dir, extension):
+    """
+    Maps each input PDF to an output path inside output_dir, adding a
+    numeric suffix when two inputs share the same base name.
+    """
+    used = set()
+    mapping = {}
+    for path in pdf_paths:
+        base_name = os.path.splitext(os.path.basename(path))[0]
+        candidate = f"{base_name}_processed"
+        suffix = 2
+        while candidate in used:
+            candidate = f"{base_name}_processed_{suffix}"
+            suffix += 1
+        used.add(candidate)
+        mapping[path] = os.path.join(output_dir, f"{candidate}.{extension}")
+    return mapping
+
+
+def run_batch(pdf_paths, process, workers=DEFAULT_WORKERS, on_done=None):
+    """
+    Runs process(pdf_path) for every path on a pool of `workers` threads.
+
+    Returns one result dict per input, in input order, with the keys
+    path, status ("ok" or "error"), seconds, output and error. on_done, if
+    given, is called with each result dict as soon as it finishes.
+    """
+    results = {}
+
+    def timed(path):
+        start = time.perf_counter()
+        try:
+            output = process(path)
+            return {
+                "path": path,
+                "status": "ok",
+                "seconds": time.perf_counter() - start,
+                "output": output,
+                "error": None,
+            }
+        except Exception as e:
+            return {
+                "path": path,
+                "status": "error",
+                "seconds": time.perf_counter() - start,
+                "output": None,
+                "error": str(e),
+            }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(timed, path) for path in pdf_paths]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["path"]] = result
+            if on_done:
+                on_done(result)
+
+    return [results[path] for path in pdf_paths]
+
+
+def format_summary(results, wall_seconds):
+    """Renders a plain-text summary table of a batch run."""
+    lines = []
+    width = max([len(r["path"]) for r in results] + [4])
+    lines.append(f"{'File':<{width}}  {'Status':<6}  {'Time':>8}  Detail")
+    lines.append("-" * (width + 30))
+    for r in results:
+        detail = r["output"] if r["status"] == "ok" else r["error"]
+        lines.append(
+            f"{r['path']:<{width}}  {r['status']:<6}  {r['seconds']:>7.1f}s  {detail}"
+        )
+
+    ok = sum(1 for r in results if r["status"] == "ok")
+    busy = sum(r["seconds"] for r in results)
+    lines.append("-" * (width + 30))
+    lines.append(
+        f"{ok}/{len(results)} succeeded in {wall_seconds:.1f}s wall time "
+        f"({busy:.1f}s of per-file work, {busy / wall_seconds if wall_seconds else 0:.1f}x overlap)"
+    )
+    return "\n".join(lines)
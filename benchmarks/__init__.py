@@ -0,0 +1,5 @@
+"""
+Performance benchmarks. Run from the project root, e.g.:
+
+    python -m benchmarks.bench_scanner
+"""
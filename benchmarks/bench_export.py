@@ -0,0 +1,130 @@
+"""
+Benchmarks the PDF export engine (pdf_export.write_pdf) against the previous
+simpleSplit/drawString implementation of save_to_file's pdf branch.
+
+    python -m benchmarks.bench_export --lines 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.corpus import clause_text, document_lines
+from pdf_export import iter_wrapped_lines, write_pdf
+
+HEADER_LINES = (
+    "Traducción no oficial.",
+    "Realizado con servicios de traducción de google impulsado por IA.",
+    "Puede contener errores",
+)
+
+
+def legacy_write_pdf(text, output_path, header_lines=HEADER_LINES):
+    """save_to_file's pdf branch as it was before pdf_export.py."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(output_path, pagesize=letter)
+    width, height = letter
+
+    def draw_header(c):
+        c.setFont("Helvetica", 10)
+        c.setFillColor(colors.dimgrey)
+        y_pos = height - 20
+        for line in header_lines:
+            c.drawRightString(width - 40, y_pos, line)
+            y_pos -= 12
+        c.setFillColor(colors.black)
+
+    lines = text.split("\n")
+    draw_header(c)
+    y = height - 60
+    margin = 40
+    line_height = 12
+    c.setFont("Helvetica", 10)
+    for line in lines:
+        wrapped_lines = simpleSplit(line, "Helvetica", 10, width - 2 * margin)
+        for wrapped_line in wrapped_lines:
+            if y < margin:
+                c.showPage()
+                draw_header(c)
+                c.setFont("Helvetica", 10)
+                y = height - 60
+            c.drawString(margin, y, wrapped_line)
+            y -= line_height
+    c.save()
+
+
+def synthetic_result(num_lines, seed=0):
+    """
+    Builds a transcription+translation-like text of num_lines lines: short
+    clause headings, long paragraphs that need wrapping and blank lines.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _, line in document_lines(num_lines // 45 + 1, seed=seed):
+        roll = rng.random()
+        if roll < 0.15:
+            lines.append("")
+        elif roll < 0.45:
+            lines.append(clause_text(rng, 40))
+        else:
+            lines.append(line)
+        if len(lines) == num_lines:
+            break
+    return "\n".join(lines)
+
+
+def check_layout(text):
+    """Verifies the new wrapping matches simpleSplit line for line."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import simpleSplit
+
+    max_width = letter[0] - 80
+    expected = simpleSplit(text, "Helvetica", 10, max_width)
+    assert list(iter_wrapped_lines(text, max_width)) == expected
+
+
+def timed(func, text, path):
+    start = time.perf_counter()
+    func(text, path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF export engine.")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    print("| Lines | Pages | Legacy | Engine | Speedup | Legacy KB | Engine KB |")
+    print("|-------|-------|--------|--------|---------|-----------|-----------|")
+    with tempfile.TemporaryDirectory(prefix="bench-export-") as tmp_dir:
+        legacy_path = os.path.join(tmp_dir, "legacy.pdf")
+        engine_path = os.path.join(tmp_dir, "engine.pdf")
+        for num_lines in args.lines:
+            text = synthetic_result(num_lines)
+            check_layout(text)
+            old = min(timed(legacy_write_pdf, text, legacy_path) for _ in range(args.repeat))
+            new = min(
+                timed(lambda t, p: write_pdf(t, p, HEADER_LINES), text, engine_path)
+                for _ in range(args.repeat)
+            )
+
+            from pypdf import PdfReader
+
+            pages = len(PdfReader(engine_path).pages)
+            assert pages == len(PdfReader(legacy_path).pages)
+            print(
+                f"| {num_lines} | {pages} | {old:.2f}s | {new:.2f}s | {old / new:.1f}x "
+                f"| {os.path.getsize(legacy_path) / 1024:.0f} "
+                f"| {os.path.getsize(engine_path) / 1024:.0f} |"
+            )
+
+
+if __name__ == "__main__":
+    main()
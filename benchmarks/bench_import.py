@@ -0,0 +1,88 @@
+"""
+Measures cold import time of the entry-point modules with `python -X importtime`
+and checks that none of them pulls in the Gemini SDK at import time.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --check --max-ms 150   # non-zero exit on regression
+
+Each import runs in a fresh interpreter without GEMINI_API_KEY, so a module
+that needs the key (or the SDK) just to be imported fails the check.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+MODULES = ("processor", "main", "gui", "review_tool", "pdf_export", "chunking", "batch")
+SDK_MODULE = "google.generativeai"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\S+)$")
+
+
+def measure(module, project_dir):
+    """
+    Imports module in a fresh interpreter. Returns (milliseconds, sdk_loaded),
+    or raises RuntimeError with the interpreter's error output.
+    """
+    env = {key: value for key, value in os.environ.items() if key != "GEMINI_API_KEY"}
+    code = f"import sys, {module}; print(int({SDK_MODULE!r} in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=project_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        # Top-level entries have no indentation before the module name
+        if match and match.group(2) == module:
+            cumulative_us = int(match.group(1))
+    return cumulative_us / 1000, proc.stdout.strip() == "1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import times.")
+    parser.add_argument("modules", nargs="*", default=list(MODULES))
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N runs (default: 5).")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero if a module exceeds --max-ms, fails or imports the SDK.",
+    )
+    parser.add_argument("--max-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    failures = []
+
+    print("| Module | Import (ms) | Gemini SDK loaded |")
+    print("|--------|-------------|-------------------|")
+    for module in args.modules:
+        try:
+            runs = [measure(module, project_dir) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(f"| {module} | error | {e} |")
+            failures.append(f"{module}: {e}")
+            continue
+        best = min(ms for ms, _ in runs)
+        sdk_loaded = any(loaded for _, loaded in runs)
+        print(f"| {module} | {best:.1f} | {'yes' if sdk_loaded else 'no'} |")
+        if sdk_loaded:
+            failures.append(f"{module} imports {SDK_MODULE}")
+        if best > args.max_ms:
+            failures.append(f"{module} takes {best:.1f} ms (budget {args.max_ms:g} ms)")
+
+    if args.check and failures:
+        print("\nImport-time check failed:\n- " + "\n- ".join(failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
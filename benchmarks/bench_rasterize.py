@@ -0,0 +1,125 @@
+"""
+Benchmarks rasterize_pdf output modes: pages/sec and bytes/page.
+
+    python -m benchmarks.bench_rasterize --pages 40 --workers 1 4
+    python -m benchmarks.bench_rasterize --input input/document.pdf
+    python -m benchmarks.bench_rasterize --encode-only --pages 20
+
+Prints a Markdown table (requires poppler, like rasterize.py itself).
+--encode-only draws the synthetic pages with Pillow instead and times only
+the encoding and writing stage, against the Pillow save_all used before.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmarks.corpus import document_lines, write_synthetic_pdf
+from rasterize import ImagePdfWriter, encode_page, rasterize_pdf
+
+# (mode, jpeg_quality) combinations compared by default
+VARIANTS = [
+    ("color", 75),
+    ("color", 50),
+    ("gray", 75),
+    ("gray", 50),
+    ("gray", 30),
+    ("bilevel", None),
+]
+
+
+def render_pages(pages, dpi):
+    """Draws the synthetic document's pages as letter-size RGB images."""
+    size = (int(8.5 * dpi), int(11 * dpi))
+    font = ImageFont.load_default(size=10 * dpi / 72)
+    images = {}
+    for page, line in document_lines(pages):
+        if page not in images:
+            images[page] = [Image.new("RGB", size, "white"), 60 * dpi / 72]
+        image, y = images[page]
+        ImageDraw.Draw(image).text((40 * dpi / 72, y), line, fill="black", font=font)
+        images[page][1] = y + 14 * dpi / 72
+    return [image for image, _ in images.values()]
+
+
+def encode_only(pages, dpi, tmp):
+    """Times encoding + writing of pre-rendered pages; returns table rows."""
+    images = render_pages(pages, dpi)
+    rows = []
+
+    path = os.path.join(tmp, "pillow.pdf")
+    start = time.perf_counter()
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+    rows.append(("Pillow save_all (before)", "-", time.perf_counter() - start, path))
+
+    for mode, quality in VARIANTS:
+        path = os.path.join(tmp, f"out_{mode}_{quality}.pdf")
+        start = time.perf_counter()
+        writer = ImagePdfWriter(path, dpi)
+        for image in images:
+            writer.add_page(encode_page(image, mode, quality or 75))
+        writer.close()
+        rows.append((mode, quality or "-", time.perf_counter() - start, path))
+
+    print(f"\nInput: synthetic {pages} pages drawn at {dpi} DPI (encode + write only)\n")
+    print("| Mode | JPEG quality | Pages/sec | KB/page |")
+    print("|------|--------------|-----------|---------|")
+    for mode, quality, seconds, path in rows:
+        print(
+            f"| {mode} | {quality} | {pages / seconds:.1f} "
+            f"| {os.path.getsize(path) / pages / 1024:.0f} |"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rasterization modes.")
+    parser.add_argument("--input", help="PDF to rasterize (default: synthetic document).")
+    parser.add_argument("--pages", type=int, default=20, help="Pages of the synthetic PDF.")
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument(
+        "--encode-only",
+        action="store_true",
+        help="Time only encoding and writing of Pillow-drawn pages (no poppler needed).",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-rasterize-") as tmp:
+        if args.encode_only:
+            encode_only(args.pages, args.dpi, tmp)
+            return
+        input_path = args.input or write_synthetic_pdf(
+            os.path.join(tmp, "synthetic.pdf"), args.pages
+        )
+
+        rows = []
+        for workers in sorted(set(args.workers)):
+            for mode, quality in VARIANTS:
+                stats = rasterize_pdf(
+                    input_path,
+                    os.path.join(tmp, f"out_{mode}_{quality}_{workers}.pdf"),
+                    dpi=args.dpi,
+                    workers=workers,
+                    mode=mode,
+                    jpeg_quality=quality or 75,
+                )
+                if stats is None:
+                    raise SystemExit("Rasterization failed (is poppler installed?)")
+                rows.append((mode, quality, workers, stats))
+
+    print(f"\nInput: {args.input or f'synthetic {args.pages} pages'} at {args.dpi} DPI\n")
+    print("| Mode | JPEG quality | Workers | Pages/sec | KB/page |")
+    print("|------|--------------|---------|-----------|---------|")
+    for mode, quality, workers, stats in rows:
+        print(
+            f"| {mode} | {quality or '-'} | {workers} "
+            f"| {stats['pages'] / stats['seconds']:.1f} "
+            f"| {stats['bytes'] / stats['pages'] / 1024:.0f} |"
+        )
+
+
+if __name__ == "__main__":
+    main()
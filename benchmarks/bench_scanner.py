@@ -0,0 +1,148 @@
+"""
+Benchmarks the scanner against the previous multi-regex implementation of
+detect_anomalies and highlight_suspicious_text, and the shared per-page scan
+of OCRResult.from_text against scanning the document and its pages apart.
+
+    python -m benchmarks.bench_scanner --sizes 100000 1000000 5000000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from page_index import PAGE_MARKER, scan_pages, strip_page_markers
+from processor import detect_anomalies
+from review_tool import UNHIGHLIGHTED_KINDS, highlight_suspicious_text
+from scanner import ScanResult, scan
+
+SAMPLE_WORDS = (
+    "El trabajador tendrá derecho a una indemnización de 1.200 euros según el "
+    "artículo 15 del presente convenio colectivo y sus anexos salariales"
+).split()
+GARBLE = ["aaaa", "holaMundo", "---", "||", "12345678901", "a", "ñ", "%%%"]
+
+
+def legacy_detect_anomalies(text):
+    """detect_anomalies as it was before scanner.py."""
+    issues = []
+    if re.search(r"(.)\1{3,}", text):
+        issues.append("Repeated characters detected (possible OCR garble)")
+    if re.search(r"[a-z][A-Z]", text):
+        issues.append("Missing spaces between words detected")
+    unusual_patterns = [r"[^\w\s]{3,}", r"\d{10,}", r"[|@#$%^&*]{2,}"]
+    for pattern in unusual_patterns:
+        if re.search(pattern, text):
+            issues.append(f"Unusual character pattern detected: {pattern}")
+    words = text.split()
+    short_words = [word for word in words if len(word) == 1 and word.isalpha()]
+    if len(short_words) > len(words) * 0.1:
+        issues.append(
+            "High frequency of single-letter words (possible word fragmentation)"
+        )
+    return issues
+
+
+def legacy_highlight(text):
+    """highlight_suspicious_text as it was before scanner.py."""
+    highlighted = re.sub(r"(.)\1{3,}", r"**\1\1\1\1+**", text)
+    highlighted = re.sub(r"([a-z])([A-Z])", r"\1**\1\2**\2", highlighted)
+    return re.sub(r"[^\w\s]{3,}", r"***\g<0>***", highlighted)
+
+
+def synthetic_text(size, garble_rate=0.002, seed=0):
+    """Builds convenio-like text of roughly `size` characters."""
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(GARBLE) if rng.random() < garble_rate else rng.choice(SAMPLE_WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.05:
+            words.append("\n")
+    return " ".join(words)
+
+
+def with_page_markers(text, page_size=3000):
+    """Splits text into marked pages of about page_size characters."""
+    pages = []
+    start = 0
+    while start < len(text):
+        end = text.find(" ", start + page_size)
+        end = len(text) if end == -1 else end
+        pages.append(f"{PAGE_MARKER.format(page=len(pages) + 1)}\n{text[start:end]}\n")
+        start = end
+    return "".join(pages)
+
+
+def separate_result_scans(transcription):
+    """Document issues and page index scanned apart, as from_text used to."""
+    return detect_anomalies(strip_page_markers(transcription)), scan_pages(transcription)
+
+
+def shared_result_scans(transcription):
+    """Document issues merged from the page scans, as from_text does."""
+    scanned = scan_pages(transcription)
+    return ScanResult.merge(result for *_, result in scanned).messages(), scanned
+
+
+def shared_scan(text):
+    """One scan feeding both consumers, as review_tool does."""
+    result = scan(text, first_only=UNHIGHLIGHTED_KINDS)
+    return result.messages(), highlight_suspicious_text(text, result.issues)
+
+
+def best_of(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the anomaly scanner.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stages = (
+        ("detect_anomalies", legacy_detect_anomalies, detect_anomalies),
+        (
+            "detect + highlight",
+            lambda t: (legacy_detect_anomalies(t), legacy_highlight(t)),
+            lambda t: (detect_anomalies(t), highlight_suspicious_text(t)),
+        ),
+        (
+            "detect + highlight (shared scan)",
+            lambda t: (legacy_detect_anomalies(t), legacy_highlight(t)),
+            shared_scan,
+        ),
+    )
+
+    print(f"{'chars':>10}  {'text':<7}  {'legacy':>9}  {'scanner':>9}  {'speedup':>7}  stage")
+    for size in args.sizes:
+        for profile, garble_rate in (("clean", 0.0), ("garbled", 0.002)):
+            text = synthetic_text(size, garble_rate)
+            assert detect_anomalies(text) == legacy_detect_anomalies(text)
+            paged = with_page_markers(text)
+            assert separate_result_scans(paged)[0] == shared_result_scans(paged)[0]
+            runs = [(stage, legacy, current, text) for stage, legacy, current in stages]
+            runs.append(
+                ("result issues + page index", separate_result_scans, shared_result_scans, paged)
+            )
+            for stage, legacy, current, sample in runs:
+                old = best_of(legacy, sample, args.repeat)
+                new = best_of(current, sample, args.repeat)
+                print(
+                    f"{len(text):>10}  {profile:<7}  {old:>8.3f}s  {new:>8.3f}s  "
+                    f"{old / new:>6.1f}x  {stage}"
+                )
+
+
+if __name__ == "__main__":
+    main()
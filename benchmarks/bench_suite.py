@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark suite on synthetic convenio-like documents.
+
+For each page count a text PDF is generated (benchmarks/corpus.py) and
+rasterized with rasterize_pdf, then these stages are timed:
+
+- rasterize_pdf (skipped, and recorded as such, when poppler is missing);
+- detect_anomalies, calculate_confidence_score and
+  review_tool.highlight_suspicious_text on the document's text;
+- save_to_file to docx and to pdf;
+- the full transcribe_result pipeline, single request and chunked, against
+  backends.FakeBackend, so it runs offline and measures our own overhead
+  plus whatever latency the fake is given.
+
+Results are written as JSON; --baseline compares against an earlier file.
+
+    python -m benchmarks.bench_suite --pages 5 50 --output bench.json
+    python -m benchmarks.bench_suite --baseline bench.json --check   # non-zero exit on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from backends import FakeBackend, set_backend
+from benchmarks.corpus import document_lines, write_synthetic_pdf
+from processor import (
+    calculate_confidence_score,
+    detect_anomalies,
+    save_to_file,
+    transcribe_result,
+)
+from rasterize import rasterize_pdf
+from review_tool import highlight_suspicious_text
+
+SUITE_VERSION = 1
+NOISE_EVERY = 12  # Every Nth line gets an OCR-style defect
+MIN_COMPARED_SECONDS = 0.001  # Faster stages are too noisy to flag
+
+
+def document_text(pages, seed=0):
+    """
+    Returns transcription-like text for a synthetic document, with page
+    markers and occasional OCR defects (merged words, repeats, stray symbols)
+    so the anomaly checks have something to find.
+    """
+    rng = random.Random(seed)
+    defects = (
+        lambda line: line.replace(" ", "", 1),
+        lambda line: line + " " + line.split()[-1],
+        lambda line: line + " ¤¤",
+    )
+    lines = []
+    current_page = None
+    for i, (page, line) in enumerate(document_lines(pages, seed=seed)):
+        if page != current_page:
+            lines.append(f"=== Página {page} ===")
+            current_page = page
+        if i % NOISE_EVERY == NOISE_EVERY - 1:
+            line = rng.choice(defects)(line)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def result_text(transcription):
+    """Wraps a transcription in the sectioned layout save_to_file receives."""
+    return (
+        f"--- TRANSCRIPCIÓN ---\n{transcription}\n\n"
+        f"--- TRADUCCIÓN ---\n{transcription}\n\n"
+        "--- QUALITY ASSESSMENT ---\nConfidence Score: 90%\n"
+    )
+
+
+def time_stage(func, repeat, warmup=True):
+    """
+    Runs func repeat times with its output silenced and returns the run
+    times. With warmup, an untimed first run absorbs imports and caches.
+    """
+    times = []
+    if warmup:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    for _ in range(max(1, repeat)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def record(name, pages, times, **extra):
+    entry = {
+        "name": name,
+        "pages": pages,
+        "best": min(times),
+        "median": statistics.median(times),
+        "runs": len(times),
+        "pages_per_second": pages / min(times) if min(times) > 0 else None,
+    }
+    entry.update(extra)
+    return entry
+
+
+def run_suite(page_counts, repeat, backend_options, tmp_dir, rasterize=True):
+    """Runs every stage for every page count; returns the list of result entries."""
+    results = []
+    for pages in page_counts:
+        pdf_path = write_synthetic_pdf(os.path.join(tmp_dir, f"doc_{pages}.pdf"), pages)
+        scanned_path = os.path.join(tmp_dir, f"doc_{pages}_scanned.pdf")
+
+        if rasterize:
+            outcome = {}
+
+            def run_rasterize():
+                outcome["stats"] = rasterize_pdf(pdf_path, scanned_path, dpi=100, mode="gray")
+
+            times = time_stage(run_rasterize, 1, warmup=False)
+            if outcome["stats"] is None:
+                results.append(
+                    {
+                        "name": "rasterize_pdf",
+                        "pages": pages,
+                        "skipped": "rasterize_pdf failed (is poppler installed?)",
+                    }
+                )
+            else:
+                results.append(
+                    record("rasterize_pdf", pages, times, bytes=outcome["stats"]["bytes"])
+                )
+        pipeline_input = scanned_path if os.path.exists(scanned_path) else pdf_path
+
+        text = document_text(pages)
+        issues = detect_anomalies(text)
+        results.append(
+            record(
+                "detect_anomalies",
+                pages,
+                time_stage(lambda: detect_anomalies(text), repeat),
+                chars=len(text),
+            )
+        )
+        results.append(
+            record(
+                "calculate_confidence_score",
+                pages,
+                time_stage(lambda: calculate_confidence_score(text, issues), repeat),
+            )
+        )
+        results.append(
+            record(
+                "highlight_suspicious_text",
+                pages,
+                time_stage(lambda: highlight_suspicious_text(text), repeat),
+            )
+        )
+
+        output_text = result_text(text)
+        for output_format in ("docx", "pdf"):
+            output_path = os.path.join(tmp_dir, f"out_{pages}.{output_format}")
+            times = time_stage(
+                lambda: save_to_file(output_text, output_path, output_format), repeat
+            )
+            results.append(
+                record(
+                    f"save_to_file[{output_format}]",
+                    pages,
+                    times,
+                    bytes=os.path.getsize(output_path),
+                )
+            )
+
+        for label, chunk_pages in (("single", None), ("chunked", 10)):
+            backend = FakeBackend(seed=0, **backend_options)
+            previous = set_backend(backend)
+            try:
+                times = time_stage(
+                    lambda: transcribe_result(
+                        pipeline_input,
+                        use_cache=False,
+                        chunk_pages=chunk_pages,
+                        text_layer=False,
+                    ),
+                    repeat,
+                )
+            finally:
+                set_backend(previous)
+            requests = backend.calls["generate"] // len(times)
+            results.append(record(f"pipeline[{label}]", pages, times, requests=requests))
+    return results
+
+
+def compare(results, baseline, max_regression):
+    """
+    Prints best times against a baseline run and returns the entries that
+    got slower by more than max_regression (a fraction). Stages under
+    MIN_COMPARED_SECONDS in both runs are shown but not flagged.
+    """
+    previous = {
+        (entry["name"], entry["pages"]): entry
+        for entry in baseline["results"]
+        if "best" in entry
+    }
+    regressions = []
+    print("\n| Stage | Pages | Baseline | Current | Change |")
+    print("|-------|-------|----------|---------|--------|")
+    for entry in results:
+        old = previous.get((entry["name"], entry["pages"]))
+        if old is None or "best" not in entry:
+            continue
+        change = entry["best"] / old["best"] - 1 if old["best"] > 0 else 0.0
+        print(
+            f"| {entry['name']} | {entry['pages']} | {old['best'] * 1000:.1f} ms "
+            f"| {entry['best'] * 1000:.1f} ms | {change:+.0%} |"
+        )
+        if change > max_regression and entry["best"] >= MIN_COMPARED_SECONDS:
+            regressions.append(f"{entry['name']} ({entry['pages']} pages): {change:+.0%}")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (default: 3).")
+    parser.add_argument("--output", "-o", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero if a stage is slower than the baseline by more than --max-regression.",
+    )
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--no-rasterize", action="store_true", help="Skip rasterize_pdf.")
+    parser.add_argument("--upload-latency", type=float, default=0.0)
+    parser.add_argument("--processing-delay", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float)
+    args = parser.parse_args()
+
+    backend_options = {
+        "upload_latency": args.upload_latency,
+        "processing_delay": args.processing_delay,
+        "tokens_per_second": args.tokens_per_second,
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp_dir:
+        results = run_suite(
+            args.pages, args.repeat, backend_options, tmp_dir, rasterize=not args.no_rasterize
+        )
+
+    report = {
+        "version": SUITE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"pages": args.pages, "repeat": args.repeat, "backend": backend_options},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("| Stage | Pages | Best | Median | Pages/sec |")
+    print("|-------|-------|------|--------|-----------|")
+    for entry in results:
+        if "skipped" in entry:
+            print(f"| {entry['name']} | {entry['pages']} | skipped: {entry['skipped']} | | |")
+            continue
+        print(
+            f"| {entry['name']} | {entry['pages']} | {entry['best'] * 1000:.1f} ms "
+            f"| {entry['median'] * 1000:.1f} ms | {entry['pages_per_second']:.0f} |"
+        )
+    print(f"\nResults written to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if args.check and regressions:
+            print("\nRegressions:\n- " + "\n- ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Synthetic convenio-like documents for benchmarks.
+"""
+
+import random
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+CLAUSE_WORDS = (
+    "artículo convenio colectivo trabajador empresa jornada salario base "
+    "complemento antigüedad vacaciones permiso retribuido categoría profesional "
+    "horas extraordinarias indemnización despido comisión paritaria anexo tabla "
+    "the employee shall be entitled to annual leave and overtime compensation"
+).split()
+
+
+def clause_text(rng, words=60):
+    """Returns one pseudo-clause of roughly `words` words."""
+    return " ".join(rng.choice(CLAUSE_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def document_lines(pages, lines_per_page=45, seed=0):
+    """Yields (page, line) pairs of synthetic text, numbered like a convenio."""
+    rng = random.Random(seed)
+    for page in range(1, pages + 1):
+        yield page, f"Artículo {page}. Disposiciones generales"
+        for _ in range(lines_per_page - 1):
+            yield page, clause_text(rng, 12)
+
+
+def write_synthetic_pdf(path, pages, seed=0):
+    """Writes a text PDF with `pages` pages of convenio-like clauses."""
+    c = canvas.Canvas(path, pagesize=letter)
+    width, height = letter
+    current_page = 1
+    y = height - 60
+    c.setFont("Helvetica", 10)
+    for page, line in document_lines(pages, seed=seed):
+        if page != current_page:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            current_page = page
+            y = height - 60
+        c.drawString(40, y, line)
+        y -= 14
+    c.save()
+    return path
@@ -10,6 +10,23 @@ PyInstaller.__main__.run(
         "--windowed",  # No console window (for GUI apps)
         "--name=OCR_GUI",  # Name of the executable
         "--add-data=processor.py:.",
+        "--add-data=cache.py:.",
+        "--add-data=chunking.py:.",
+        "--add-data=upload_registry.py:.",
+        "--add-data=scanner.py:.",
+        "--add-data=page_index.py:.",
+        "--add-data=preprocess.py:.",
+        "--add-data=textlayer.py:.",
+        "--add-data=translation_memory.py:.",
+        "--add-data=page_dedup.py:.",
+        "--add-data=pdf_export.py:.",
+        "--add-data=result.py:.",
+        "--add-data=metrics.py:.",
+        "--add-data=ratelimit.py:.",
+        "--add-data=work_queue.py:.",
+        "--add-data=batch.py:.",
+        "--add-data=backends.py:.",
+        "--add-data=jobs.py:.",
         "--add-data=rasterize.py:.",
         "--add-data=review_tool.py:.",
         "--add-data=imagotipo;imagotipo", # Bundle the imagotipo folder
@@ -18,6 +35,7 @@ PyInstaller.__main__.run(
         "--hidden-import=pdf2image",
         "--hidden-import=PIL",
         "--hidden-import=reportlab",
+        "--hidden-import=pypdf",
     ]
 )
 
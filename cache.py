@@ -0,0 +1,164 @@
+"""
+Persistent, content-addressed cache for transcribe_and_translate results.
+
+Entries are keyed by the SHA-256 of the PDF, the model name and a hash of the
+prompt, so any change to one of them produces a fresh API call. Each entry is a
+small JSON file; its modification time doubles as the last-access time, which
+keeps LRU eviction working across processes without a shared index.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "OCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ocr-convenios")
+)
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 days
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Returns the hex SHA-256 digest of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text):
+    """Returns the hex SHA-256 digest of a string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Size- and age-bounded LRU cache stored as one JSON file per entry.
+    """
+
+    def __init__(
+        self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, pdf_path, model_name, prompt, *extra):
+        """
+        Builds the cache key for a PDF processed with a model and prompt.
+        Extra values (e.g. a page range) further qualify the key.
+        """
+        parts = [file_sha256(pdf_path), model_name, text_sha256(prompt)]
+        parts.extend(str(value) for value in extra)
+        return text_sha256("|".join(parts))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the stored entry for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """Stores an entry (a JSON-serializable dict) and evicts if needed."""
+        entry = dict(entry, created=time.time())
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Removes expired entries, then least recently used ones over the size limit."""
+        now = time.time()
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                # An entry not used within max_age is necessarily older than it
+                if now - stat.st_mtime > self.max_age:
+                    self._remove(item.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if item.name.endswith(".json"):
+                    self._remove(item.path)
+
+    def stats(self):
+        """Returns hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Returns the process-wide cache instance, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
@@ -0,0 +1,297 @@
+"""
+Chunked transcription for long PDFs.
+
+The PDF is split into page ranges that are transcribed and translated
+concurrently, then stitched back together in page order. Each chunk is
+cached on its own, so a failed chunk is the only one retried, both within a
+run and when the run is repeated.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import get_default_cache, text_sha256
+from jobs import GENERATED, job_step
+from page_index import renumber_pages, strip_page_markers
+from preprocess import prepared_for_upload
+from processor import (
+    MODEL_NAME,
+    TRANSCRIBE_ONLY_PROMPT,
+    TRANSCRIBE_PROMPT,
+    build_automated_analysis,
+    calculate_confidence_score,
+    detect_anomalies,
+    generate_response,
+    parse_sections,
+)
+from ratelimit import is_throttle, is_transient
+from result import record_time
+
+DEFAULT_CHUNK_PAGES = 20
+DEFAULT_CHUNK_WORKERS = 4
+DEFAULT_RETRIES = 2
+
+
+def page_count(pdf_path):
+    """Returns the number of pages in a PDF."""
+    from pypdf import PdfReader
+
+    return len(PdfReader(pdf_path).pages)
+
+
+def page_ranges(num_pages, chunk_pages):
+    """Returns 1-based inclusive (first, last) page ranges covering the document."""
+    chunk_pages = max(1, chunk_pages)
+    return [
+        (first, min(first + chunk_pages - 1, num_pages))
+        for first in range(1, num_pages + 1, chunk_pages)
+    ]
+
+
+def split_pdf(pdf_path, ranges, output_dir):
+    """Writes one PDF per page range into output_dir and returns their paths."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(pdf_path)
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    paths = []
+    for first, last in ranges:
+        writer = PdfWriter()
+        for index in range(first - 1, last):
+            writer.add_page(reader.pages[index])
+        path = os.path.join(output_dir, f"{base_name}_p{first}-{last}.pdf")
+        with open(path, "wb") as f:
+            writer.write(f)
+        paths.append(path)
+    return paths
+
+
+def run_cached(label, generate, cache, cache_key, refresh, retries, step=None):
+    """
+    Returns the cached response for cache_key, or calls generate() and caches
+    its response under label. Failures are retried up to retries times,
+    except throttling and transient errors: every request already goes
+    through ratelimit.call_with_retry, which has retried those.
+
+    step, a jobs.Step, takes precedence over the cache: a response it already
+    generated (in an interrupted run being resumed) is returned as is, and
+    new responses are recorded in it.
+    """
+    if step is not None:
+        response_text = step.response
+        if response_text is not None:
+            return response_text
+
+    if cache is not None and not refresh:
+        entry = cache.get(cache_key)
+        if entry is not None:
+            if step is not None:
+                step.set_state(GENERATED, response=entry["response"])
+            return entry["response"]
+
+    attempt = 0
+    while True:
+        try:
+            response_text = generate()
+            break
+        except Exception as e:
+            if attempt >= retries or is_throttle(e) or is_transient(e):
+                raise
+            attempt += 1
+            print(f"'{label}' failed ({e}); retrying ({attempt}/{retries})...")
+            time.sleep(2**attempt)
+
+    if step is not None:
+        step.set_state(GENERATED, response=response_text)
+    if cache is not None:
+        cache.put(
+            cache_key,
+            {"source": label, "model": MODEL_NAME, "response": response_text},
+        )
+    return response_text
+
+
+def _transcribe_chunk(
+    chunk_path,
+    cache,
+    cache_key,
+    refresh,
+    retries,
+    prompt=TRANSCRIBE_PROMPT,
+    stats=None,
+    step=None,
+):
+    """Transcribes one chunk, retrying only this chunk on failure."""
+    on_stage = step.set_state if step is not None else None
+    uploads = {}  # A retried generation reuses the chunk's upload
+    return run_cached(
+        os.path.basename(chunk_path),
+        lambda: generate_response(
+            chunk_path, prompt=prompt, stats=stats, on_stage=on_stage, uploads=uploads
+        ),
+        cache,
+        cache_key,
+        refresh,
+        retries,
+        step,
+    )
+
+
+def stitch_chunks(ranges, responses):
+    """
+    Merges chunk responses (in page order) into a single response with the
+    same section layout as an unchunked run, plus the automated analysis.
+    """
+    transcriptions = []
+    translations = []
+    assessments = []
+    chunk_lines = []
+
+    for (first, last), response_text in zip(ranges, responses):
+        sections = parse_sections(response_text)
+        # The model numbers the pages of each chunk from 1
+        transcription = renumber_pages(
+            sections.get(
+                "TRANSCRIPCIÓN", "Error: Could not extract transcription from response"
+            ),
+            first - 1,
+            first,
+        )
+        transcriptions.append(transcription)
+        translations.append(renumber_pages(sections.get("TRADUCCIÓN", ""), first - 1, first))
+        if "QUALITY ASSESSMENT" in sections:
+            assessments.append(f"[Pages {first}-{last}]\n{sections['QUALITY ASSESSMENT']}")
+
+        page_text = strip_page_markers(transcription)
+        issues = detect_anomalies(page_text)
+        score = calculate_confidence_score(page_text, issues)
+        detail = ", ".join(issues) if issues else "No obvious issues detected"
+        chunk_lines.append(f"- Pages {first}-{last}: {score}% - {detail}")
+
+    response_text = "--- TRANSCRIPCIÓN ---\n"
+    response_text += "\n\n".join(transcriptions)
+    response_text += "\n\n--- TRADUCCIÓN ---\n"
+    response_text += "\n\n".join(translations)
+    response_text += "\n\n--- QUALITY ASSESSMENT ---\n"
+    response_text += "\n\n".join(assessments)
+
+    analysis = build_automated_analysis("\n\n".join(transcriptions))
+    analysis += "Per-chunk analysis:\n" + "\n".join(chunk_lines) + "\n"
+    return response_text + analysis
+
+
+def split_ranges(ranges, chunk_pages):
+    """Splits (first, last) page ranges into chunks of at most chunk_pages pages."""
+    chunks = []
+    for first, last in ranges:
+        for start, end in page_ranges(last - first + 1, chunk_pages):
+            chunks.append((start + first - 1, end + first - 1))
+    return chunks
+
+
+def transcribe_chunked(
+    pdf_path,
+    chunk_pages=DEFAULT_CHUNK_PAGES,
+    workers=DEFAULT_CHUNK_WORKERS,
+    retries=DEFAULT_RETRIES,
+    use_cache=True,
+    refresh=False,
+    pages=None,
+    optimize=False,
+    translation_memory=False,
+    stats=None,
+    job=None,
+):
+    """
+    Transcribes and translates a PDF in page-range chunks processed
+    concurrently, returning the stitched result.
+
+    pages, a list of 1-based inclusive (first, last) ranges, restricts the
+    run to those pages, e.g. to re-process low-confidence pages. With
+    optimize=True the document is shrunk once before splitting (see
+    preprocess.py). With translation_memory=True chunks are only transcribed
+    and then translated through the translation memory. stats, a
+    result.RunStats, collects timings and token usage across chunks. job, a
+    jobs.DocumentJob, tracks each chunk as a step named 'pages F-L'.
+    """
+    prompt = TRANSCRIBE_ONLY_PROMPT if translation_memory else TRANSCRIBE_PROMPT
+    cache = None
+    if use_cache:
+        cache = get_default_cache()
+
+    num_pages = page_count(pdf_path)
+    if pages:
+        if any(last > num_pages for _, last in pages):
+            raise ValueError(f"Page range exceeds the document's {num_pages} pages")
+        ranges = split_ranges(pages, chunk_pages)
+    else:
+        ranges = page_ranges(num_pages, chunk_pages)
+    print(f"Splitting '{os.path.basename(pdf_path)}' into {len(ranges)} chunks...")
+
+    with tempfile.TemporaryDirectory(prefix="ocr-chunks-") as tmp_dir:
+        with prepared_for_upload(pdf_path, enabled=optimize) as upload_path:
+            chunk_paths = split_pdf(upload_path, ranges, tmp_dir)
+
+        base_key = None
+        if cache is not None:
+            base_key = cache.make_key(pdf_path, MODEL_NAME, prompt, "chunked")
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = []
+            for (first, last), chunk_path in zip(ranges, chunk_paths):
+                cache_key = None
+                if base_key is not None:
+                    cache_key = text_sha256(f"{base_key}|pages {first}-{last}")
+                futures.append(
+                    executor.submit(
+                        _transcribe_chunk,
+                        chunk_path,
+                        cache,
+                        cache_key,
+                        refresh,
+                        retries,
+                        prompt,
+                        stats,
+                        job_step(job, f"pages {first}-{last}"),
+                    )
+                )
+
+            responses = []
+            failed = []
+            for (first, last), future in zip(ranges, futures):
+                try:
+                    responses.append(future.result())
+                except Exception as e:
+                    failed.append(f"pages {first}-{last}: {e}")
+
+    if failed:
+        message = f"{len(failed)} of {len(ranges)} chunks failed ({'; '.join(failed)})."
+        if cache is not None:
+            message += " Completed chunks are cached; re-run to retry only the failed ones."
+        raise RuntimeError(message)
+
+    if not translation_memory:
+        with record_time(stats, "parse"):
+            return stitch_chunks(ranges, responses)
+    return translate_and_stitch(pdf_path, ranges, responses, stats)
+
+
+def translate_and_stitch(pdf_path, ranges, responses, stats=None):
+    """
+    Adds translations from the translation memory to transcription-only chunk
+    responses, stitches them and reports the document's hit rate.
+    """
+    from translation_memory import format_stats, merge_stats, translate_response
+
+    translated = []
+    all_counts = []
+    for response_text in responses:
+        response_text, counts = translate_response(response_text, stats=stats)
+        translated.append(response_text)
+        all_counts.append(counts)
+
+    line = format_stats(merge_stats(all_counts))
+    print(f"'{os.path.basename(pdf_path)}': {line}")
+    return stitch_chunks(ranges, translated) + line + "\n"
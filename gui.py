@@ -1,10 +1,16 @@
 import sys
 import os
-import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 from PIL import Image, ImageTk
-from rasterize import rasterize_pdf
+
+from batch import DEFAULT_WORKERS
+from work_queue import DocumentQueue, ProgressStats, drain_events, estimate_remaining
+
+POLL_MS = 100  # How often the Tk loop applies worker events
+MAX_EVENTS_PER_TICK = 500
+MAX_LOG_LINES = 5000  # Older log lines are dropped to keep the widget fast
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -20,7 +26,7 @@ class OCRGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Procesador PDF OCR")
-        self.root.geometry("700x600")
+        self.root.geometry("760x820")
         
         # Colors
         self.BG_COLOR = "#FFFFFF"
@@ -75,18 +81,29 @@ class OCRGUI:
 
         # --- Content ---
 
-        # Input PDF
-        ttk.Label(main_frame, text="PDF de entrada:").grid(
-            row=1, column=0, sticky="w", padx=10, pady=10
+        # Input PDFs
+        ttk.Label(main_frame, text="PDFs de entrada:").grid(
+            row=1, column=0, sticky="nw", padx=10, pady=10
         )
-        self.input_entry = ttk.Entry(main_frame, width=50)
-        self.input_entry.grid(row=1, column=1, padx=10, pady=10)
-        ttk.Button(main_frame, text="Explorar", command=self.browse_input).grid(
-            row=1, column=2, padx=10, pady=10
+        self.job_tree = ttk.Treeview(
+            main_frame, columns=("file", "state", "progress", "eta"), show="headings", height=6
         )
+        for column, heading, width in (
+            ("file", "Archivo", 250),
+            ("state", "Estado", 110),
+            ("progress", "Progreso", 70),
+            ("eta", "Tiempo restante", 100),
+        ):
+            self.job_tree.heading(column, text=heading)
+            self.job_tree.column(column, width=width, anchor="w" if column == "file" else "center")
+        self.job_tree.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
+        input_buttons = ttk.Frame(main_frame)
+        input_buttons.grid(row=1, column=2, sticky="n", padx=10, pady=10)
+        ttk.Button(input_buttons, text="Añadir", command=self.browse_input).pack(fill="x", pady=(0, 5))
+        ttk.Button(input_buttons, text="Quitar", command=self.remove_selected).pack(fill="x")
 
-        # Output Path
-        ttk.Label(main_frame, text="Archivo de salida:").grid(
+        # Output Directory
+        ttk.Label(main_frame, text="Carpeta de salida:").grid(
             row=2, column=0, sticky="w", padx=10, pady=10
         )
         self.output_entry = ttk.Entry(main_frame, width=50)
@@ -106,100 +123,301 @@ class OCRGUI:
         ttk.Radiobutton(format_frame, text="Word (.docx)", variable=self.format_var, value="docx").pack(side="left", padx=10)
         ttk.Radiobutton(format_frame, text="PDF (.pdf)", variable=self.format_var, value="pdf").pack(side="left", padx=10)
 
-        # Progress Bar
-        self.progress = ttk.Progressbar(main_frame, orient="horizontal", mode="indeterminate")
-        self.progress.grid(row=4, column=0, columnspan=3, padx=10, pady=20, sticky="ew")
+        # Cache options
+        self.use_cache_var = tk.BooleanVar(value=True)
+        self.refresh_var = tk.BooleanVar(value=False)
+        cache_frame = ttk.Frame(main_frame)
+        cache_frame.grid(row=4, column=1, columnspan=2, sticky="w", padx=10)
+        ttk.Checkbutton(cache_frame, text="Usar caché", variable=self.use_cache_var).pack(side="left", padx=10)
+        ttk.Checkbutton(cache_frame, text="Forzar reprocesado", variable=self.refresh_var).pack(side="left", padx=10)
+        self.optimize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cache_frame, text="Optimizar antes de subir", variable=self.optimize_var).pack(side="left", padx=10)
+        self.translation_memory_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cache_frame, text="Memoria de traducción", variable=self.translation_memory_var).pack(side="left", padx=10)
+        self.dedup_pages_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cache_frame, text="Reutilizar páginas repetidas", variable=self.dedup_pages_var).pack(side="left", padx=10)
+
+        # Concurrent documents
+        ttk.Label(main_frame, text="Documentos simultáneos:").grid(
+            row=5, column=0, sticky="w", padx=10, pady=10
+        )
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        ttk.Spinbox(main_frame, from_=1, to=16, textvariable=self.workers_var, width=5).grid(
+            row=5, column=1, sticky="w", padx=10, pady=10
+        )
+
+        # Progress Bar (all queued documents)
+        self.progress = ttk.Progressbar(main_frame, orient="horizontal", mode="determinate", maximum=100)
+        self.progress.grid(row=6, column=0, columnspan=3, padx=10, pady=(20, 5), sticky="ew")
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.status_var).grid(row=7, column=0, columnspan=3)
 
         # Process Button
         self.process_btn = ttk.Button(
-            main_frame, text="PROCESAR PDF", command=self.start_processing
+            main_frame, text="PROCESAR PDFs", command=self.start_processing
         )
-        self.process_btn.grid(row=5, column=0, columnspan=3, pady=10)
+        self.process_btn.grid(row=8, column=0, columnspan=3, pady=10)
 
         # Log Area
         ttk.Label(main_frame, text="Registro/Resultados:").grid(
-            row=6, column=0, sticky="w", padx=10, pady=5
+            row=9, column=0, sticky="w", padx=10, pady=5
         )
         self.log_text = scrolledtext.ScrolledText(
             main_frame, width=70, height=15, font=("Courier", 9), relief="flat", borderwidth=1
         )
-        self.log_text.grid(row=7, column=0, columnspan=3, padx=10, pady=5)
+        self.log_text.grid(row=10, column=0, columnspan=3, padx=10, pady=5)
         # Add a border frame for log text because flat relief might be too invisible
         self.log_text.config(background="#f5f5f5")
 
+        # Documents by tree item id: path, state, progress and start time.
+        # Only the Tk thread touches these; workers report through self.queue
+        self.jobs = {}
+        self.queue = None
+        self.failures = []
+        self.root.after(POLL_MS, self.poll_events)
+
     def browse_input(self):
-        filename = filedialog.askopenfilename(filetypes=[("Archivos PDF", "*.pdf")])
-        if filename:
-            self.input_entry.delete(0, tk.END)
-            self.input_entry.insert(0, filename)
+        filenames = filedialog.askopenfilenames(filetypes=[("Archivos PDF", "*.pdf")])
+        queued = {job["path"] for job in self.jobs.values()}
+        for filename in filenames:
+            if filename in queued:
+                continue
+            job_id = self.job_tree.insert("", tk.END, values=(os.path.basename(filename), "Pendiente", "", ""))
+            self.jobs[job_id] = {"path": filename, "state": "Pendiente", "progress": 0.0, "start": None}
+
+    def remove_selected(self):
+        for job_id in self.job_tree.selection():
+            if self.jobs[job_id]["state"] in ("En cola", "Procesando"):
+                continue
+            self.job_tree.delete(job_id)
+            del self.jobs[job_id]
 
     def browse_output(self):
-        current_format = self.format_var.get()
-        ext = f".{current_format}"
-        filename = filedialog.asksaveasfilename(
-            defaultextension=ext, filetypes=[(f"Archivos {current_format.upper()}", f"*{ext}")]
-        )
-        if filename:
+        dirname = filedialog.askdirectory()
+        if dirname:
             self.output_entry.delete(0, tk.END)
-            self.output_entry.insert(0, filename)
+            self.output_entry.insert(0, dirname)
 
-    def log(self, message):
-        self.log_text.insert(tk.END, message + "\n")
+    def append_log(self, lines):
+        """Appends lines to the log in one insert (Tk thread only)."""
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see(tk.END)
 
+    def output_path_for(self, input_path, output_dir, output_format, taken):
+        """ocr-<name>.<format> in output_dir (default: next to the input), not reusing taken paths."""
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        directory = output_dir or os.path.dirname(input_path)
+        output_path = os.path.join(directory, f"ocr-{base_name}.{output_format}")
+        counter = 2
+        while output_path in taken:
+            output_path = os.path.join(directory, f"ocr-{base_name}-{counter}.{output_format}")
+            counter += 1
+        taken.add(output_path)
+        return output_path
+
     def start_processing(self):
-        input_path = self.input_entry.get()
-        output_path = self.output_entry.get()
-        # Removed rasterize and dpi vars
+        output_dir = self.output_entry.get()
         output_format = self.format_var.get()
+        pending = [job_id for job_id, job in self.jobs.items() if job["state"] in ("Pendiente", "Error")]
 
-        if not input_path or not os.path.exists(input_path):
-            messagebox.showerror("Error", "Por favor seleccione un archivo PDF de entrada válido.")
+        if not pending:
+            messagebox.showerror("Error", "Por favor añada al menos un archivo PDF de entrada.")
+            return
+        if output_dir and not os.path.isdir(output_dir):
+            messagebox.showerror("Error", "La carpeta de salida no existe.")
             return
 
-        if not output_path:
-            input_dir = os.path.dirname(input_path)
-            base_name = os.path.splitext(os.path.basename(input_path))[0]
-            output_path = os.path.join(input_dir, f"ocr-{base_name}.{output_format}")
-            self.output_entry.insert(0, output_path)
-            
-        # Ensure output path has correct extension
-        if not output_path.lower().endswith(f".{output_format}"):
-             output_path = os.path.splitext(output_path)[0] + f".{output_format}"
-             self.output_entry.delete(0, tk.END)
-             self.output_entry.insert(0, output_path)
-
-        self.log("Iniciando procesamiento...")
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = DEFAULT_WORKERS
+        self.queue = DocumentQueue(self.process_pdf, workers=workers)
+        self.failures = []
+        self.append_log([f"Iniciando procesamiento de {len(pending)} documento(s), {workers} a la vez..."])
         self.process_btn.config(state="disabled")
-        self.progress.start()
-        threading.Thread(
-            target=self.process_pdf, args=(input_path, output_path, output_format)
-        ).start()
 
-    def process_pdf(self, input_path, output_path, output_format):
+        taken = set()
+        for job_id in pending:
+            job = self.jobs[job_id]
+            job.update(state="En cola", progress=0.0, start=None)
+            self.queue.submit(
+                job_id,
+                job["path"],
+                self.output_path_for(job["path"], output_dir, output_format, taken),
+                output_format,
+                use_cache=self.use_cache_var.get(),
+                refresh=self.refresh_var.get(),
+                optimize=self.optimize_var.get(),
+                translation_memory=self.translation_memory_var.get(),
+                dedup_pages=self.dedup_pages_var.get(),
+            )
+        self.queue.shutdown(wait=False)  # Lets the pool's threads exit once the queue is done
+        self.refresh_jobs()
+
+    def poll_events(self):
+        """Applies a batch of worker events to the window, then reschedules itself."""
+        if self.queue is not None:
+            lines = []
+            for job_id, kind, data in drain_events(self.queue.events, MAX_EVENTS_PER_TICK):
+                job = self.jobs.get(job_id)
+                prefix = f"[{os.path.basename(job['path'])}] " if job else ""
+                if kind == "log":
+                    lines.append(prefix + data["message"])
+                elif job is None:
+                    continue
+                elif kind == "started":
+                    job.update(state="Procesando", start=time.monotonic())
+                elif kind == "progress":
+                    job["progress"] = data["fraction"]
+                elif kind == "done":
+                    job.update(state="Completado", progress=1.0)
+                elif kind == "failed":
+                    job["state"] = "Error"
+                    lines.append(f"{prefix}Error: {data['error']}")
+                    self.failures.append(f"{os.path.basename(job['path'])}: {data['error']}")
+            if lines:
+                self.append_log(lines)
+            self.refresh_jobs()
+        self.root.after(POLL_MS, self.poll_events)
+
+    def refresh_jobs(self):
+        """Updates the job list, the overall progress bar and ETA, and finishes the run when idle."""
+        now = time.monotonic()
+        durations = list(self.queue.durations) if self.queue is not None else []
+        running = []
+        queued = 0
+        for job_id, job in self.jobs.items():
+            eta = ""
+            if job["state"] == "Procesando":
+                remaining = estimate_remaining(now - job["start"], job["progress"], durations)
+                running.append(remaining or 0.0)
+                eta = format_seconds(remaining) if remaining is not None else "..."
+            elif job["state"] == "En cola":
+                queued += 1
+            progress = f"{job['progress']:.0%}" if job["state"] != "Pendiente" else ""
+            self.job_tree.item(job_id, values=(os.path.basename(job["path"]), job["state"], progress, eta))
+
+        active = [job for job in self.jobs.values() if job["state"] != "Pendiente"]
+        if active:
+            self.progress["value"] = 100 * sum(job["progress"] for job in active) / len(active)
+        if self.queue is None:
+            return
+
+        done = sum(1 for job in active if job["state"] in ("Completado", "Error"))
+        status = f"{done}/{len(active)} documentos terminados"
+        if running or queued:
+            average = sum(durations) / len(durations) if durations else None
+            if average is not None or running:
+                # Queued documents start as workers free up
+                total = max(running, default=0.0)
+                if average is not None:
+                    total += average * queued / self.queue.workers
+                status += f" · tiempo restante estimado: {format_seconds(total)}"
+            self.status_var.set(status)
+            return
+
+        self.status_var.set(status)
+        self.queue = None
+        self.process_btn.config(state="normal")
+        if self.failures:
+            messagebox.showerror("Error", "Fallaron los siguientes documentos:\n" + "\n".join(self.failures))
+        else:
+            messagebox.showinfo("Procesamiento completo", f"{done} documento(s) procesados.")
+
+    def process_pdf(
+        self,
+        job_id,
+        input_path,
+        output_path,
+        output_format,
+        use_cache=True,
+        refresh=False,
+        optimize=False,
+        translation_memory=False,
+        dedup_pages=False,
+    ):
+        """Processes one queued document on a worker thread; reports only through self.queue."""
+        work_queue = self.queue
+        job = None
         try:
-            # Removed rasterize logic
-            
-            self.log("Transcribiendo y traduciendo PDF...")
+            work_queue.log(job_id, "Transcribiendo y traduciendo PDF...")
 
-            from processor import transcribe_and_translate, save_to_file
-            
-            result = transcribe_and_translate(input_path)
+            from processor import transcribe_result, save_to_file
+            from page_index import index_path_for, write_page_index
+            from result import result_path_for
+            import metrics
+            from jobs import EXPORTED, GENERATED, get_default_store, run_key
 
-            save_to_file(result, output_path, output_format)
+            # An interrupted run of the same file and options is picked up where it stopped
+            store = get_default_store()
+            key = run_key(
+                [input_path],
+                {
+                    "output": output_path,
+                    "format": output_format,
+                    "optimize": optimize,
+                    "translation_memory": translation_memory,
+                    "dedup_pages": dedup_pages,
+                },
+            )
+            run = store.find_run(key)
+            if run is not None:
+                run_id = run["id"]
+                work_queue.log(job_id, "Retomando el procesamiento interrumpido de este archivo...")
+            else:
+                run_id = store.create_run(key)
+            job = store.document(run_id, input_path)
+            stats = ProgressStats(input_path, lambda stage: work_queue.progress(job_id, stage))
 
-            self.log(f"Procesamiento completo. Salida guardada en {output_path}")
-            self.log(
-                "Resultados:\n" + result[:500] + "..." if len(result) > 500 else result
+            def on_section(name, content):
+                if name == "TRANSCRIPCIÓN":
+                    work_queue.progress(job_id, "transcription")
+                preview = content[:500] + "..." if len(content) > 500 else content
+                work_queue.log(job_id, f"--- {name} ---\n{preview}")
+
+            result = transcribe_result(
+                input_path,
+                use_cache=use_cache,
+                refresh=refresh,
+                on_section=on_section,
+                optimize=optimize,
+                translation_memory=translation_memory,
+                dedup_pages=dedup_pages,
+                job=job,
+                stats=stats,
             )
+            job.set_state(GENERATED)
+
+            save_to_file(result, output_path, output_format, stats)
+            metrics.record_document(result.update_stats(stats))
+            write_page_index(result.page_index(), index_path_for(output_path))
+            result.write_json(result_path_for(output_path))
+            job.set_state(
+                EXPORTED,
+                output=output_path,
+                index=index_path_for(output_path),
+                result=result_path_for(output_path),
+            )
+            store.finish_run(run_id)
+
+            work_queue.log(job_id, f"Procesamiento completo. Salida guardada en {output_path}")
 
         except Exception as e:
-            self.log(f"Error: {e}")
-            messagebox.showerror("Error", str(e))
-        finally:
-            self.process_btn.config(state="normal")
-            self.progress.stop()
+            if job is not None:
+                job.fail(e)
+                metrics.record_failure(input_path, e)
+            raise
+
 
+def format_seconds(seconds):
+    """Formats a duration as '45 s' or '3 min 05 s'."""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds} s"
+    return f"{seconds // 60} min {seconds % 60:02d} s"
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,297 @@
+"""
+Crash-safe job store for batch and GUI runs.
+
+Every run of main.py (and every GUI job) is recorded in a local SQLite
+database with its documents and their steps (the chunks, text-layer runs or
+whole-document request of each PDF). Each step moves through
+uploaded -> active -> generated, storing the remote file and, once
+generated, the model's response; a document becomes exported once all its
+output files are written. Every transition is committed immediately, so
+after a crash, quota exhaustion or network drop `main.py --resume` skips the
+exported documents and the generated steps and only redoes the rest.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cache import DEFAULT_CACHE_DIR, file_sha256, text_sha256
+
+DEFAULT_STORE_PATH = os.getenv(
+    "OCR_JOB_STORE", os.path.join(DEFAULT_CACHE_DIR, "jobs", "jobs.sqlite3")
+)
+
+PENDING = "pending"
+UPLOADED = "uploaded"
+ACTIVE = "active"
+GENERATED = "generated"
+EXPORTED = "exported"
+FAILED = "failed"
+STATE_ORDER = (PENDING, UPLOADED, ACTIVE, GENERATED, EXPORTED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    argv TEXT,
+    cwd TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    state TEXT NOT NULL,
+    artifacts TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (run_id, path)
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    step TEXT NOT NULL,
+    state TEXT NOT NULL,
+    artifacts TEXT NOT NULL DEFAULT '{}',
+    response TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (run_id, path, step)
+);
+"""
+
+
+def run_key(pdf_paths, options):
+    """Identifies a run by its inputs and the options that shape its outputs."""
+    inputs = sorted(os.path.abspath(path) for path in pdf_paths)
+    data = {"inputs": inputs, "options": options}
+    return text_sha256(json.dumps(data, sort_keys=True, default=str))
+
+
+class JobStore:
+    """
+    Runs, documents and steps persisted in SQLite; safe to use from worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+        return rows
+
+    def create_run(self, key, argv=None):
+        """Starts a new run and returns its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (key, argv, cwd, created) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(argv), os.getcwd(), time.time()),
+            )
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def find_run(self, key=None):
+        """
+        Returns the most recent unfinished run (with the given key, if any)
+        as a dict with id, key, argv and cwd, or None. Without a key, only
+        runs started with command-line arguments are considered: GUI runs
+        store no argv and cannot be resumed from the command line.
+        """
+        sql = "SELECT id, key, argv, cwd FROM runs WHERE finished IS NULL"
+        params = ()
+        if key is not None:
+            sql += " AND key = ?"
+            params = (key,)
+        else:
+            sql += " AND argv IS NOT NULL AND argv != 'null'"
+        rows = self._execute(sql + " ORDER BY id DESC LIMIT 1", params)
+        if not rows:
+            return None
+        run_id, key, argv, cwd = rows[0]
+        return {"id": run_id, "key": key, "argv": json.loads(argv), "cwd": cwd}
+
+    def finish_run(self, run_id):
+        """
+        Marks a run complete; it is no longer offered for --resume and its
+        stored responses (kept only for resuming) are dropped.
+        """
+        self._execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+        self._execute("UPDATE steps SET response = NULL WHERE run_id = ?", (run_id,))
+
+    def document(self, run_id, path):
+        """
+        Returns the DocumentJob of a PDF in a run, registering it if needed.
+        If the file changed since it was registered, its progress is discarded.
+        """
+        path = os.path.abspath(path)
+        digest = file_sha256(path)
+        rows = self._execute(
+            "SELECT sha256 FROM documents WHERE run_id = ? AND path = ?", (run_id, path)
+        )
+        if rows and rows[0][0] != digest:
+            print(f"'{os.path.basename(path)}' changed since the run started; starting it over")
+            self._execute("DELETE FROM steps WHERE run_id = ? AND path = ?", (run_id, path))
+            self._execute("DELETE FROM documents WHERE run_id = ? AND path = ?", (run_id, path))
+            rows = []
+        if not rows:
+            self._execute(
+                "INSERT INTO documents (run_id, path, sha256, state, updated)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (run_id, path, digest, PENDING, time.time()),
+            )
+        return DocumentJob(self, run_id, path)
+
+    def summary(self, run_id):
+        """Returns {state: count} for the documents and the steps of a run."""
+        documents = self._execute(
+            "SELECT state, COUNT(*) FROM documents WHERE run_id = ? GROUP BY state", (run_id,)
+        )
+        steps = self._execute(
+            "SELECT state, COUNT(*) FROM steps WHERE run_id = ? GROUP BY state", (run_id,)
+        )
+        return {"documents": dict(documents), "steps": dict(steps)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def format_summary(summary):
+    """Renders a JobStore.summary as one line."""
+    documents = summary["documents"]
+    total = sum(documents.values())
+    line = f"{documents.get(EXPORTED, 0)}/{total} documents exported"
+    if documents.get(FAILED):
+        line += f", {documents[FAILED]} failed"
+    return line + f", {summary['steps'].get(GENERATED, 0)} steps already generated"
+
+
+class DocumentJob:
+    """One PDF of a run. Passed as job= through transcribe_and_translate."""
+
+    def __init__(self, store, run_id, path):
+        self.store = store
+        self.run_id = run_id
+        self.path = path
+
+    def _row(self):
+        rows = self.store._execute(
+            "SELECT state, artifacts FROM documents WHERE run_id = ? AND path = ?",
+            (self.run_id, self.path),
+        )
+        return rows[0][0], json.loads(rows[0][1])
+
+    @property
+    def state(self):
+        return self._row()[0]
+
+    @property
+    def artifacts(self):
+        return self._row()[1]
+
+    def is_exported(self):
+        """True if the document was exported and its output files still exist."""
+        state, artifacts = self._row()
+        return state == EXPORTED and all(os.path.exists(path) for path in artifacts.values())
+
+    def set_state(self, state, **artifacts):
+        """Moves the document to state, merging artifacts (name -> file path)."""
+        merged = self.artifacts
+        merged.update(artifacts)
+        self.store._execute(
+            "UPDATE documents SET state = ?, artifacts = ?, error = NULL, updated = ?"
+            " WHERE run_id = ? AND path = ?",
+            (state, json.dumps(merged), time.time(), self.run_id, self.path),
+        )
+
+    def fail(self, error):
+        self.store._execute(
+            "UPDATE documents SET state = ?, error = ?, updated = ? WHERE run_id = ? AND path = ?",
+            (FAILED, str(error), time.time(), self.run_id, self.path),
+        )
+
+    def step(self, name):
+        """Returns the Step called name (e.g. 'pages 1-20') of this document."""
+        return Step(self, name)
+
+    def _advance(self, state):
+        """Moves the document forward to state, never back."""
+        earlier = STATE_ORDER[: STATE_ORDER.index(state)] + (FAILED,)
+        self.store._execute(
+            f"UPDATE documents SET state = ?, updated = ? WHERE run_id = ? AND path = ?"
+            f" AND state IN ({','.join('?' * len(earlier))})",
+            (state, time.time(), self.run_id, self.path, *earlier),
+        )
+
+
+class Step:
+    """
+    One request of a document: a chunk, a text-layer run or the whole file.
+    Its generated response is kept so a resumed run does not request it again.
+    """
+
+    def __init__(self, job, name):
+        self.job = job
+        self.name = name
+
+    @property
+    def response(self):
+        """The generated response, or None if the step has not completed."""
+        rows = self.job.store._execute(
+            "SELECT response FROM steps WHERE run_id = ? AND path = ? AND step = ? AND state = ?",
+            (self.job.run_id, self.job.path, self.name, GENERATED),
+        )
+        return rows[0][0] if rows else None
+
+    def set_state(self, state, response=None, **artifacts):
+        """Records state (and the response once generated); usable as on_stage."""
+        rows = self.job.store._execute(
+            "SELECT artifacts FROM steps WHERE run_id = ? AND path = ? AND step = ?",
+            (self.job.run_id, self.job.path, self.name),
+        )
+        if rows:
+            artifacts = {**json.loads(rows[0][0]), **artifacts}
+        self.job.store._execute(
+            "INSERT OR REPLACE INTO steps (run_id, path, step, state, artifacts, response, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.job.run_id,
+                self.job.path,
+                self.name,
+                state,
+                json.dumps(artifacts),
+                response,
+                time.time(),
+            ),
+        )
+        if state in (UPLOADED, ACTIVE):
+            self.job._advance(state)
+
+
+def job_step(job, name):
+    """job.step(name), or None when the run is not tracked."""
+    return job.step(name) if job is not None else None
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """Returns the process-wide job store, creating it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JobStore()
+        return _default_store
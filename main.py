@@ -1,43 +1,300 @@
 import argparse
 import os
 import sys
+import time
 
-from processor import transcribe_and_translate
+import metrics
+import ratelimit
+from batch import DEFAULT_WORKERS, collect_pdfs, format_summary, output_paths_for, run_batch
+from jobs import EXPORTED, GENERATED, get_default_store, run_key
+from jobs import format_summary as format_job_summary
+from page_index import index_path_for, parse_page_spec, write_page_index
+from processor import save_to_file, transcribe_result
+from result import RunStats, record_time, result_path_for
+
+# Options that do not change the outputs, so a resumed run may use other values
+RUN_KEY_IGNORED = ("inputs", "resume", "workers", "no_cache", "refresh", "stream", "rpm", "tpm")
+
+
+def write_output(result, output_path, output_format, stats=None):
+    """
+    Writes a result (OCRResult or text) as plain text or through save_to_file;
+    stats, a result.RunStats, records the 'export' stage.
+    """
+    if output_format == "txt":
+        if hasattr(result, "to_text"):
+            result = result.to_text()
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with record_time(stats, "export"):
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(result)
+    else:
+        save_to_file(result, output_path, output_format, stats)
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Transcribe and translate PDF files using Gemini API."
     )
-    parser.add_argument("input_pdf", help="Path to the input PDF file.")
-    parser.add_argument("--output", "-o", help="Path to save the output text file.")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        metavar="input_pdf",
+        help="PDF files, directories or glob patterns (e.g. 'input/*.pdf').",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Path to save the output file (single input only).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-d",
+        help="Directory for batch outputs (default: current directory).",
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        choices=["txt", "docx", "pdf"],
+        default="txt",
+        help="Output format (default: txt).",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of PDFs processed concurrently (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--chunk-pages",
+        type=int,
+        help="Split each PDF into chunks of this many pages, transcribed concurrently.",
+    )
+    parser.add_argument(
+        "--pages",
+        type=parse_page_spec,
+        help="Only process these pages, e.g. '3,7-9' (re-run low-confidence pages).",
+    )
+    parser.add_argument(
+        "--optimize",
+        action="store_true",
+        help="Downsample and recompress large scans before upload (see preprocess.py).",
+    )
+    parser.add_argument(
+        "--no-text-layer",
+        action="store_true",
+        help="OCR every page even when the PDF has selectable text.",
+    )
+    parser.add_argument(
+        "--translation-memory",
+        action="store_true",
+        help="Transcribe first, then translate only paragraphs not already in the translation memory.",
+    )
+    parser.add_argument(
+        "--dedup-pages",
+        action="store_true",
+        help="Reuse pages already transcribed in earlier documents instead of OCRing them again.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the response and write each section as soon as it is complete (txt only).",
+    )
+    parser.add_argument(
+        "--jsonl",
+        help="JSONL file batch results are appended to (default: <output-dir>/results.jsonl).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk result cache (no lookup, no store).",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results and overwrite them with a fresh API call.",
+    )
+    parser.add_argument(
+        "--metrics-log",
+        help="Append JSON metric lines (stage spans, per-document usage) here; '-' for stderr.",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        help="Write run totals to this Prometheus textfile after each document.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Model requests per minute shared by all workers (default: $OCR_RPM, else adaptive).",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Model tokens per minute shared by all workers (default: $OCR_TPM, else unlimited).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue an interrupted run: skip exported documents and reuse generated "
+            "chunks. Without inputs, resumes the most recent unfinished run."
+        ),
+    )
 
     args = parser.parse_args()
+    store = get_default_store()
+    if not args.inputs:
+        if not args.resume:
+            parser.error("the following arguments are required: input_pdf")
+        run = store.find_run()
+        if run is None:
+            print("Error: No unfinished run to resume.")
+            sys.exit(1)
+        if run["cwd"] != os.getcwd():
+            print(f"Resuming in '{run['cwd']}'")
+            os.chdir(run["cwd"])
+        args = parser.parse_args(run["argv"])
+        args.resume = True
+        if not args.inputs:
+            print("Error: The unfinished run has no inputs to resume.")
+            sys.exit(1)
+    metrics.configure(args.metrics_log, args.prometheus_file)
+    ratelimit.configure(args.rpm, args.tpm)
+
+    is_single = len(args.inputs) == 1 and os.path.isfile(args.inputs[0])
+    if is_single:
+        pdf_paths = args.inputs
+    else:
+        pdf_paths = collect_pdfs(args.inputs)
+        if args.output:
+            print("Error: --output only applies to a single input file; use --output-dir.")
+            sys.exit(1)
 
-    input_path = args.input_pdf
-    if not os.path.exists(input_path):
-        print(f"Error: Input file '{input_path}' not found.")
+    if not pdf_paths:
+        print(f"Error: Input file '{args.inputs[0]}' not found.")
         sys.exit(1)
 
-    print(f"Processing '{input_path}'...")
-    try:
-        result = transcribe_and_translate(input_path)
+    if is_single and args.output:
+        output_paths = {pdf_paths[0]: args.output}
+    else:
+        output_paths = output_paths_for(pdf_paths, args.output_dir or ".", args.format)
+    jsonl_path = args.jsonl or os.path.join(args.output_dir or ".", "results.jsonl")
 
-        if args.output:
-            output_path = args.output
+    key = run_key(
+        pdf_paths,
+        {
+            name: value
+            for name, value in vars(args).items()
+            if name not in RUN_KEY_IGNORED
+        },
+    )
+    run = store.find_run(key)
+    if args.resume and run is not None:
+        run_id = run["id"]
+        print(f"Resuming run {run_id}: {format_job_summary(store.summary(run_id))}")
+    else:
+        if args.resume:
+            print("No unfinished run with these inputs and options; starting a new one.")
+        elif run is not None:
+            print("An unfinished run with these inputs exists; pass --resume to continue it.")
+        argv = [arg for arg in sys.argv[1:] if arg != "--resume"]
+        run_id = store.create_run(key, argv)
+
+    def process(input_path):
+        job = store.document(run_id, input_path)
+        output_path = output_paths[input_path]
+        if job.is_exported():
+            print(f"Skipping '{input_path}': already exported")
+            return output_path
+
+        print(f"Processing '{input_path}'...")
+        try:
+            export(input_path, output_path, job)
+        except Exception as e:
+            job.fail(e)
+            metrics.record_failure(input_path, e)
+            raise
+        return output_path
+
+    def export(input_path, output_path, job):
+        options = {
+            "use_cache": not args.no_cache,
+            "refresh": args.refresh,
+            "chunk_pages": args.chunk_pages,
+            "pages": args.pages,
+            "optimize": args.optimize,
+            "text_layer": not args.no_text_layer,
+            "translation_memory": args.translation_memory,
+            "dedup_pages": args.dedup_pages,
+            "job": job,
+            "stats": RunStats(source=input_path),
+        }
+
+        if args.stream and args.format == "txt":
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            with open(output_path, "w", encoding="utf-8") as f:
+
+                def on_section(name, content):
+                    f.write(f"--- {name} ---\n{content}\n\n")
+                    f.flush()
+                    print(f"[{os.path.basename(input_path)}] {name} ready ({len(content)} chars)")
+
+                result = transcribe_result(input_path, on_section=on_section, **options)
         else:
-            # Default output filename
-            base_name = os.path.splitext(os.path.basename(input_path))[0]
-            output_path = f"{base_name}_processed.txt"
+            result = transcribe_result(input_path, **options)
+            job.set_state(GENERATED)
+            write_output(result, output_path, args.format, options["stats"])
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(result)
+        result.update_stats(options["stats"])
+        metrics.record_document(result)
+        artifacts = {"output": output_path, "index": index_path_for(output_path)}
+        write_page_index(result.page_index(), artifacts["index"])
+        if is_single:
+            artifacts["result"] = result_path_for(output_path)
+            result.write_json(artifacts["result"])
+        else:
+            artifacts["jsonl"] = jsonl_path
+            result.append_jsonl(jsonl_path)
+        job.set_state(EXPORTED, **artifacts)
 
-        print(f"Successfully processed PDF. Output saved to '{output_path}'.")
+    def print_cache_stats():
+        if not args.no_cache:
+            from cache import get_default_cache
+
+            stats = get_default_cache().stats()
+            print(f"Cache: {stats['hits']} hits, {stats['misses']} misses")
+
+    if is_single:
+        try:
+            output_path = process(pdf_paths[0])
+            store.finish_run(run_id)
+            print(f"Successfully processed PDF. Output saved to '{output_path}'.")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            print_cache_stats()
+            print("Re-run with --resume to continue from the completed chunks.")
+            sys.exit(1)
+        print_cache_stats()
+        return
+
+    print(f"Processing {len(pdf_paths)} PDFs with {args.workers} workers...")
+    start = time.perf_counter()
+    results = run_batch(
+        pdf_paths,
+        process,
+        workers=args.workers,
+        on_done=lambda r: print(f"[{r['status']}] {r['path']} ({r['seconds']:.1f}s)"),
+    )
+    print()
+    print(format_summary(results, time.perf_counter() - start))
+    print(f"Results appended to '{jsonl_path}'")
+    print_cache_stats()
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    if any(r["status"] != "ok" for r in results):
+        print("Re-run with --resume to retry only the unfinished documents and chunks.")
         sys.exit(1)
+    store.finish_run(run_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""
+Structured run metrics: JSON log lines and a Prometheus textfile.
+
+Every timed stage of a run (upload, processing, generate, translate, parse,
+index, export; see result.RunStats) is logged as a 'span' JSON line, and every
+finished document as a 'document' line with its pages, stage timings, bytes
+uploaded and token counts. Totals across the process are also written to a
+Prometheus textfile (for node_exporter's textfile collector) after each
+document, so throughput and cost per page can be graphed.
+
+A document's wall time ('total') is exported as ocr_document_seconds_total,
+apart from the stages. Stage seconds are busy time: the chunks of a chunked
+run are timed concurrently and their stage times added up, so stages can sum
+to more than the wall time and should not be added up to get it.
+
+Both outputs are off unless configured, from main.py's --metrics-log and
+--prometheus-file or the OCR_METRICS_LOG and OCR_PROMETHEUS_FILE variables.
+A log path of '-' writes to stderr.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_config = {
+    "log_path": os.getenv("OCR_METRICS_LOG"),
+    "prometheus_path": os.getenv("OCR_PROMETHEUS_FILE"),
+}
+_log_file = None
+
+
+def _new_totals():
+    return {
+        "documents": {"ok": 0, "error": 0},
+        "pages": 0,
+        "stage_seconds": {},
+        "document_seconds": 0.0,
+        "tokens": {"prompt": 0, "output": 0},
+        "requests": 0,
+        "upload_bytes": 0,
+        "last_document": None,
+    }
+
+
+_totals = _new_totals()
+
+
+def configure(log_path=None, prometheus_path=None):
+    """Sets the outputs; None leaves the environment default in place."""
+    global _log_file
+    with _lock:
+        if log_path is not None:
+            if _log_file not in (None, sys.stderr):
+                _log_file.close()
+            _log_file = None
+            _config["log_path"] = log_path
+        if prometheus_path is not None:
+            _config["prometheus_path"] = prometheus_path
+
+
+def reset():
+    """Clears the accumulated totals."""
+    global _totals
+    with _lock:
+        _totals = _new_totals()
+
+
+def log_event(event, **fields):
+    """Writes one JSON line {"ts", "event", ...fields} if a log is configured."""
+    global _log_file
+    if not _config["log_path"]:
+        return
+    line = json.dumps(
+        {"ts": round(time.time(), 3), "event": event, **fields},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    with _lock:
+        if _log_file is None:
+            if _config["log_path"] == "-":
+                _log_file = sys.stderr
+            else:
+                path = _config["log_path"]
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _log_file = open(path, "a", encoding="utf-8")
+        _log_file.write(line + "\n")
+        _log_file.flush()
+
+
+def log_span(stage, seconds, source=None):
+    """Logs one timed stage of a run."""
+    log_event("span", stage=stage, seconds=round(seconds, 4), source=source)
+
+
+def record_document(result):
+    """
+    Adds a finished result.OCRResult to the totals, logs a 'document' line
+    and rewrites the Prometheus textfile.
+    """
+    usage = result.usage or {}
+    pages = len(result.pages)
+    with _lock:
+        _totals["documents"]["ok"] += 1
+        _totals["pages"] += pages
+        for stage, seconds in (result.timings or {}).items():
+            if stage == "total":
+                _totals["document_seconds"] += seconds
+                continue
+            stage_seconds = _totals["stage_seconds"]
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+        _totals["tokens"]["prompt"] += usage.get("prompt_tokens", 0)
+        _totals["tokens"]["output"] += usage.get("output_tokens", 0)
+        _totals["requests"] += usage.get("requests", 0)
+        _totals["upload_bytes"] += usage.get("upload_bytes", 0)
+        _totals["last_document"] = time.time()
+
+    log_event(
+        "document",
+        source=result.source,
+        status="ok",
+        pages=pages,
+        confidence=result.confidence,
+        timings=result.timings,
+        usage=usage,
+        tokens_per_page=round(usage.get("total_tokens", 0) / pages, 1) if pages else None,
+        seconds_per_page=(
+            round(result.timings["total"] / pages, 3)
+            if pages and "total" in (result.timings or {})
+            else None
+        ),
+    )
+    _write_prometheus()
+
+
+def record_failure(source, error):
+    """Counts and logs a document that failed."""
+    with _lock:
+        _totals["documents"]["error"] += 1
+    log_event("document", source=source, status="error", error=str(error))
+    _write_prometheus()
+
+
+def format_prometheus(totals=None):
+    """Renders the totals in the Prometheus text exposition format."""
+    if totals is None:
+        totals = _totals
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    metric(
+        "ocr_documents_total",
+        "counter",
+        "Documents processed, by outcome.",
+        [({"status": status}, count) for status, count in totals["documents"].items()],
+    )
+    metric(
+        "ocr_pages_total",
+        "counter",
+        "Pages of successfully processed documents.",
+        [({}, totals["pages"])],
+    )
+    metric(
+        "ocr_document_seconds_total",
+        "counter",
+        "Wall-clock seconds spent processing successful documents.",
+        [({}, round(totals["document_seconds"], 3))],
+    )
+    metric(
+        "ocr_stage_seconds_total",
+        "counter",
+        "Busy seconds per pipeline stage; parallel chunks add up, so stages overlap.",
+        [
+            ({"stage": stage}, round(seconds, 3))
+            for stage, seconds in sorted(totals["stage_seconds"].items())
+        ],
+    )
+    metric(
+        "ocr_tokens_total",
+        "counter",
+        "Model tokens, by kind.",
+        [({"kind": kind}, count) for kind, count in totals["tokens"].items()],
+    )
+    metric("ocr_requests_total", "counter", "Model requests.", [({}, totals["requests"])])
+    metric(
+        "ocr_upload_bytes_total", "counter", "Bytes uploaded.", [({}, totals["upload_bytes"])]
+    )
+    if totals["last_document"] is not None:
+        metric(
+            "ocr_last_document_timestamp_seconds",
+            "gauge",
+            "Time the last document finished.",
+            [({}, round(totals["last_document"], 3))],
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus():
+    path = _config["prometheus_path"]
+    if not path:
+        return
+    with _lock:
+        text = format_prometheus(_totals)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # The collector may read at any time, so replace the file atomically
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
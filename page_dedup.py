@@ -0,0 +1,364 @@
+"""
+Page-level deduplication across documents.
+
+Collective agreements reuse whole pages: signature sheets, standard annexes,
+salary tables carried over from earlier years. With page deduplication
+enabled, every page is given an exact digest of its content (see
+page_digests), read with pypdf without rendering anything. Pages with the
+digest of a page already transcribed with the same model and prompt take
+their transcription and translation from a persistent SQLite index; only the
+novel pages are sent to the model, in runs of consecutive pages, and the
+results are stitched back in page order. Novel pages are added to the index
+once transcribed.
+
+Matching is exact on purpose. A perceptual hash of a rendered page cannot
+see a single changed word or figure, and reusing last year's salary table
+for this year's would go unnoticed. The trade-off is that only pages whose
+content is byte-for-byte the same match: a page copied from another PDF or
+regenerated from the same source does, but a scan of the same paper made
+again, or a recompressed copy, does not and is transcribed again. Pages
+whose digest cannot be computed are transcribed too. refresh=True
+(--refresh) ignores the index for a document.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import DEFAULT_CACHE_DIR, get_default_cache, text_sha256
+from chunking import (
+    DEFAULT_CHUNK_PAGES,
+    DEFAULT_CHUNK_WORKERS,
+    DEFAULT_RETRIES,
+    _transcribe_chunk,
+    page_count,
+    split_pdf,
+    stitch_chunks,
+    translate_and_stitch,
+)
+from jobs import job_step
+from page_index import OCR, REUSED, format_page_sources, split_pages
+from preprocess import prepared_for_upload
+from processor import MODEL_NAME, TRANSCRIBE_ONLY_PROMPT, TRANSCRIBE_PROMPT, parse_sections
+from textlayer import page_runs, text_run_response, text_run_transcription
+
+DEFAULT_INDEX_PATH = os.getenv(
+    "OCR_PAGE_INDEX", os.path.join(DEFAULT_CACHE_DIR, "pages", "pages.sqlite3")
+)
+REUSED_ASSESSMENT = "Pages reused from identical pages already transcribed; no OCR was performed."
+
+
+def _hash_drawn_objects(obj, digest, seen):
+    """Adds the images, forms and fonts in obj's resources to digest, recursively."""
+    resources = obj.get("/Resources")
+    if resources is None:
+        return
+    resources = resources.get_object()
+    for kind in ("/XObject", "/Font"):
+        entries = resources.get(kind)
+        if entries is None:
+            continue
+        entries = entries.get_object()
+        for name in sorted(entries):
+            ref = entries[name]
+            target = ref.get_object()
+            digest.update(f"{kind}{name}".encode("utf-8"))
+            if kind == "/Font":
+                digest.update(str(target.get("/BaseFont")).encode("utf-8"))
+                continue
+            key = getattr(ref, "idnum", None)
+            if key is not None and key in seen:
+                continue
+            seen.add(key)
+            digest.update(target.get_data())
+            if target.get("/Subtype") == "/Form":
+                _hash_drawn_objects(target, digest, seen)
+
+
+def page_digests(pdf_path, pages):
+    """
+    Returns {page: digest} for the given 1-based pages: a SHA-256 of the
+    page's size, content streams and the images, forms and fonts they draw,
+    so only byte-for-byte identical content shares a digest. Pages that
+    cannot be read get None and are never reused.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    digests = {}
+    for page in pages:
+        try:
+            pdf_page = reader.pages[page - 1]
+            digest = hashlib.sha256(str(list(pdf_page.mediabox)).encode("ascii"))
+            contents = pdf_page.get_contents()
+            if contents is not None:
+                digest.update(contents.get_data())
+            _hash_drawn_objects(pdf_page, digest, set())
+            digests[page] = digest.hexdigest()
+        except Exception:
+            digests[page] = None
+    return digests
+
+
+class PageHashIndex:
+    """
+    Persistent store of transcribed pages keyed by their digest, model and
+    prompt.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+            if "hash" in columns:
+                # Pages indexed by perceptual hash are dropped and transcribed again
+                self._conn.execute("DROP TABLE pages")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " id INTEGER PRIMARY KEY, digest TEXT NOT NULL,"
+                " model TEXT NOT NULL, prompt TEXT NOT NULL,"
+                " transcription TEXT NOT NULL, translation TEXT,"
+                " source TEXT, page INTEGER, created REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest, model, prompt)"
+            )
+            self._conn.commit()
+
+    def lookup(self, digest, model, prompt):
+        """
+        Returns the newest stored page with the given digest (see
+        page_digests) as a dict (transcription, translation, source, page),
+        or None. A digest of None never matches. prompt is the prompt's key
+        (see text_sha256).
+        """
+        if digest is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, transcription, translation, source, page FROM pages"
+                " WHERE digest = ? AND model = ? AND prompt = ? ORDER BY id DESC LIMIT 1",
+                (digest, model, prompt),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET hits = hits + 1 WHERE id = ?", (row[0],))
+            self._conn.commit()
+        _, transcription, translation, source, page = row
+        return {
+            "transcription": transcription,
+            "translation": translation,
+            "source": source,
+            "page": page,
+        }
+
+    def store(self, entries, model, prompt):
+        """
+        Stores (digest, transcription, translation, source, page) tuples;
+        translation may be None for transcription-only prompts. Entries
+        without a digest are skipped.
+        """
+        now = time.time()
+        rows = [
+            (digest, model, prompt, transcription, translation, source, page, now)
+            for digest, transcription, translation, source, page in entries
+            if digest is not None
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO pages (digest, model, prompt, transcription, translation,"
+                " source, page, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_page_index():
+    """Returns the process-wide page index, creating it on first use."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = PageHashIndex()
+        return _default_index
+
+
+def response_pages(response_text, count, with_translation=True):
+    """
+    Splits a run response into per-page (transcription, translation) pairs,
+    or returns None unless its page markers number exactly 1..count.
+    """
+    sections = parse_sections(response_text)
+    names = ["TRANSCRIPCIÓN", "TRADUCCIÓN"] if with_translation else ["TRANSCRIPCIÓN"]
+    columns = []
+    for name in names:
+        content = sections.get(name)
+        if content is None:
+            return None
+        pages = split_pages(content)
+        if [page for page, _, _ in pages] != list(range(1, count + 1)):
+            return None
+        columns.append([content[start:end].strip() for _, start, end in pages])
+    if not with_translation:
+        columns.append([None] * count)
+    return list(zip(*columns))
+
+
+def transcribe_with_dedup(
+    pdf_path,
+    chunk_pages=DEFAULT_CHUNK_PAGES,
+    workers=DEFAULT_CHUNK_WORKERS,
+    retries=DEFAULT_RETRIES,
+    use_cache=True,
+    refresh=False,
+    pages=None,
+    optimize=False,
+    translation_memory=False,
+    stats=None,
+    job=None,
+    index=None,
+):
+    """
+    Transcribes and translates a PDF, reusing pages found in the page index
+    and sending only novel pages to the model.
+
+    Returns the stitched result, or None when the PDF cannot be read locally
+    (e.g. encrypted or malformed) so the caller can fall back to the regular
+    path. With refresh=True every page is transcribed again and re-indexed.
+    With translation_memory=True, novel runs are only transcribed and every
+    run is translated through the translation memory instead. job, a
+    jobs.DocumentJob, tracks each novel run as a step (see transcribe_chunked).
+    """
+    name = os.path.basename(pdf_path)
+    try:
+        num_pages = page_count(pdf_path)
+    except Exception as e:
+        print(f"Page deduplication skipped for '{name}': {e}")
+        return None
+    if pages:
+        if any(last > num_pages for _, last in pages):
+            raise ValueError(f"Page range exceeds the document's {num_pages} pages")
+        page_numbers = sorted({p for first, last in pages for p in range(first, last + 1)})
+    else:
+        page_numbers = range(1, num_pages + 1)
+
+    try:
+        digests = page_digests(pdf_path, page_numbers)
+    except Exception as e:
+        print(f"Page deduplication skipped for '{name}': {e}")
+        return None
+
+    prompt = TRANSCRIBE_ONLY_PROMPT if translation_memory else TRANSCRIBE_PROMPT
+    prompt_key = text_sha256(prompt)
+    if index is None:
+        index = get_default_page_index()
+    known = {}
+    if not refresh:
+        for page in page_numbers:
+            match = index.lookup(digests[page], MODEL_NAME, prompt_key)
+            if match is not None and (translation_memory or match["translation"] is not None):
+                known[page] = match
+    page_paths = {page: REUSED if page in known else OCR for page in page_numbers}
+    print(
+        f"'{name}': {len(known)} of {len(page_paths)} pages match pages already transcribed; "
+        f"OCR needed for {len(page_paths) - len(known)}"
+    )
+
+    runs = page_runs(page_paths, max(1, chunk_pages))
+    cache = get_default_cache() if use_cache else None
+    ocr_key = None
+    if cache is not None:
+        # Novel runs share keys with chunking.py, so cached chunks are reused
+        ocr_key = cache.make_key(pdf_path, MODEL_NAME, prompt, "chunked")
+
+    transcriptions = {page: match["transcription"] for page, match in known.items()}
+    translations = {page: match["translation"] for page, match in known.items()}
+    ocr_ranges = [(first, last) for path, first, last in runs if path == OCR]
+    with tempfile.TemporaryDirectory(prefix="ocr-chunks-") as tmp_dir:
+        chunk_paths = {}
+        if ocr_ranges:
+            with prepared_for_upload(pdf_path, enabled=optimize) as upload_path:
+                paths = split_pdf(upload_path, ocr_ranges, tmp_dir)
+            chunk_paths = dict(zip(ocr_ranges, paths))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = []
+            for path, first, last in runs:
+                if path == OCR:
+                    cache_key = None
+                    if ocr_key is not None:
+                        cache_key = text_sha256(f"{ocr_key}|pages {first}-{last}")
+                    future = executor.submit(
+                        _transcribe_chunk,
+                        chunk_paths[(first, last)],
+                        cache,
+                        cache_key,
+                        refresh,
+                        retries,
+                        prompt,
+                        stats,
+                        job_step(job, f"pages {first}-{last}"),
+                    )
+                else:
+                    translation = None
+                    if not translation_memory:
+                        translation = text_run_transcription(translations, first, last)
+                    future = executor.submit(
+                        text_run_response,
+                        text_run_transcription(transcriptions, first, last),
+                        translation,
+                        REUSED_ASSESSMENT,
+                    )
+                futures.append(future)
+
+            responses = []
+            failed = []
+            for (path, first, last), future in zip(runs, futures):
+                try:
+                    responses.append(future.result())
+                except Exception as e:
+                    failed.append(f"pages {first}-{last}: {e}")
+
+    if failed:
+        message = f"{len(failed)} of {len(runs)} page runs failed ({'; '.join(failed)})."
+        if cache is not None:
+            message += " Completed runs are cached; re-run to retry only the failed ones."
+        raise RuntimeError(message)
+
+    entries = []
+    for (path, first, last), response_text in zip(runs, responses):
+        if path != OCR:
+            continue
+        # Runs whose page markers do not line up are not indexed
+        split = response_pages(response_text, last - first + 1, not translation_memory)
+        for page, (transcription, translation) in zip(range(first, last + 1), split or []):
+            entries.append((digests[page], transcription, translation, name, page))
+    if entries:
+        index.store(entries, MODEL_NAME, prompt_key)
+
+    ranges = [(first, last) for _, first, last in runs]
+    if translation_memory:
+        result = translate_and_stitch(pdf_path, ranges, responses, stats)
+    else:
+        result = stitch_chunks(ranges, responses)
+    return result + format_page_sources(page_paths) + "\n"
@@ -0,0 +1,213 @@
+"""
+Per-page anomaly index.
+
+The transcription prompt asks the model to start every page with a
+'=== Página N ===' line. From those markers we build a compact index with,
+per page, its character range in the transcription, its confidence score
+and the detected issues. The index is stored as JSON next to the output
+('<output>.pages.json') so review_tool.py can go straight to the worst pages
+without re-scanning the text, and low-confidence pages can be re-processed
+on their own (main.py --pages).
+
+Each page also records the path it took: "text" when its embedded text layer
+was used directly (see textlayer.py) or "ocr" when it was transcribed by the
+model.
+"""
+
+import json
+import os
+import re
+
+from scanner import scan
+
+INDEX_VERSION = 1
+PAGE_MARKER = "=== Página {page} ==="
+PAGE_MARKER_RE = re.compile(r"^[ \t]*=== Página (\d+) ===[ \t]*$", re.MULTILINE)
+
+TEXT_LAYER = "text"
+OCR = "ocr"
+REUSED = "reused"  # Taken from an identical page of an earlier document (page_dedup.py)
+PAGE_SOURCE_LABELS = {TEXT_LAYER: "text layer", OCR: "OCR", REUSED: "reused"}
+PAGE_SOURCES_RE = re.compile(r"^Page sources: (.*)$", re.MULTILINE)
+
+
+def index_path_for(output_path):
+    """Returns the sidecar path of the page index for an output file."""
+    return os.path.splitext(output_path)[0] + ".pages.json"
+
+
+def split_pages(transcription, first_page=1):
+    """
+    Returns (page, start, end) character ranges of each page's content.
+    Text before the first marker, or the whole text when there are no
+    markers, is attributed to first_page.
+    """
+    markers = list(PAGE_MARKER_RE.finditer(transcription))
+    pages = []
+    if not markers or transcription[: markers[0].start()].strip():
+        end = markers[0].start() if markers else len(transcription)
+        pages.append((first_page, 0, end))
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(transcription)
+        pages.append((int(marker.group(1)), marker.end(), end))
+    return pages
+
+
+def strip_page_markers(text):
+    """Removes page marker lines, which would otherwise be flagged as unusual characters."""
+    return PAGE_MARKER_RE.sub("", text)
+
+
+def renumber_pages(text, offset, first_page):
+    """
+    Shifts page markers by offset (for chunks, whose pages the model numbers
+    from 1). A marker for first_page is added if the text has none.
+    """
+    if not PAGE_MARKER_RE.search(text):
+        return f"{PAGE_MARKER.format(page=first_page)}\n{text}"
+    return PAGE_MARKER_RE.sub(
+        lambda m: PAGE_MARKER.format(page=int(m.group(1)) + offset), text
+    )
+
+
+def scan_pages(transcription, first_page=1):
+    """
+    Scans each page once and returns (page, start, end, ScanResult) tuples.
+    Pages are separated by whitespace, so ScanResult.merge of the results
+    gives the issues of the whole transcription without scanning it again.
+    """
+    return [
+        (page, start, end, scan(transcription[start:end]))
+        for page, start, end in split_pages(transcription, first_page)
+    ]
+
+
+def build_page_index(transcription, source=None, first_page=1, page_sources=None, scanned=None):
+    """
+    Scans each page once and returns the page index as a dict:
+    {"version", "source", "pages": [{"page", "start", "end", "path",
+    "confidence", "issues": [[kind, start, end], ...]}]}. Offsets refer to
+    the transcription text. page_sources maps pages to their path; pages not
+    in it are recorded as OCR. scanned can pass in the scan_pages results.
+    """
+    page_sources = page_sources or {}
+    from processor import calculate_confidence_score
+
+    if scanned is None:
+        scanned = scan_pages(transcription, first_page)
+    pages = []
+    for page, start, end, result in scanned:
+        page_text = transcription[start:end]
+        pages.append(
+            {
+                "page": page,
+                "start": start,
+                "end": end,
+                "path": page_sources.get(page, OCR),
+                "confidence": calculate_confidence_score(page_text, result.messages()),
+                "issues": [
+                    [issue.kind, start + issue.start, start + issue.end]
+                    for issue in result.issues
+                ],
+            }
+        )
+    return {"version": INDEX_VERSION, "source": source, "pages": pages}
+
+
+def worst_pages(index, limit=5):
+    """Returns the lowest-confidence pages, most issues first among equals."""
+    ranked = sorted(
+        index["pages"], key=lambda page: (page["confidence"], -len(page["issues"]))
+    )
+    return ranked[:limit]
+
+
+def low_confidence_pages(index, threshold=70):
+    """Returns the page numbers whose confidence is below threshold."""
+    return sorted(page["page"] for page in index["pages"] if page["confidence"] < threshold)
+
+
+def write_page_index(index, path):
+    """Writes a page index as compact JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_page_index(path):
+    """Loads a page index, or returns None if there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_page_index_for_result(result_text, output_path, source=None):
+    """Builds the page index of a processed result and stores it next to output_path."""
+    from processor import parse_sections
+
+    transcription = parse_sections(result_text).get("TRANSCRIPCIÓN", "")
+    path = index_path_for(output_path)
+    index = build_page_index(
+        transcription, source, page_sources=parse_page_sources(result_text)
+    )
+    write_page_index(index, path)
+    return path
+
+
+def parse_page_spec(spec):
+    """Parses '3,7-9' into [(3, 3), (7, 9)]."""
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range '{part}'")
+        ranges.append((first, last))
+    return ranges
+
+
+def format_page_spec(pages):
+    """Formats page numbers as a compact spec, e.g. [3, 7, 8, 9] -> '3,7-9'."""
+    parts = []
+    for page in sorted(set(pages)):
+        if parts and page == parts[-1][1] + 1:
+            parts[-1][1] = page
+        else:
+            parts.append([page, page])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in parts)
+
+
+def format_page_sources(page_paths):
+    """
+    Renders {page: path} as the 'Page sources:' analysis line,
+    e.g. 'Page sources: text layer 1-3,5; OCR 4'.
+    """
+    parts = []
+    for path, label in PAGE_SOURCE_LABELS.items():
+        pages = [page for page, page_path in page_paths.items() if page_path == path]
+        if pages:
+            parts.append(f"{label} {format_page_spec(pages)}")
+    return "Page sources: " + "; ".join(parts)
+
+
+def parse_page_sources(result_text):
+    """Reads the 'Page sources:' line of a result back into {page: path}."""
+    match = PAGE_SOURCES_RE.search(result_text)
+    if not match:
+        return {}
+    paths_by_label = {label: path for path, label in PAGE_SOURCE_LABELS.items()}
+    page_paths = {}
+    for part in match.group(1).split(";"):
+        label, _, spec = part.strip().rpartition(" ")
+        path = paths_by_label.get(label)
+        if path is None:
+            continue
+        for first, last in parse_page_spec(spec):
+            for page in range(first, last + 1):
+                page_paths[page] = path
+    return page_paths
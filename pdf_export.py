@@ -0,0 +1,125 @@
+"""
+PDF export engine used by processor.save_to_file.
+
+Lays text out exactly like the original simpleSplit/drawString loop (same
+wrapping, line height and page breaks) but is built for long documents:
+
+- word widths are cached, so wrapping measures each distinct word once;
+- each page is written as a single text object instead of one per line;
+- the disclaimer header is drawn once as a form XObject and reused on
+  every page;
+- lines are read from the text one at a time rather than splitting it all
+  up front;
+- page streams are Flate-compressed (pageCompression is passed to the
+  canvas rather than relying on reportlab's global default).
+
+Only reportlab's public canvas and text object API is used, and no
+process-wide reportlab settings are changed, so other reportlab users in
+the same process are unaffected.
+"""
+
+from functools import lru_cache
+
+FONT_NAME = "Helvetica"
+FONT_SIZE = 10
+HEADER_FONT_SIZE = 10
+HEADER_LINE_HEIGHT = 12
+LINE_HEIGHT = 12
+MARGIN = 40
+TOP_OFFSET = 60  # Distance from the top of the page to the first line
+HEADER_FORM = "disclaimer_header"
+
+
+@lru_cache(maxsize=None)
+def _word_width_cache(font_name, font_size):
+    """Returns a cached word -> width function for one font and size."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    return lru_cache(maxsize=1 << 16)(lambda word: stringWidth(word, font_name, font_size))
+
+
+def iter_lines(text):
+    """Yields the lines of text without building the full list of lines."""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def wrap_line(line, max_width, word_width, space_width):
+    """
+    Wraps one line on whitespace to max_width, like reportlab's simpleSplit:
+    words are never broken and blank lines produce no output.
+    """
+    wrapped = []
+    words = []
+    width = -space_width
+    for word in line.split():
+        word_w = word_width(word)
+        if width + space_width + word_w <= max_width or not words:
+            words.append(word)
+            width = width + space_width + word_w
+        else:
+            wrapped.append(" ".join(words))
+            words = [word]
+            width = word_w
+    if words:
+        wrapped.append(" ".join(words))
+    return wrapped
+
+
+def iter_wrapped_lines(text, max_width, font_name=FONT_NAME, font_size=FONT_SIZE):
+    """Yields the wrapped output lines of text one at a time."""
+    word_width = _word_width_cache(font_name, font_size)
+    space_width = word_width(" ")
+    for line in iter_lines(text):
+        yield from wrap_line(line, max_width, word_width, space_width)
+
+
+def write_pdf(text, output_path, header_lines=()):
+    """
+    Writes text to a letter-size PDF with header_lines right-aligned at the
+    top of every page.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(output_path, pagesize=letter, pageCompression=1)
+    width, height = letter
+
+    c.beginForm(HEADER_FORM)
+    c.setFont(FONT_NAME, HEADER_FONT_SIZE)
+    c.setFillColor(colors.dimgrey)
+    y_pos = height - 20
+    for line in header_lines:
+        c.drawRightString(width - MARGIN, y_pos, line)
+        y_pos -= HEADER_LINE_HEIGHT
+    c.endForm()
+
+    top = height - TOP_OFFSET
+    lines_per_page = int((top - MARGIN) // LINE_HEIGHT) + 1
+
+    def start_page():
+        c.doForm(HEADER_FORM)
+        text_object = c.beginText(MARGIN, top)
+        text_object.setFont(FONT_NAME, FONT_SIZE, LINE_HEIGHT)
+        return text_object
+
+    text_object = start_page()
+    lines_on_page = 0
+    for line in iter_wrapped_lines(text, width - 2 * MARGIN):
+        if lines_on_page == lines_per_page:
+            c.drawText(text_object)
+            c.showPage()
+            text_object = start_page()
+            lines_on_page = 0
+        text_object.textLine(line)
+        lines_on_page += 1
+
+    c.drawText(text_object)
+    c.save()
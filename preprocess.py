@@ -0,0 +1,152 @@
+"""
+Optional pre-upload optimization for scanned PDFs.
+
+Large colour scans (often 600 DPI, 50-100 MB) are re-rasterized at a lower
+target DPI in grayscale or bilevel and rebuilt as a slim image PDF with the
+same machinery as rasterize.py. Upload time and Gemini's processing time
+both grow with file size, so this usually pays for itself on big scans.
+Files that are already small are passed through untouched.
+"""
+
+import argparse
+import os
+import tempfile
+from contextlib import contextmanager
+
+DEFAULT_TARGET_DPI = 150
+DEFAULT_MODE = "gray"
+DEFAULT_JPEG_QUALITY = 60
+DEFAULT_MIN_BYTES = 5_000_000  # Files below 5 MB are uploaded as-is
+# Assumed uplink when no upload has been measured yet (OCR_UPLINK_MBPS, megabits/s)
+DEFAULT_UPLINK_MBPS = float(os.getenv("OCR_UPLINK_MBPS", "20"))
+
+
+def estimate_upload_seconds(num_bytes):
+    """
+    Estimates upload time from the throughput measured by processor.upload_file,
+    falling back to DEFAULT_UPLINK_MBPS. Returns (seconds, measured).
+    """
+    from processor import measured_upload_rate
+
+    rate = measured_upload_rate()
+    if rate:
+        return num_bytes / rate, True
+    return num_bytes / (DEFAULT_UPLINK_MBPS * 1e6 / 8), False
+
+
+def optimize_pdf(
+    input_path,
+    output_path,
+    target_dpi=DEFAULT_TARGET_DPI,
+    mode=DEFAULT_MODE,
+    jpeg_quality=DEFAULT_JPEG_QUALITY,
+    min_bytes=DEFAULT_MIN_BYTES,
+    workers=1,
+):
+    """
+    Rebuilds input_path as a downsampled, recompressed image PDF at output_path.
+
+    Returns the path to upload: output_path, or input_path when the file is
+    below min_bytes or the optimized version would not be smaller.
+    """
+    from rasterize import rasterize_pdf
+
+    original_bytes = os.path.getsize(input_path)
+    name = os.path.basename(input_path)
+    if original_bytes < min_bytes:
+        print(
+            f"Skipping optimization of '{name}' "
+            f"({original_bytes / 1e6:.1f} MB is below {min_bytes / 1e6:.1f} MB)"
+        )
+        return input_path
+
+    stats = rasterize_pdf(
+        input_path,
+        output_path,
+        dpi=target_dpi,
+        workers=workers,
+        mode=mode,
+        jpeg_quality=jpeg_quality,
+    )
+    if stats is None or stats["bytes"] >= original_bytes:
+        print(f"Optimization did not reduce '{name}'; uploading the original")
+        return input_path
+
+    saved_bytes = original_bytes - stats["bytes"]
+    saved_seconds, measured = estimate_upload_seconds(saved_bytes)
+    print(
+        f"Optimized '{name}': {original_bytes / 1e6:.1f} MB -> {stats['bytes'] / 1e6:.1f} MB "
+        f"(-{saved_bytes / original_bytes:.0%}) in {stats['seconds']:.1f}s, "
+        f"~{saved_seconds:.1f}s less upload time"
+        f"{'' if measured else f' (assuming {DEFAULT_UPLINK_MBPS:g} Mbit/s)'}"
+    )
+    return output_path
+
+
+@contextmanager
+def prepared_for_upload(pdf_path, enabled=True, **options):
+    """
+    Context manager yielding the path to upload for pdf_path: an optimized
+    temporary copy when enabled (see optimize_pdf), otherwise pdf_path.
+    """
+    if not enabled:
+        yield pdf_path
+        return
+
+    with tempfile.TemporaryDirectory(prefix="ocr-optimized-") as tmp_dir:
+        output_path = os.path.join(tmp_dir, os.path.basename(pdf_path))
+        yield optimize_pdf(pdf_path, output_path, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Shrink a scanned PDF before uploading it for OCR."
+    )
+    parser.add_argument("input_pdf", help="Path to the input PDF.")
+    parser.add_argument("--output", "-o", help="Path to the optimized PDF.")
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=DEFAULT_TARGET_DPI,
+        help=f"Target DPI (default: {DEFAULT_TARGET_DPI}).",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["color", "gray", "bilevel"],
+        default=DEFAULT_MODE,
+        help=f"Page encoding (default: {DEFAULT_MODE}).",
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        default=DEFAULT_JPEG_QUALITY,
+        help=f"JPEG quality for color/gray (default: {DEFAULT_JPEG_QUALITY}).",
+    )
+    parser.add_argument(
+        "--min-mb",
+        type=float,
+        default=DEFAULT_MIN_BYTES / 1e6,
+        help="Skip files smaller than this many MB (default: 5).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Rasterization processes.")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_pdf):
+        print(f"Error: File '{args.input_pdf}' not found.")
+        return
+
+    output_path = args.output or f"{os.path.splitext(args.input_pdf)[0]}_optimized.pdf"
+    optimize_pdf(
+        args.input_pdf,
+        output_path,
+        target_dpi=args.dpi,
+        mode=args.mode,
+        jpeg_quality=args.jpeg_quality,
+        min_bytes=int(args.min_mb * 1e6),
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
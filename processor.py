@@ -1,75 +1,186 @@
 import os
+import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-import google.generativeai as genai
-from dotenv import load_dotenv
+import backends
+from jobs import ACTIVE, GENERATED, UPLOADED, job_step
+from ratelimit import call_with_retry, estimate_tokens, get_limiter, response_tokens
+from result import record_time
+from scanner import scan
 
-load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("GEMINI_API_KEY not found in .env file")
+def get_backend():
+    """
+    Returns the model backend every remote call goes through (see
+    backends.py): Gemini by default, or the offline fake with OCR_BACKEND=fake.
+    """
+    return backends.get_backend(MODEL_NAME)
+
+
+def _files_call(label, method, *args, retry_transient=True, **kwargs):
+    """Calls a file method of the backend under the shared 'files' rate limit, with retry."""
+    return call_with_retry(
+        lambda: getattr(get_backend(), method)(*args, **kwargs),
+        get_limiter("files"),
+        label,
+        retry_transient=retry_transient,
+    )
+
+
+def _generate(contents, stream=False, tokens=0):
+    """
+    Calls generate_content under the shared 'generate' rate limit, with retry.
+    tokens, the request's estimated token use, is reserved before it is sent.
+    A non-streamed response settles the reservation here; streamed callers
+    settle it with the final chunk's usage themselves, or release it when
+    the stream fails.
+    """
+    limiter = get_limiter("generate")
+    response = call_with_retry(
+        lambda: get_backend().generate_content(contents, stream=stream),
+        limiter,
+        "Generation",
+        tokens=tokens,
+    )
+    if not stream:
+        limiter.settle_tokens(tokens, response_tokens(response))
+    return response
+
 
-genai.configure(api_key=API_KEY)
+# Cumulative upload volume and time, used to estimate uplink throughput
+_upload_stats = {"bytes": 0, "seconds": 0.0}
+_upload_stats_lock = threading.Lock()
 
 
-def upload_file(path, mime_type=None):
-    """Uploads the given file to Gemini."""
-    file = genai.upload_file(path, mime_type=mime_type)
-    print(f"Uploaded file '{file.display_name}' as: {file.uri}")
+def measured_upload_rate():
+    """Returns the observed upload throughput in bytes/s, or None before any upload."""
+    with _upload_stats_lock:
+        if _upload_stats["seconds"] <= 0:
+            return None
+        return _upload_stats["bytes"] / _upload_stats["seconds"]
+
+
+def upload_file(path, mime_type=None, reuse=True, stats=None):
+    """
+    Uploads the given file to Gemini. stats, a result.RunStats, counts the
+    bytes actually uploaded.
+
+    With reuse=True, a file whose exact bytes were uploaded before (see
+    upload_registry.py) is returned from the remote store instead, after a
+    get_file check that it still exists.
+    """
+    registry = None
+    digest = None
+    if reuse and get_backend().persistent_files:
+        from cache import file_sha256
+        from upload_registry import get_default_registry
+
+        registry = get_default_registry()
+        digest = file_sha256(path)
+        entry = registry.lookup(digest)
+        if entry is not None:
+            try:
+                file = _files_call("File check", "get_file", entry["name"])
+            except Exception:
+                file = None
+            if file is not None and file.state.name != "FAILED":
+                print(f"Reusing uploaded file '{file.display_name}' ({file.uri})")
+                return file
+            registry.forget(digest)
+
+    size = os.path.getsize(path)
+    start = time.monotonic()
+    # A transient failure may still have stored the file remotely, so only
+    # throttled (rejected) uploads are retried, to avoid duplicate remote files
+    file = _files_call("Upload", "upload_file", path, mime_type=mime_type, retry_transient=False)
+    elapsed = time.monotonic() - start
+    with _upload_stats_lock:
+        _upload_stats["bytes"] += size
+        _upload_stats["seconds"] += elapsed
+    if stats is not None:
+        stats.add_upload(size)
+    print(
+        f"Uploaded file '{file.display_name}' as: {file.uri} "
+        f"({size / 1e6:.1f} MB in {elapsed:.1f}s)"
+    )
+
+    if registry is not None:
+        expiration = getattr(file, "expiration_time", None)
+        registry.record(
+            digest,
+            file.name,
+            file.uri,
+            expiration.timestamp() if expiration is not None else None,
+        )
     return file
 
 
-def wait_for_files_active(files):
-    """Waits for the given files to be active."""
+def wait_for_files_active(
+    files, timeout=600, initial_delay=0.25, max_delay=8.0, backoff=2.0
+):
+    """
+    Waits for the given files to be active.
+
+    All pending files are polled concurrently. The first check is immediate,
+    the next follows after a short delay and later ones back off exponentially
+    with jitter, so small files are ready in well under a second while large
+    ones are not hammered. Raises TimeoutError after `timeout` seconds.
+    Returns a dict mapping file name to seconds spent in PROCESSING.
+    """
     print("Waiting for file processing...")
-    for name in (file.name for file in files):
-        file = genai.get_file(name)
-        while file.state.name == "PROCESSING":
+    start = time.monotonic()
+    names = [file.name for file in files]
+    processing_time = {}
+    pending = list(names)
+    delay = initial_delay
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(names), 8))) as executor:
+        while pending:
+            states = dict(
+                zip(
+                    pending,
+                    executor.map(lambda name: _files_call("File check", "get_file", name), pending),
+                )
+            )
+            elapsed = time.monotonic() - start
+            for name, file in states.items():
+                if file.state.name == "PROCESSING":
+                    continue
+                if file.state.name != "ACTIVE":
+                    raise Exception(f"File {file.name} failed to process")
+                processing_time[name] = elapsed
+                pending.remove(name)
+
+            if not pending:
+                break
+            if elapsed >= timeout:
+                raise TimeoutError(
+                    f"Files still processing after {timeout}s: {', '.join(pending)}"
+                )
+
             print(".", end="", flush=True)
-            time.sleep(2)
-            file = genai.get_file(name)
-        if file.state.name != "ACTIVE":
-            raise Exception(f"File {file.name} failed to process")
+            sleep_for = delay * random.uniform(0.5, 1.5)
+            time.sleep(min(sleep_for, max(0.0, timeout - elapsed)))
+            delay = min(delay * backoff, max_delay)
+
     print("...all files ready")
+    for name in names:
+        print(f"  {name}: {processing_time[name]:.1f}s in PROCESSING")
+    return processing_time
 
 
 def detect_anomalies(text):
     """
     Detects potential OCR errors and anomalies in the text.
     Returns a list of issues found.
-    """
-    issues = []
-
-    # Check for garbled text patterns (repeated characters, unusual symbols)
-    if re.search(r"(.)\1{3,}", text):  # 4 or more repeated characters
-        issues.append("Repeated characters detected (possible OCR garble)")
-
-    # Check for missing spaces between words
-    if re.search(r"[a-z][A-Z]", text):  # lowercase followed by uppercase without space
-        issues.append("Missing spaces between words detected")
-
-    # Check for unusual character combinations
-    unusual_patterns = [
-        r"[^\w\s]{3,}",  # 3+ consecutive non-word characters
-        r"\d{10,}",  # Very long numbers (possible garble)
-        r"[|@#$%^&*]{2,}",  # Multiple special characters
-    ]
-
-    for pattern in unusual_patterns:
-        if re.search(pattern, text):
-            issues.append(f"Unusual character pattern detected: {pattern}")
-
-    # Check for incomplete words (very short words that might be fragments)
-    words = text.split()
-    short_words = [word for word in words if len(word) == 1 and word.isalpha()]
-    if len(short_words) > len(words) * 0.1:  # More than 10% single letters
-        issues.append(
-            "High frequency of single-letter words (possible word fragmentation)"
-        )
 
-    return issues
+    Only the first occurrence of each pattern is needed here; use
+    scanner.scan directly to get every issue with its character offsets.
+    """
+    return scan(text, first_only=True).messages()
 
 
 def calculate_confidence_score(text, issues):
@@ -97,26 +208,15 @@ def calculate_confidence_score(text, issues):
     return max(0, min(100, base_score))
 
 
-def transcribe_and_translate(pdf_path):
-    """
-    Uploads a PDF, transcribes it, and translates it to Spanish using Gemini.
-    """
-    # model = genai.GenerativeModel(model_name="gemini-3-pro-preview") # Use this if you have quota
-    model = genai.GenerativeModel(
-        model_name="gemini-flash-latest"
-    )  # Fallback to reliable model
-
-    # Upload the file
-    pdf_file = upload_file(pdf_path, mime_type="application/pdf")
-
-    # Wait for processing
-    wait_for_files_active([pdf_file])
+MODEL_NAME = "gemini-flash-latest"  # Use "gemini-3-pro-preview" if you have quota
 
-    # Prompt for transcription and translation with enhanced quality assessment
-    prompt = """
+# Prompt for transcription and translation with enhanced quality assessment
+TRANSCRIBE_PROMPT = """
     Please perform the following tasks for the attached PDF file:
     1. Transcribe the full content of the PDF into plain text. Be as accurate as possible.
-    2. Translate the transcribed text into Spanish.
+       Start each page with a line "=== Página N ===", where N is the page number
+       within the attached PDF (starting at 1).
+    2. Translate the transcribed text into Spanish, keeping the same page lines.
     3. Provide a detailed quality assessment including:
        - Overall confidence score (0-100%)
        - Specific sections that may contain errors
@@ -125,9 +225,11 @@ def transcribe_and_translate(pdf_path):
 
     Output the result in the following format:
     --- TRANSCRIPCIÓN ---
+    === Página 1 ===
     [Original text here]
 
     --- TRADUCCIÓN ---
+    === Página 1 ===
     [Spanish translation here]
 
     --- QUALITY ASSESSMENT ---
@@ -137,48 +239,482 @@ def transcribe_and_translate(pdf_path):
     Recommendations: [Any suggestions for improving accuracy]
     """
 
-    response = model.generate_content([pdf_file, prompt])
+# Transcription-only prompt, used when translation goes through the translation memory
+TRANSCRIBE_ONLY_PROMPT = """
+    Please perform the following tasks for the attached PDF file:
+    1. Transcribe the full content of the PDF into plain text. Be as accurate as possible.
+       Start each page with a line "=== Página N ===", where N is the page number
+       within the attached PDF (starting at 1). Separate paragraphs with a blank line.
+    2. Provide a detailed quality assessment including:
+       - Overall confidence score (0-100%)
+       - Specific sections that may contain errors
+       - Character recognition issues (garbled text, missing characters, etc.)
+       - Formatting problems or layout issues
+
+    Output the result in the following format:
+    --- TRANSCRIPCIÓN ---
+    === Página 1 ===
+    [Original text here]
+
+    --- QUALITY ASSESSMENT ---
+    Confidence Score: [X]%
+    Issues Found: [List specific problems or "None identified"]
+    Suspicious Sections: [Line numbers or text snippets that need manual review]
+    Recommendations: [Any suggestions for improving accuracy]
+    """
+
+# Prompt for translating text taken from a PDF's own text layer (no OCR)
+TRANSLATE_PROMPT = """
+    Translate the following text, extracted from the text layer of a PDF, into Spanish.
+    Keep every "=== Página N ===" line unchanged and output only the translation.
+    """
+
 
-    # Parse the response to extract transcription
-    response_text = response.text
+SECTION_MARKER_RE = re.compile(r"^[ \t]*--- (.+?) ---[ \t]*$", re.MULTILINE)
+
+
+def parse_sections(response_text):
+    """
+    Splits a response into its '--- NAME ---' sections.
+    Returns a dict mapping section name to stripped content.
+    """
+    sections = {}
+    matches = list(SECTION_MARKER_RE.finditer(response_text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response_text)
+        sections[match.group(1).strip()] = response_text[match.end() : end].strip()
+    return sections
+
+
+class SectionStreamParser:
+    """
+    Incrementally splits streamed response text into '--- NAME ---' sections.
+
+    feed() accepts text chunks as they arrive and returns the sections that
+    became complete, i.e. whose following marker has been seen. close()
+    returns the last section. Each completed section is also passed to the
+    optional on_section(name, content) callback.
+    """
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section
+        self.text = ""
+        self._scan_pos = 0
+        self._current_name = None
+        self._current_start = 0
+
+    def _emit(self, end):
+        section = (self._current_name, self.text[self._current_start : end].strip())
+        if self.on_section:
+            self.on_section(*section)
+        return section
+
+    def feed(self, chunk):
+        """Adds a chunk of text; returns a list of newly completed sections."""
+        self.text += chunk
+        # Only scan whole lines, a marker may be split across chunks
+        scan_end = self.text.rfind("\n") + 1
+        if scan_end <= self._scan_pos:
+            return []
+
+        completed = []
+        for match in SECTION_MARKER_RE.finditer(self.text, self._scan_pos, scan_end):
+            if self._current_name is not None:
+                completed.append(self._emit(match.start()))
+            self._current_name = match.group(1).strip()
+            self._current_start = match.end()
+        self._scan_pos = scan_end
+        return completed
+
+    def close(self):
+        """Flushes the remaining text; returns the final sections."""
+        completed = self.feed("\n")
+        self.text = self.text[:-1]
+        if self._current_name is not None:
+            completed.append(self._emit(len(self.text)))
+            self._current_name = None
+        return completed
+
+
+def iter_stream_sections(text_chunks):
+    """Yields (name, content) sections from an iterable of text chunks as they complete."""
+    parser = SectionStreamParser()
+    for chunk in text_chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def extract_transcription(response_text):
+    """Extracts the transcription section from a model response."""
     transcription_start = response_text.find("--- TRANSCRIPCIÓN ---")
     translation_start = response_text.find("--- TRADUCCIÓN ---")
 
     if transcription_start != -1 and translation_start != -1:
-        transcription = response_text[
+        return response_text[
             transcription_start + len("--- TRANSCRIPCIÓN ---") : translation_start
         ].strip()
-    else:
-        transcription = "Error: Could not extract transcription from response"
+    return "Error: Could not extract transcription from response"
+
+
+ANALYSIS_SECTION = "AUTOMATED ANALYSIS"
+ANALYSIS_HEADER = f"\n\n--- {ANALYSIS_SECTION} ---\n"
+
 
-    # Detect anomalies in the transcription
+def build_automated_analysis(transcription):
+    """
+    Runs anomaly detection on a transcription and renders the
+    AUTOMATED ANALYSIS section appended to every result.
+    """
+    from page_index import strip_page_markers
+
+    transcription = strip_page_markers(transcription)
     issues = detect_anomalies(transcription)
     confidence_score = calculate_confidence_score(transcription, issues)
 
-    # Enhance the response with our analysis
-    enhanced_response = response_text
+    analysis = ANALYSIS_HEADER
+    analysis += f"Confidence Score: {confidence_score}%\n"
     if issues:
-        enhanced_response += f"\n\n--- AUTOMATED ANALYSIS ---\n"
-        enhanced_response += f"Confidence Score: {confidence_score}%\n"
-        enhanced_response += f"Detected Issues: {', '.join(issues)}\n"
+        analysis += f"Detected Issues: {', '.join(issues)}\n"
         if confidence_score < 70:
-            enhanced_response += "⚠️  LOW CONFIDENCE - Manual review recommended\n"
-        elif issues:
-            enhanced_response += "⚡ POTENTIAL ISSUES - Spot check recommended\n"
+            analysis += "⚠️  LOW CONFIDENCE - Manual review recommended\n"
+        else:
+            analysis += "⚡ POTENTIAL ISSUES - Spot check recommended\n"
     else:
-        enhanced_response += f"\n\n--- AUTOMATED ANALYSIS ---\n"
-        enhanced_response += f"Confidence Score: {confidence_score}%\n"
-        enhanced_response += "✅ No obvious issues detected\n"
+        analysis += "✅ No obvious issues detected\n"
+    return analysis
+
 
-    return enhanced_response
+def _estimated_pages(pdf_path):
+    """Page count for the token estimate; 1 when the PDF cannot be read locally."""
+    from chunking import page_count
 
+    try:
+        return page_count(pdf_path)
+    except Exception:
+        return 1
 
 
-def save_to_file(text, output_path, output_format="docx"):
+def generate_response(
+    pdf_path, prompt=TRANSCRIBE_PROMPT, on_text=None, stats=None, on_stage=None, uploads=None
+):
+    """
+    Uploads a PDF, waits for it to be active and returns the model's response text.
+    With on_text set, the response is streamed and each chunk is passed to it.
+    stats, a result.RunStats, collects stage timings and token usage.
+    on_stage(state, **artifacts), e.g. a jobs.Step's set_state, is told when
+    the file is uploaded and active. uploads, a dict kept by the caller across
+    attempts, maps pdf_path to its uploaded file so a retry does not upload it
+    again; a file that fails processing is dropped from it.
+    """
+    pdf_file = uploads.get(pdf_path) if uploads is not None else None
+    if pdf_file is None:
+        with record_time(stats, "upload"):
+            pdf_file = upload_file(pdf_path, mime_type="application/pdf", stats=stats)
+        if uploads is not None:
+            uploads[pdf_path] = pdf_file
+    if on_stage:
+        on_stage(UPLOADED, file=pdf_file.name, uri=pdf_file.uri)
+
+    # Wait for processing
+    with record_time(stats, "processing"):
+        try:
+            wait_for_files_active([pdf_file])
+        except Exception:
+            if uploads is not None:
+                uploads.pop(pdf_path, None)
+            raise
+    if on_stage:
+        on_stage(ACTIVE)
+
+    tokens = estimate_tokens(prompt, pages=_estimated_pages(pdf_path))
+    with record_time(stats, "generate"):
+        if on_text is None:
+            response = _generate([pdf_file, prompt], tokens=tokens)
+            if stats is not None:
+                stats.add_usage(response)
+            return response.text
+
+        limiter = get_limiter("generate")
+        parts = []
+        chunk = None
+        try:
+            for chunk in _generate([pdf_file, prompt], stream=True, tokens=tokens):
+                parts.append(chunk.text)
+                on_text(chunk.text)
+        except Exception:
+            limiter.release_tokens(tokens)
+            raise
+        if chunk is not None:
+            # Usage is reported on the final chunk
+            limiter.settle_tokens(tokens, response_tokens(chunk))
+            if stats is not None:
+                stats.add_usage(chunk)
+        return "".join(parts)
+
+
+def translate_text(text, prompt=TRANSLATE_PROMPT, stats=None):
+    """Translates already extracted text with a text-only request; no upload needed."""
+    with record_time(stats, "translate"):
+        response = _generate([prompt, text], tokens=estimate_tokens(prompt, text=text))
+    if stats is not None:
+        stats.add_usage(response)
+    return response.text
+
+
+def _replay_sections(result_text, on_section):
+    """Hands every section of an already complete result to on_section."""
+    for name, content in parse_sections(result_text).items():
+        on_section(name, content)
+
+
+def transcribe_and_translate(
+    pdf_path,
+    use_cache=True,
+    refresh=False,
+    chunk_pages=None,
+    on_section=None,
+    pages=None,
+    optimize=False,
+    text_layer=True,
+    translation_memory=False,
+    stats=None,
+    job=None,
+    dedup_pages=False,
+    sections=None,
+):
+    """
+    Uploads a PDF, transcribes it, and translates it to Spanish using Gemini.
+
+    Results are stored in the on-disk cache (see cache.py). With use_cache=False
+    the cache is bypassed entirely; with refresh=True the API is always called
+    and the cached entry is overwritten.
+
+    With chunk_pages set, the PDF is split into page ranges of that size which
+    are transcribed concurrently and stitched back in order (see chunking.py).
+    pages, a list of (first, last) ranges, limits processing to those pages
+    and implies chunking.
+
+    With on_section set, the response is streamed and on_section(name, content)
+    is called as soon as each section (TRANSCRIPCIÓN, TRADUCCIÓN, ...) is
+    complete, ending with AUTOMATED ANALYSIS.
+
+    With optimize=True, large scans are downsampled and recompressed before
+    upload (see preprocess.py). Cache keys still use the original file.
+
+    With text_layer=True, pages with a usable embedded text layer skip OCR
+    and only their text is translated (see textlayer.py); documents without
+    one take the regular path.
+
+    With dedup_pages=True, pages matching pages already transcribed in earlier
+    documents are taken from the page index and only novel pages are sent to
+    the model (see page_dedup.py). It applies to documents the text layer
+    does not cover; if the PDF cannot be read locally it takes the regular path.
+
+    With translation_memory=True, the model only transcribes and the text is
+    translated paragraph by paragraph through the translation memory, so
+    paragraphs seen in earlier documents are not translated again (see
+    translation_memory.py). Sections are then reported once complete.
+
+    stats, a result.RunStats, collects timings and token usage; see
+    transcribe_result for the structured equivalent of this function.
+
+    job, a jobs.DocumentJob, records the progress of every request in the
+    job store; requests it already holds a generated response for are not
+    made again (see jobs.py).
+
+    sections, a dict, receives the sections of the returned text when the
+    response was parsed here anyway (a fresh single request), so callers
+    such as transcribe_result need not parse the text again.
+    """
+    if text_layer:
+        from chunking import DEFAULT_CHUNK_PAGES
+        from textlayer import transcribe_with_text_layer
+
+        result = transcribe_with_text_layer(
+            pdf_path,
+            chunk_pages=chunk_pages or DEFAULT_CHUNK_PAGES,
+            use_cache=use_cache,
+            refresh=refresh,
+            pages=pages,
+            optimize=optimize,
+            translation_memory=translation_memory,
+            stats=stats,
+            job=job,
+        )
+        if result is not None:
+            if on_section:
+                _replay_sections(result, on_section)
+            return result
+
+    if dedup_pages:
+        from chunking import DEFAULT_CHUNK_PAGES
+        from page_dedup import transcribe_with_dedup
+
+        result = transcribe_with_dedup(
+            pdf_path,
+            chunk_pages=chunk_pages or DEFAULT_CHUNK_PAGES,
+            use_cache=use_cache,
+            refresh=refresh,
+            pages=pages,
+            optimize=optimize,
+            translation_memory=translation_memory,
+            stats=stats,
+            job=job,
+        )
+        if result is not None:
+            if on_section:
+                _replay_sections(result, on_section)
+            return result
+
+    if chunk_pages or pages:
+        from chunking import DEFAULT_CHUNK_PAGES, transcribe_chunked
+
+        result = transcribe_chunked(
+            pdf_path,
+            chunk_pages=chunk_pages or DEFAULT_CHUNK_PAGES,
+            use_cache=use_cache,
+            refresh=refresh,
+            pages=pages,
+            optimize=optimize,
+            translation_memory=translation_memory,
+            stats=stats,
+            job=job,
+        )
+        if on_section:
+            _replay_sections(result, on_section)
+        return result
+
+    prompt = TRANSCRIBE_ONLY_PROMPT if translation_memory else TRANSCRIBE_PROMPT
+    cache = None
+    cache_key = None
+    entry = None
+    step = job_step(job, "document")
+    if use_cache:
+        from cache import get_default_cache
+
+        cache = get_default_cache()
+        cache_key = cache.make_key(pdf_path, MODEL_NAME, prompt)
+        if not refresh:
+            entry = cache.get(cache_key)
+            if entry is not None:
+                print(f"Cache hit for '{os.path.basename(pdf_path)}'")
+
+    if entry is None and step is not None and step.response is not None:
+        print(f"Resuming '{os.path.basename(pdf_path)}' from its generated response")
+        response_text = step.response
+        transcription = parse_sections(response_text).get(
+            "TRANSCRIPCIÓN", "Error: Could not extract transcription from response"
+        )
+        entry = {"response": response_text, "analysis": build_automated_analysis(transcription)}
+    elif entry is not None and step is not None:
+        step.set_state(GENERATED, response=entry["response"])
+
+    if entry is not None and not translation_memory:
+        result = entry["response"] + entry["analysis"]
+        if on_section:
+            _replay_sections(result, on_section)
+        return result
+
+    if entry is not None:
+        # The cached transcription is translated again from the memory
+        response_text = entry["response"]
+        analysis = entry["analysis"]
+    else:
+        from preprocess import prepared_for_upload
+
+        on_stage = step.set_state if step is not None else None
+        with prepared_for_upload(pdf_path, enabled=optimize) as upload_path:
+            if on_section and not translation_memory:
+                parser = SectionStreamParser(on_section)
+                response_text = generate_response(
+                    upload_path, on_text=parser.feed, stats=stats, on_stage=on_stage
+                )
+                parser.close()
+            else:
+                response_text = generate_response(
+                    upload_path, prompt=prompt, stats=stats, on_stage=on_stage
+                )
+        if step is not None:
+            step.set_state(GENERATED, response=response_text)
+
+        with record_time(stats, "parse"):
+            # Parse the response to extract transcription
+            parsed = parse_sections(response_text)
+            transcription = parsed.get(
+                "TRANSCRIPCIÓN", "Error: Could not extract transcription from response"
+            )
+
+            # Enhance the response with our analysis
+            analysis = build_automated_analysis(transcription)
+        if sections is not None and not translation_memory:
+            sections.update(parsed)
+            sections[ANALYSIS_SECTION] = analysis[len(ANALYSIS_HEADER) :].strip()
+
+        if cache is not None:
+            cache.put(
+                cache_key,
+                {
+                    "source": os.path.basename(pdf_path),
+                    "model": MODEL_NAME,
+                    "response": response_text,
+                    "analysis": analysis,
+                },
+            )
+
+    if translation_memory:
+        from translation_memory import format_stats, translate_response
+
+        response_text, tm_stats = translate_response(response_text, stats=stats)
+        analysis += format_stats(tm_stats) + "\n"
+        print(f"'{os.path.basename(pdf_path)}': {format_stats(tm_stats)}")
+        if on_section:
+            _replay_sections(response_text + analysis, on_section)
+    elif on_section:
+        _replay_sections(analysis, on_section)
+
+    return response_text + analysis
+
+
+def transcribe_result(pdf_path, stats=None, **options):
+    """
+    Runs transcribe_and_translate (same options) and returns an
+    result.OCRResult with the sections, analysis, page index, timings,
+    bytes uploaded and token usage. Pass stats, a result.RunStats, to keep
+    timing later stages (e.g. save_to_file) into the same run.
+
+    The result is built once from the pipeline's sections; the text is only
+    parsed when the pipeline did not parse it already (cache hits, chunked,
+    text-layer and deduplicated runs, whose output is stitched as text).
+    """
+    from result import OCRResult, RunStats
+
+    if stats is None:
+        stats = RunStats(source=pdf_path)
+    sections = {}
+    with stats.timed("total"):
+        text = transcribe_and_translate(pdf_path, stats=stats, sections=sections, **options)
+        with stats.timed("index"):
+            if not sections:
+                sections = parse_sections(text)
+            result = OCRResult.from_sections(sections, source=pdf_path, model=MODEL_NAME)
+    return result.update_stats(stats)
+
+
+def save_to_file(text, output_path, output_format="docx", stats=None):
     """
     Saves the text to the specified path in the given format.
     Adds a mandatory AI disclaimer to the header/top of the document.
+    text may also be a result.OCRResult. stats, a result.RunStats, records
+    the time spent as the 'export' stage.
     """
+    if hasattr(text, "to_text"):
+        text = text.to_text()
+    with record_time(stats, "export"):
+        _write_document(text, output_path, output_format)
+
+
+def _write_document(text, output_path, output_format):
+
     # Updated Disclaimer Text
     AI_DISCLAIMER_ES = (
         "Traducción no oficial.\n"
@@ -217,53 +753,9 @@ def save_to_file(text, output_path, output_format="docx"):
         doc.save(output_path)
 
     elif output_format == "pdf":
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib import colors
-        from reportlab.lib.utils import simpleSplit
+        from pdf_export import write_pdf
 
-        c = canvas.Canvas(output_path, pagesize=letter)
-        width, height = letter
-        
-        # Helper to draw header
-        def draw_header(c):
-            c.setFont("Helvetica", 10) # Larger size
-            c.setFillColor(colors.dimgrey) # Darker gray
-            
-            # Position at top right
-            # We'll calculate width of text to align right properly, or just use drawRightString
-            y_pos = height - 20
-            for line in disclaimer_lines:
-                c.drawRightString(width - 40, y_pos, line)
-                y_pos -= 12 # Increased spacing for larger font
-            
-            c.setFillColor(colors.black) # Reset
-
-        lines = text.split('\n')
-        
-        # Draw header on first page
-        draw_header(c)
-        
-        y = height - 60
-        margin = 40
-        line_height = 12
-        
-        c.setFont("Helvetica", 10)
-        
-        for line in lines:
-            # Wrap line if too long
-            wrapped_lines = simpleSplit(line, "Helvetica", 10, width - 2 * margin)
-            for wrapped_line in wrapped_lines:
-                if y < margin:
-                    c.showPage()
-                    draw_header(c)
-                    c.setFont("Helvetica", 10)
-                    y = height - 60
-                
-                c.drawString(margin, y, wrapped_line)
-                y -= line_height
-                
-        c.save()
+        write_pdf(text, output_path, disclaimer_lines)
 
     else:
         raise ValueError("Unsupported format. Only 'docx' and 'pdf' are supported.")
@@ -1,41 +1,262 @@
 import argparse
+import io
 import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 
+DEFAULT_WINDOW = 4  # Pages rasterized (and held in memory) at a time, per worker
+DEFAULT_JPEG_QUALITY = 75
 
-def rasterize_pdf(input_path, output_path=None, dpi=200):
+# color/gray pages are JPEG-compressed, bilevel pages are 1-bit and deflated
+MODES = ("color", "gray", "bilevel")
+
+
+class EncodedPage:
+    """A page image already compressed for embedding in a PDF."""
+
+    __slots__ = ("width", "height", "color_space", "bits", "filter", "data")
+
+    def __init__(self, width, height, color_space, bits, filter, data):
+        self.width = width
+        self.height = height
+        self.color_space = color_space
+        self.bits = bits
+        self.filter = filter
+        self.data = data
+
+
+def encode_page(image, mode="color", jpeg_quality=DEFAULT_JPEG_QUALITY):
+    """
+    Compresses a PIL image for embedding as a PDF page:
+    color -> RGB JPEG, gray -> grayscale JPEG, bilevel -> 1-bit Flate.
+    """
+    if mode == "bilevel":
+        image = image.convert("L").convert("1", dither=Image.Dither.NONE)
+        # Packed 1-bit rows, 1 = white, which is DeviceGray's default decoding
+        data = zlib.compress(image.tobytes(), 6)
+        return EncodedPage(image.width, image.height, "DeviceGray", 1, "FlateDecode", data)
+
+    target_mode = "L" if mode == "gray" else "RGB"
+    if image.mode != target_mode:
+        image = image.convert(target_mode)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=jpeg_quality)
+    color_space = "DeviceRGB" if target_mode == "RGB" else "DeviceGray"
+    return EncodedPage(
+        image.width, image.height, color_space, 8, "DCTDecode", buffer.getvalue()
+    )
+
+
+class ImagePdfWriter:
+    """
+    Writes a PDF of full-page images one page at a time.
+
+    Each page's objects are written to disk as soon as it is added, and
+    only the page object offsets are kept, so memory use does not grow
+    with the number of pages (unlike Pillow's save_all/append).
+    """
+
+    def __init__(self, path, dpi):
+        self.dpi = dpi
+        self._f = open(path, "wb")
+        self._offsets = {}
+        self._page_ids = []
+        self._next_id = 3  # 1 is the catalog, 2 the page tree
+        self._f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _new_id(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id, body, stream=None):
+        self._offsets[obj_id] = self._f.tell()
+        self._f.write(b"%d 0 obj\n" % obj_id)
+        self._f.write(body.encode("ascii"))
+        if stream is not None:
+            self._f.write(b"\nstream\n")
+            self._f.write(stream)
+            self._f.write(b"\nendstream")
+        self._f.write(b"\nendobj\n")
+
+    def add_page(self, page):
+        """Appends an EncodedPage sized to its pixel dimensions at the writer's DPI."""
+        image_id, contents_id, page_id = self._new_id(), self._new_id(), self._new_id()
+        width = page.width * 72.0 / self.dpi
+        height = page.height * 72.0 / self.dpi
+
+        self._write_object(
+            image_id,
+            f"<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height}"
+            f" /ColorSpace /{page.color_space} /BitsPerComponent {page.bits}"
+            f" /Filter /{page.filter} /Length {len(page.data)} >>",
+            page.data,
+        )
+        contents = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (width, height)
+        self._write_object(contents_id, f"<< /Length {len(contents)} >>", contents)
+        self._write_object(
+            page_id,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.4f} {height:.4f}]"
+            f" /Resources << /XObject << /Im0 {image_id} 0 R >> >>"
+            f" /Contents {contents_id} 0 R >>",
+        )
+        self._page_ids.append(page_id)
+
+    def close(self):
+        """Writes the page tree, catalog and cross-reference table."""
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(
+            2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>"
+        )
+        self._write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self._f.tell()
+        size = self._next_id
+        self._f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for obj_id in range(1, size):
+            self._f.write(b"%010d 00000 n \n" % self._offsets[obj_id])
+        self._f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, xref_offset)
+        )
+        self._f.close()
+
+    def abort(self):
+        self._f.close()
+
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+
+
+def rasterize_range(input_path, first, last, dpi, mode, jpeg_quality):
+    """Rasterizes and encodes pages first..last; runs in worker processes."""
+    images = convert_from_path(
+        input_path,
+        dpi=dpi,
+        first_page=first,
+        last_page=last,
+        grayscale=mode != "color",
+    )
+    pages = []
+    for image in images:
+        pages.append(encode_page(image, mode, jpeg_quality))
+        image.close()
+    return pages
+
+
+def _iter_encoded_ranges(input_path, ranges, dpi, mode, jpeg_quality, workers):
+    """
+    Yields the encoded pages of each range in order. With several workers,
+    ranges are rasterized in parallel processes with at most two ranges
+    per worker in flight, so memory stays bounded.
+    """
+    if workers <= 1:
+        for first, last in ranges:
+            yield first, last, rasterize_range(input_path, first, last, dpi, mode, jpeg_quality)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        remaining = iter(ranges)
+        in_flight = deque()
+
+        def submit_next():
+            for first, last in remaining:
+                future = executor.submit(
+                    rasterize_range, input_path, first, last, dpi, mode, jpeg_quality
+                )
+                in_flight.append((first, last, future))
+                return
+
+        for _ in range(workers * 2):
+            submit_next()
+        while in_flight:
+            first, last, future = in_flight.popleft()
+            pages = future.result()
+            submit_next()
+            yield first, last, pages
+
+
+def rasterize_pdf(
+    input_path,
+    output_path=None,
+    dpi=200,
+    window=DEFAULT_WINDOW,
+    workers=1,
+    mode="color",
+    jpeg_quality=DEFAULT_JPEG_QUALITY,
+):
     """
     Converts a PDF to images (rasterizes) and saves them back as a PDF.
     This simulates a scanned document, removing selectable text.
+
+    Pages are rasterized `window` at a time and written to the output as
+    they are converted, so peak memory stays flat regardless of page count.
+    With workers > 1, page windows are rasterized and encoded in parallel
+    processes. mode selects the page encoding (see encode_page).
+
+    Returns a dict with output_path, pages, seconds and bytes, or None on error.
     """
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode '{mode}'. Choose from: {', '.join(MODES)}")
+
     if not output_path:
         base, ext = os.path.splitext(input_path)
         output_path = f"{base}_scanned{ext}"
 
-    print(f"Rasterizing '{input_path}' at {dpi} DPI...")
+    print(f"Rasterizing '{input_path}' at {dpi} DPI ({mode}, {workers} workers)...")
+    start = time.perf_counter()
 
-    # Convert PDF to list of images
     try:
-        images = convert_from_path(input_path, dpi=dpi)
+        total_pages = pdfinfo_from_path(input_path)["Pages"]
     except Exception as e:
         print(f"Error converting PDF: {e}")
-        return
+        return None
 
-    if not images:
+    if not total_pages:
         print("No images generated.")
-        return
+        return None
 
-    print(f"Converted {len(images)} pages. Saving to '{output_path}'...")
+    window = max(1, window)
+    ranges = [
+        (first, min(first + window - 1, total_pages))
+        for first in range(1, total_pages + 1, window)
+    ]
 
-    # Save the first image and append the rest
-    # PDF saving in Pillow requires all images to be RGB
-    images[0].save(
-        output_path, "PDF", resolution=100.0, save_all=True, append_images=images[1:]
-    )
+    # Write to a temporary file so a failure never leaves a truncated output
+    partial_path = f"{output_path}.part"
+    writer = ImagePdfWriter(partial_path, dpi)
+    try:
+        for first, last, pages in _iter_encoded_ranges(
+            input_path, ranges, dpi, mode, jpeg_quality, max(1, workers)
+        ):
+            for page in pages:
+                writer.add_page(page)
+            print(f"Converted pages {first}-{last} of {total_pages}")
+        writer.close()
+    except Exception as e:
+        writer.abort()
+        os.remove(partial_path)
+        print(f"Error converting PDF: {e}")
+        return None
 
-    print(f"Done! Saved to '{output_path}'")
+    os.replace(partial_path, output_path)
+    stats = {
+        "output_path": output_path,
+        "pages": writer.page_count,
+        "seconds": time.perf_counter() - start,
+        "bytes": os.path.getsize(output_path),
+    }
+    print(
+        f"Done! Saved {stats['pages']} pages to '{output_path}' "
+        f"({stats['bytes'] / 1024:.0f} KB, {stats['pages'] / stats['seconds']:.1f} pages/s)"
+    )
+    return stats
 
 
 def main():
@@ -47,6 +268,30 @@ def main():
     parser.add_argument(
         "--dpi", type=int, default=200, help="DPI for rasterization (default: 200)."
     )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help=f"Pages held in memory at a time per worker (default: {DEFAULT_WINDOW}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes rasterizing page ranges in parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="color",
+        help="Page encoding: color/gray JPEG or 1-bit bilevel (default: color).",
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        default=DEFAULT_JPEG_QUALITY,
+        help=f"JPEG quality for color/gray modes (default: {DEFAULT_JPEG_QUALITY}).",
+    )
 
     args = parser.parse_args()
 
@@ -54,7 +299,15 @@ def main():
         print(f"Error: File '{args.input_pdf}' not found.")
         return
 
-    rasterize_pdf(args.input_pdf, args.output, args.dpi)
+    rasterize_pdf(
+        args.input_pdf,
+        args.output,
+        args.dpi,
+        args.window,
+        workers=args.workers,
+        mode=args.mode,
+        jpeg_quality=args.jpeg_quality,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,330 @@
+"""
+Quota-aware rate limiting and retry for model calls.
+
+Every remote call in processor.py goes through call_with_retry with one of
+two shared limiters: 'generate' for generate_content (requests and tokens
+per minute) and 'files' for upload_file and get_file (requests per minute).
+Each limiter is a pair of token buckets shared by all worker threads.
+Generation requests reserve an estimate of their tokens (estimate_tokens)
+before they are sent, so N workers cannot all start full-size requests
+before any tokens are counted; the reservation is corrected to the actual
+usage once the response arrives, and given back if the request fails.
+
+Throttling (429 / ResourceExhausted) and transient server errors are
+retried with exponential backoff and jitter, waiting instead for the
+server's retry hint when the error carries one. A throttled call also pauses
+every worker on that limiter until the hint expires and halves its request
+rate (starting from the rate actually observed over the last minute when no
+limit was configured); each success then raises the rate again by a small
+step, up to the configured limit. Concurrent workers so settle just under
+the quota instead of repeatedly overrunning it.
+
+Limits come from OCR_RPM, OCR_TPM and OCR_FILES_RPM (or main.py's --rpm
+and --tpm); unset means no limit until the first throttle.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+DEFAULT_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "5"))
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+MIN_RPM = 1.0
+RPM_INCREASE = 1.0  # Requests/min added after each success while below the limit
+RPM_DECREASE = 0.5  # Factor applied to the rate on each throttle
+CHARS_PER_TOKEN = 4
+PAGE_TOKENS = 258  # Input tokens billed per PDF page
+OUTPUT_TOKENS_PER_PAGE = 1200  # Rough transcription + translation of a page
+
+_RETRY_HINT_RES = (
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+)
+_THROTTLE_NAMES = {"ResourceExhausted", "TooManyRequests"}
+_TRANSIENT_NAMES = {
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "BadGateway",
+}
+
+
+def _status_code(error):
+    for attribute in ("code", "status_code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_throttle(error):
+    """True for quota errors: HTTP 429 / ResourceExhausted."""
+    if type(error).__name__ in _THROTTLE_NAMES or _status_code(error) == 429:
+        return True
+    message = str(error).lower()
+    return message.startswith("429") or "resource has been exhausted" in message
+
+
+def is_transient(error):
+    """True for server-side failures worth retrying (5xx, timeouts, dropped connections)."""
+    if type(error).__name__ in _TRANSIENT_NAMES:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    code = _status_code(error)
+    return code is not None and 500 <= code < 600
+
+
+def retry_after(error):
+    """Returns the server's retry hint in seconds, or None."""
+    for attribute in ("retry_after", "retry_delay"):
+        value = getattr(error, attribute, None)
+        if value is None:
+            continue
+        if hasattr(value, "total_seconds"):
+            return value.total_seconds()
+        if hasattr(value, "seconds"):
+            return value.seconds + getattr(value, "nanos", 0) / 1e9
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    message = str(error)
+    for pattern in _RETRY_HINT_RES:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate_per_minute, holding at most a minute's worth.
+    reserve() takes tokens immediately (the balance may go negative) and
+    returns how long the caller must wait for them, so waiting happens
+    outside the lock and callers are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute=None):
+        self._lock = threading.Lock()
+        self._rate = rate_per_minute
+        self._tokens = rate_per_minute or 0.0
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate_per_minute):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._rate is None and rate_per_minute is not None:
+                self._tokens = 0.0  # Start limiting from an empty bucket
+            self._rate = rate_per_minute
+            if rate_per_minute is not None:
+                self._tokens = min(self._tokens, rate_per_minute)
+
+    def _refill(self, now):
+        if self._rate is not None:
+            self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate / 60)
+        self._updated = now
+
+    def reserve(self, amount=1.0):
+        """Takes amount tokens and returns the seconds to wait before using them."""
+        with self._lock:
+            if self._rate is None:
+                return 0.0
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * 60 / self._rate
+
+    def release(self, amount):
+        """Gives back tokens reserved but not used."""
+        with self._lock:
+            if self._rate is None:
+                return
+            self._refill(time.monotonic())
+            self._tokens = min(self._rate, self._tokens + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by all callers,
+    with additive-increase/multiplicative-decrease adaptation of the request
+    rate on throttling. rpm and tpm of None mean no configured limit.
+    """
+
+    def __init__(self, name, rpm=None, tpm=None):
+        self.name = name
+        self.max_rpm = rpm
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "waited": 0.0}
+        self._recent = deque()  # Start times of the requests of the last minute
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        """Blocks until a request may be sent, reserving its estimated tokens."""
+        with self._lock:
+            pause = max(0.0, self._paused_until - time.monotonic())
+        wait = pause + self.requests.reserve(1)
+        wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["waited"] += wait
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+
+    def release_tokens(self, count):
+        """Gives back the tokens reserved for a request that failed."""
+        if count:
+            self.tokens.release(count)
+
+    def settle_tokens(self, reserved, used):
+        """
+        Corrects a reservation to the tokens a response actually used; the
+        reservation stands when the response reports no usage.
+        """
+        if not used:
+            return
+        if used > reserved:
+            self.tokens.reserve(used - reserved)
+        elif used < reserved:
+            self.tokens.release(reserved - used)
+
+    def record_retry(self):
+        with self._lock:
+            self.stats["retries"] += 1
+
+    def on_success(self):
+        rate = self.requests.rate
+        if rate is not None and (self.max_rpm is None or rate < self.max_rpm):
+            new_rate = rate + RPM_INCREASE
+            if self.max_rpm is not None:
+                new_rate = min(new_rate, self.max_rpm)
+            self.requests.rate = new_rate
+
+    def on_throttle(self, pause):
+        """Pauses all callers for pause seconds and lowers the request rate."""
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            observed = len(self._recent)
+        rate = self.requests.rate
+        # Without a configured limit, the rate that got throttled is the best estimate
+        base = observed if rate is None else rate
+        new_rate = max(MIN_RPM, base * RPM_DECREASE)
+        self.requests.rate = new_rate
+        return new_rate
+
+
+def call_with_retry(
+    func, limiter, label="request", retries=None, tokens=0, retry_transient=True
+):
+    """
+    Calls func() under limiter, retrying throttled and transient failures.
+    Other errors, and the last failure, are raised.
+
+    tokens, an estimate of the call's token use, is reserved before each
+    attempt and given back when it fails; settle it with
+    limiter.settle_tokens once the response's usage is known. With
+    retry_transient=False only throttling is retried, for calls that must
+    not be repeated when they may have gone through (e.g. uploads).
+    """
+    if retries is None:
+        retries = DEFAULT_RETRIES
+    attempt = 0
+    while True:
+        limiter.acquire(tokens)
+        try:
+            result = func()
+        except Exception as e:
+            limiter.release_tokens(tokens)
+            throttled = is_throttle(e)
+            retryable = throttled or (retry_transient and is_transient(e))
+            if not retryable or attempt >= retries:
+                raise
+            hint = retry_after(e)
+            backoff = min(MAX_DELAY, BASE_DELAY * 2**attempt)
+            delay = hint if hint is not None else backoff * random.uniform(0.5, 1.0)
+            attempt += 1
+            limiter.record_retry()
+            if throttled:
+                rate = limiter.on_throttle(delay)
+                print(
+                    f"{label} throttled; retrying in {delay:.1f}s at {rate:.0f} req/min "
+                    f"({attempt}/{retries})"
+                )
+            else:
+                print(f"{label} failed ({e}); retrying in {delay:.1f}s ({attempt}/{retries})")
+                time.sleep(delay)
+            continue
+        limiter.on_success()
+        return result
+
+
+def estimate_tokens(prompt, pages=0, text=""):
+    """
+    Rough token use of a request, reserved against the TPM limit until the
+    response reports the real count. text (e.g. text to translate) is counted
+    twice, once sent and once returned; each PDF page adds its input tokens
+    and OUTPUT_TOKENS_PER_PAGE.
+    """
+    chars = len(prompt) + 2 * len(text)
+    return chars // CHARS_PER_TOKEN + pages * (PAGE_TOKENS + OUTPUT_TOKENS_PER_PAGE)
+
+
+def response_tokens(response):
+    """Total tokens reported in a response's (or final stream chunk's) usage metadata."""
+    metadata = getattr(response, "usage_metadata", None)
+    return getattr(metadata, "total_token_count", 0) or 0
+
+
+def _env_number(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _create_limiters(rpm, tpm, files_rpm):
+    return {
+        "generate": RateLimiter(
+            "generate",
+            rpm if rpm is not None else _env_number("OCR_RPM"),
+            tpm if tpm is not None else _env_number("OCR_TPM"),
+        ),
+        "files": RateLimiter(
+            "files", files_rpm if files_rpm is not None else _env_number("OCR_FILES_RPM")
+        ),
+    }
+
+
+def configure(rpm=None, tpm=None, files_rpm=None):
+    """(Re)creates the shared limiters; None falls back to the environment."""
+    with _limiters_lock:
+        _limiters.update(_create_limiters(rpm, tpm, files_rpm))
+
+
+def get_limiter(kind):
+    """Returns the shared 'generate' or 'files' limiter."""
+    with _limiters_lock:
+        if not _limiters:
+            _limiters.update(_create_limiters(None, None, None))
+        return _limiters[kind]
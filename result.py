@@ -0,0 +1,238 @@
+"""
+Structured OCR results.
+
+OCRResult holds what a run produced: the transcription, translation and
+model assessment, the automated analysis with its confidence score and
+detected issues, the per-page index, timings and token usage. It is written
+as a JSON sidecar next to single-run outputs ('<output>.result.json') and
+appended as one line per document to a JSONL file in batch runs, so
+review_tool.py and the exporters can read it directly instead of re-parsing
+the text output, and corpus-wide tooling can stream results.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+RESULT_VERSION = 1
+
+_jsonl_lock = threading.Lock()
+
+
+class RunStats:
+    """
+    Timings (seconds per stage), bytes uploaded and token usage collected
+    during a run of source. Safe to update from the worker threads of chunked
+    runs. Every timed stage is also logged as a span (see metrics.py).
+    """
+
+    __slots__ = ("source", "timings", "usage", "_lock")
+
+    def __init__(self, source=None):
+        self.source = source
+        self.timings = {}
+        self.usage = {
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0,
+            "requests": 0,
+            "upload_bytes": 0,
+        }
+        self._lock = threading.Lock()
+
+    def add_time(self, stage, seconds):
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        metrics.log_span(stage, seconds, self.source)
+
+    def add_upload(self, num_bytes):
+        with self._lock:
+            self.usage["upload_bytes"] += num_bytes
+
+    @contextmanager
+    def timed(self, stage):
+        """Adds the time spent in the with-block to stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_usage(self, response):
+        """Adds the token counts of a Gemini response (or final stream chunk)."""
+        metadata = getattr(response, "usage_metadata", None)
+        with self._lock:
+            self.usage["requests"] += 1
+            if metadata is None:
+                return
+            self.usage["prompt_tokens"] += getattr(metadata, "prompt_token_count", 0) or 0
+            self.usage["output_tokens"] += getattr(metadata, "candidates_token_count", 0) or 0
+            self.usage["total_tokens"] += getattr(metadata, "total_token_count", 0) or 0
+
+
+def record_time(stats, stage):
+    """stats.timed(stage), or a no-op when no stats are being collected."""
+    if stats is None:
+        return _no_timing()
+    return stats.timed(stage)
+
+
+@contextmanager
+def _no_timing():
+    yield
+
+
+class OCRResult:
+    """The outcome of processing one document."""
+
+    __slots__ = (
+        "source",
+        "model",
+        "transcription",
+        "translation",
+        "assessment",
+        "analysis",
+        "confidence",
+        "issues",
+        "pages",
+        "timings",
+        "usage",
+    )
+
+    def __init__(
+        self,
+        source=None,
+        model=None,
+        transcription="",
+        translation="",
+        assessment="",
+        analysis="",
+        confidence=None,
+        issues=None,
+        pages=None,
+        timings=None,
+        usage=None,
+    ):
+        self.source = source
+        self.model = model
+        self.transcription = transcription
+        self.translation = translation
+        self.assessment = assessment
+        self.analysis = analysis
+        self.confidence = confidence
+        self.issues = issues or []
+        self.pages = pages or []
+        self.timings = timings or {}
+        self.usage = usage or {}
+
+    @classmethod
+    def from_text(cls, text, source=None, model=None, stats=None):
+        """
+        Builds a result from the text returned by transcribe_and_translate.
+        The text is parsed once here; consumers then use the fields.
+        """
+        from processor import parse_sections
+
+        return cls.from_sections(parse_sections(text), source, model, stats)
+
+    @classmethod
+    def from_sections(cls, sections, source=None, model=None, stats=None):
+        """
+        Builds a result from the {name: content} sections of a response
+        (see processor.parse_sections), scanning each page once.
+        """
+        from page_index import build_page_index, parse_page_sources, scan_pages
+        from processor import calculate_confidence_score
+        from scanner import ScanResult
+
+        analysis = sections.get("AUTOMATED ANALYSIS", "")
+        transcription = sections.get("TRANSCRIPCIÓN", sections.get("TRANSCRIPTION", ""))
+        # One scan per page serves both the page index and the document issues
+        scanned = scan_pages(transcription)
+        issues = ScanResult.merge(result for *_, result in scanned).messages()
+        index = build_page_index(
+            transcription, source, page_sources=parse_page_sources(analysis), scanned=scanned
+        )
+        return cls(
+            source=source,
+            model=model,
+            transcription=transcription,
+            translation=sections.get("TRADUCCIÓN", sections.get("TRANSLATION", "")),
+            assessment=sections.get("QUALITY ASSESSMENT", ""),
+            analysis=analysis,
+            confidence=calculate_confidence_score(transcription, issues),
+            issues=issues,
+            pages=index["pages"],
+        ).update_stats(stats)
+
+    def update_stats(self, stats):
+        """Copies the timings (rounded to ms) and usage of a RunStats; returns self."""
+        if stats is not None:
+            self.timings = {k: round(v, 3) for k, v in stats.timings.items()}
+            self.usage = dict(stats.usage)
+        return self
+
+    def sections(self):
+        """Returns (name, content) pairs in output order."""
+        return [
+            ("TRANSCRIPCIÓN", self.transcription),
+            ("TRADUCCIÓN", self.translation),
+            ("QUALITY ASSESSMENT", self.assessment),
+            ("AUTOMATED ANALYSIS", self.analysis),
+        ]
+
+    def to_text(self):
+        """Renders the result in the sectioned text format of the txt output."""
+        return "\n\n".join(f"--- {name} ---\n{content}" for name, content in self.sections()) + "\n"
+
+    def page_index(self):
+        """Returns the page index dict (see page_index.py) of this result."""
+        from page_index import INDEX_VERSION
+
+        return {"version": INDEX_VERSION, "source": self.source, "pages": self.pages}
+
+    def to_dict(self):
+        data = {"version": RESULT_VERSION}
+        data.update((name, getattr(self, name)) for name in self.__slots__)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def write_json(self, path):
+        """Writes the result as a JSON file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    def append_jsonl(self, path):
+        """Appends the result as one line of a JSONL file; safe across threads."""
+        line = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _jsonl_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def result_path_for(output_path):
+    """Returns the JSON sidecar path of the result for an output file."""
+    return os.path.splitext(output_path)[0] + ".result.json"
+
+
+def load_result(path):
+    """Loads a result JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return OCRResult.from_dict(json.load(f))
+
+
+def iter_results(path):
+    """Yields the results of a JSONL file one line at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield OCRResult.from_dict(json.loads(line))
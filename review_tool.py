@@ -2,13 +2,38 @@
 """
 Manual Review Tool for OCR Results
 Helps reviewers quickly identify and correct OCR errors.
+
+Given a directory, it triages the whole corpus instead: every result is
+parsed and scored in a process pool, one ranked triage report is written,
+and detailed review reports only for the files below the confidence
+threshold.
 """
 
 import argparse
-import re
+import json
 import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 
+from page_index import (
+    format_page_spec,
+    index_path_for,
+    load_page_index,
+    low_confidence_pages,
+    worst_pages,
+)
+from result import OCRResult, iter_results, load_result, result_path_for
+from scanner import (
+    ISSUE_MESSAGES,
+    MISSING_SPACE,
+    REPEATED,
+    UNUSUAL_CHARS,
+    Issue,
+    find_issues,
+    scan,
+)
+
 
 def load_processed_file(file_path):
     """Load and parse a processed OCR file."""
@@ -35,38 +60,136 @@ def load_processed_file(file_path):
     return sections
 
 
-def highlight_suspicious_text(text):
-    """Highlight potentially problematic text patterns."""
-    highlighted = text
-
-    # Highlight repeated characters
-    highlighted = re.sub(r"(.)\1{3,}", r"**\1\1\1\1+**", highlighted)
-
-    # Highlight missing spaces (lowercase + uppercase)
-    highlighted = re.sub(r"([a-z])([A-Z])", r"\1**\1\2**\2", highlighted)
+def load_review_input(file_path):
+    """
+    Loads what to review: a result JSON, the result sidecar of a processed
+    file when there is one, or else the processed text file's sections.
+    """
+    if file_path.endswith(".json"):
+        return load_result(file_path)
+    sidecar = result_path_for(file_path)
+    if os.path.exists(sidecar):
+        return load_result(sidecar)
+    return load_processed_file(file_path)
+
+
+# Highlight markup per issue kind, matching the report legend
+HIGHLIGHT_MARKUP = {
+    REPEATED: "****",
+    MISSING_SPACE: "**",
+    UNUSUAL_CHARS: "***",
+}
+# Kinds that are reported but not highlighted only need their first hit
+UNHIGHLIGHTED_KINDS = set(ISSUE_MESSAGES) - set(HIGHLIGHT_MARKUP)
+
+
+def highlight_suspicious_text(text, issues=None):
+    """
+    Highlight potentially problematic text patterns.
+    issues can be passed in when the text has already been scanned.
+    """
+    if issues is None:
+        issues = find_issues(text, kinds=HIGHLIGHT_MARKUP)
+
+    spans = sorted(
+        (issue.start, issue.end, HIGHLIGHT_MARKUP[issue.kind])
+        for issue in issues
+        if issue.kind in HIGHLIGHT_MARKUP
+    )
 
-    # Highlight unusual character sequences
-    highlighted = re.sub(r"[^\w\s]{3,}", r"***\g<0>***", highlighted)
+    parts = []
+    position = 0
+    for start, end, markup in spans:
+        if start < position:  # Overlaps an already highlighted span
+            continue
+        parts.append(text[position:start])
+        parts.append(f"{markup}{text[start:end]}{markup}")
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def page_index_matches(page_index, transcription):
+    """Checks that a page index was built from this transcription."""
+    pages = page_index.get("pages") if page_index else None
+    return bool(pages) and pages[-1]["end"] <= len(transcription)
+
+
+def format_worst_pages(page_index, transcription, limit):
+    """Renders the worst pages of a page index, highlighted from its stored issues."""
+    worst = worst_pages(page_index, limit)
+    lines = ["\n## Pages to Review"]
+    lines.append("| Page | Path | Confidence | Issues | Characters |")
+    lines.append("|------|------|------------|--------|------------|")
+    for page in worst:
+        lines.append(
+            f"| {page['page']} | {page.get('path', 'ocr')} | {page['confidence']}% "
+            f"| {len(page['issues'])} | {page['start']}-{page['end']} |"
+        )
 
-    return highlighted
+    low = low_confidence_pages(page_index)
+    if low:
+        source = page_index.get("source") or "<input.pdf>"
+        lines.append(
+            f"\nRe-process low-confidence pages: "
+            f"`python main.py {source} --pages {format_page_spec(low)} -o <output>`"
+        )
 
+    for page in worst:
+        start = page["start"]
+        page_issues = [
+            Issue(kind, issue_start - start, issue_end - start)
+            for kind, issue_start, issue_end in page["issues"]
+        ]
+        lines.append(f"\n### Página {page['page']} ({page['confidence']}%)")
+        page_text = transcription[start : page["end"]]
+        lines.append(highlight_suspicious_text(page_text, page_issues).strip())
+    return lines
+
+
+def generate_review_report(sections, output_path, page_index=None, worst=5):
+    """
+    Generate a review report with highlighted issues.
+    sections is an OCRResult (see result.py) or a dict of parsed sections.
+    With a page index (see page_index.py), the worst pages are listed first
+    and highlighted from the stored issues, without re-scanning the text.
+    """
+    if isinstance(sections, OCRResult):
+        if page_index is None and sections.pages:
+            page_index = sections.page_index()
+        sections = dict(sections.sections())
 
-def generate_review_report(sections, output_path):
-    """Generate a review report with highlighted issues."""
     report = []
     report.append("# OCR Review Report")
     report.append("=" * 50)
 
-    if "TRANSCRIPTION" in sections:
+    # processor.py labels the sections in Spanish
+    transcription = sections.get("TRANSCRIPCIÓN", sections.get("TRANSCRIPTION"))
+    translation = sections.get("TRADUCCIÓN", sections.get("TRANSLATION"))
+
+    if transcription is not None:
+        if page_index_matches(page_index, transcription):
+            report.extend(format_worst_pages(page_index, transcription, worst))
+            issues = [
+                Issue(kind, start, end)
+                for page in page_index["pages"]
+                for kind, start, end in page["issues"]
+            ]
+        else:
+            scan_result = scan(transcription, first_only=UNHIGHLIGHTED_KINDS)
+            issues = scan_result.issues
+            if issues:
+                report.append(f"\n**Detected:** {', '.join(scan_result.messages())}")
+
         report.append("\n## Original Transcription")
         report.append(
             "**Legend:** ***unusual chars***, **missing space**, ****repeated chars****"
         )
-        report.append("\n" + highlight_suspicious_text(sections["TRANSCRIPTION"]))
+        report.append("\n" + highlight_suspicious_text(transcription, issues))
 
-    if "TRANSLATION" in sections:
+    if translation is not None:
         report.append("\n## Spanish Translation")
-        report.append(sections["TRANSLATION"])
+        report.append(translation)
 
     if "QUALITY ASSESSMENT" in sections:
         report.append("\n## Quality Assessment")
@@ -94,13 +217,221 @@ def generate_review_report(sections, output_path):
     print(f"Review report generated: {output_path}")
 
 
+DEFAULT_THRESHOLD = 70  # Confidence (%) below which a file gets a review report
+CONFIDENCE_BANDS = ((0, 50), (50, 70), (70, 85), (85, 101))
+
+
+def iter_review_items(root):
+    """
+    Yields what there is to review under root, as (item_id, path, line)
+    tuples: result JSON files, processed text files without a result JSON,
+    and each line of JSONL batch results (line is None for files). Text
+    outputs in a directory with JSONL results belong to that batch and are
+    skipped. item_id is the path relative to root, plus ':<line number>'.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        has_batch = any(name.endswith(".jsonl") for name in filenames)
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            item_id = os.path.relpath(path, root)
+            if name.endswith(".jsonl"):
+                with open(path, "r", encoding="utf-8") as f:
+                    for number, line in enumerate(f, 1):
+                        if line.strip():
+                            yield f"{item_id}:{number}", path, line
+            elif name.endswith(".result.json"):
+                yield item_id, path, None
+            elif (
+                name.endswith(".txt")
+                and not has_batch
+                and not os.path.exists(result_path_for(path))
+            ):
+                yield item_id, path, None
+
+
+def report_name(item_id, source=None):
+    """
+    File name of the review report for a corpus item, unique within the
+    corpus. JSONL lines are named after their source PDF and line number.
+    """
+    path, _, number = item_id.partition(":")
+    if number and source:
+        stem = os.path.join(os.path.dirname(path), f"{Path(source).stem}-{number}")
+    else:
+        stem = re.sub(r"\.(result\.json|txt|jsonl)$", "", path) + (f"-{number}" if number else "")
+    return re.sub(r"[^\w.-]+", "_", stem).strip("_") + "_review.md"
+
+
+def load_corpus_item(path, line):
+    """Loads one corpus item as an OCRResult."""
+    if line is not None:
+        return OCRResult.from_dict(json.loads(line))
+    if path.endswith(".json"):
+        return load_result(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return OCRResult.from_text(f.read(), source=path)
+
+
+def triage_item(item_id, path, line, threshold, output_dir, worst):
+    """
+    Scores one corpus item; runs in a pool process. Writes its review report
+    when the confidence is below threshold. Returns a summary dict.
+    """
+    summary = {"id": item_id}
+    try:
+        result = load_corpus_item(path, line)
+        if result.pages:
+            issues = sum(len(page["issues"]) for page in result.pages)
+        else:
+            issues = len(scan(result.transcription).issues)
+        chars = len(result.transcription)
+        confidence = result.confidence
+        summary.update(
+            source=result.source,
+            confidence=confidence,
+            pages=len(result.pages),
+            issues=issues,
+            density=round(1000 * issues / chars, 2) if chars else 0.0,
+            low_pages=format_page_spec(low_confidence_pages(result.page_index(), threshold)),
+            report=None,
+        )
+        if confidence is None or confidence < threshold:
+            report_path = os.path.join(output_dir, report_name(item_id, result.source))
+            generate_review_report(result, report_path, worst=worst)
+            summary["report"] = report_path
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+    return summary
+
+
+def triage_rank(summary):
+    """
+    Sort key: lowest confidence first (unknown counts as lowest), then most
+    issues per character; unreadable files last.
+    """
+    confidence = summary.get("confidence")
+    return (
+        "error" in summary,
+        -1 if confidence is None else confidence,
+        -summary.get("density", 0.0),
+        summary["id"],
+    )
+
+
+def run_corpus_review(
+    root, output_dir=".", threshold=DEFAULT_THRESHOLD, workers=None, worst=5
+):
+    """
+    Triages every result under root in a process pool and returns the
+    summaries, best candidates for review first. At most a few items per
+    worker are in flight, so the corpus is streamed rather than loaded.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 4
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for item_id, path, line in iter_review_items(root):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                summaries.extend(future.result() for future in done)
+            pending.add(
+                executor.submit(triage_item, item_id, path, line, threshold, output_dir, worst)
+            )
+        summaries.extend(future.result() for future in wait(pending).done)
+    return sorted(summaries, key=triage_rank)
+
+
+def format_triage_report(summaries, root, threshold=DEFAULT_THRESHOLD):
+    """Renders ranked corpus summaries as a markdown triage report."""
+    scored = [summary for summary in summaries if "error" not in summary]
+    failed = [summary for summary in summaries if "error" in summary]
+    flagged = [summary for summary in scored if summary["report"]]
+
+    report = ["# OCR Triage Report", "=" * 50]
+    report.append(
+        f"\n**Corpus:** {root} · {len(summaries)} files · "
+        f"{len(flagged)} below {threshold}% confidence · {len(failed)} unreadable"
+    )
+
+    report.append("\n## Confidence Distribution")
+    report.append("| Confidence | Files |")
+    report.append("|------------|-------|")
+    for low, high in CONFIDENCE_BANDS:
+        count = sum(
+            1
+            for summary in scored
+            if summary["confidence"] is not None and low <= summary["confidence"] < high
+        )
+        report.append(f"| {low}-{min(high, 100)}% | {count} |")
+    unknown = sum(1 for summary in scored if summary["confidence"] is None)
+    if unknown:
+        report.append(f"| unknown | {unknown} |")
+
+    report.append("\n## Ranking")
+    report.append("Lowest confidence first, then most issues per 1000 characters.\n")
+    report.append("| Rank | File | Confidence | Issues | Issues/1k chars | Low pages | Report |")
+    report.append("|------|------|------------|--------|-----------------|-----------|--------|")
+    for rank, summary in enumerate(scored, 1):
+        confidence = summary["confidence"]
+        review = f"[review]({os.path.basename(summary['report'])})" if summary["report"] else ""
+        report.append(
+            f"| {rank} | {summary['id']} | "
+            f"{'?' if confidence is None else f'{confidence}%'} | {summary['issues']} "
+            f"| {summary['density']} | {summary['low_pages'] or '-'} | {review} |"
+        )
+
+    if failed:
+        report.append("\n## Unreadable Files")
+        for summary in failed:
+            report.append(f"- {summary['id']}: {summary['error']}")
+    return "\n".join(report) + "\n"
+
+
 def main():
     parser = argparse.ArgumentParser(description="OCR Manual Review Tool")
-    parser.add_argument("input_file", help="Path to processed OCR file")
+    parser.add_argument(
+        "input_file",
+        help=(
+            "Processed OCR file, result JSON, JSONL of batch results, "
+            "or a directory of them to triage"
+        ),
+    )
     parser.add_argument("--review-report", "-r", help="Generate detailed review report")
     parser.add_argument(
         "--all", "-a", action="store_true", help="Generate review report"
     )
+    parser.add_argument(
+        "--worst",
+        "-w",
+        type=int,
+        default=5,
+        help="Number of worst pages to list when a page index exists (default: 5)",
+    )
+    parser.add_argument(
+        "--threshold",
+        "-t",
+        type=int,
+        default=DEFAULT_THRESHOLD,
+        help=(
+            "Directory input: write review reports only for files below this confidence "
+            f"(default: {DEFAULT_THRESHOLD})"
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        default=".",
+        help="Directory input: where the triage and review reports go (default: current directory)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Directory input: processes used to parse and score files (default: CPU count)",
+    )
 
     args = parser.parse_args()
 
@@ -108,18 +439,44 @@ def main():
         print(f"Error: File '{args.input_file}' not found.")
         return 1
 
-    # Load and parse the file
-    sections = load_processed_file(args.input_file)
+    if os.path.isdir(args.input_file):
+        summaries = run_corpus_review(
+            args.input_file, args.output_dir, args.threshold, args.jobs, args.worst
+        )
+        triage_path = os.path.join(args.output_dir, "triage_report.md")
+        with open(triage_path, "w", encoding="utf-8") as f:
+            f.write(format_triage_report(summaries, args.input_file, args.threshold))
+        flagged = sum(1 for summary in summaries if summary.get("report"))
+        print(
+            f"Triage report generated: {triage_path} "
+            f"({len(summaries)} files, {flagged} below {args.threshold}%)"
+        )
+        return 0
+
+    if args.input_file.endswith(".jsonl"):
+        # One report per document, streamed from the batch results
+        for result in iter_results(args.input_file):
+            stem = Path(result.source or "result").stem
+            generate_review_report(result, f"{stem}_review.md", worst=args.worst)
+        return 0
+
+    # Load the result, or parse the processed file when it has none
+    sections = load_review_input(args.input_file)
+    page_index = None
+    if not isinstance(sections, OCRResult):
+        page_index = load_page_index(index_path_for(args.input_file))
     base_path = Path(args.input_file).stem
+    if base_path.endswith(".result"):
+        base_path = base_path[: -len(".result")]
 
     # Generate review report (default behavior)
     if args.all or args.review_report:
         review_path = f"{base_path}_review.md"
-        generate_review_report(sections, review_path)
+        generate_review_report(sections, review_path, page_index, args.worst)
     else:
         # If no specific option given, generate review report by default
         review_path = f"{base_path}_review.md"
-        generate_review_report(sections, review_path)
+        generate_review_report(sections, review_path, page_index, args.worst)
 
     return 0
 
@@ -0,0 +1,163 @@
+"""
+Shared OCR anomaly scanner.
+
+scan() runs each precompiled pattern over the text once and returns typed
+Issue records with character offsets, plus the word and single-letter counts
+of the fragmentation check, taken from a single split of the text.
+processor.detect_anomalies, the page index and the review highlighter all
+work from these records, so one scan can be shared between them: an
+OCRResult merges its per-page scans into the document issues, and the
+review report detects and highlights from the same scan.
+
+The patterns are run separately rather than as one alternation: CPython's
+regex engine tries every branch at every position, which makes a combined
+pattern slower than the sum of individually optimized scans.
+"""
+
+import re
+
+REPEATED = "repeated"
+MISSING_SPACE = "missing_space"
+UNUSUAL_CHARS = "unusual_chars"
+LONG_NUMBER = "long_number"
+SPECIAL_CHARS = "special_chars"
+
+# Messages reported by detect_anomalies, in reporting order
+ISSUE_MESSAGES = {
+    REPEATED: "Repeated characters detected (possible OCR garble)",
+    MISSING_SPACE: "Missing spaces between words detected",
+    UNUSUAL_CHARS: r"Unusual character pattern detected: [^\w\s]{3,}",
+    LONG_NUMBER: r"Unusual character pattern detected: \d{10,}",
+    SPECIAL_CHARS: r"Unusual character pattern detected: [|@#$%^&*]{2,}",
+}
+FRAGMENTATION_MESSAGE = (
+    "High frequency of single-letter words (possible word fragmentation)"
+)
+FRAGMENTATION_RATIO = 0.1
+
+# Patterns equivalent to the original detect_anomalies checks, written to
+# hit the engine's fast paths (e.g. (.)\1\1\1+ instead of (.)\1{3,})
+_PATTERNS = (
+    (REPEATED, re.compile(r"(.)\1\1\1+")),
+    (MISSING_SPACE, re.compile(r"[a-z][A-Z]")),
+    (UNUSUAL_CHARS, re.compile(r"[^\w\s]{3,}")),
+    (LONG_NUMBER, re.compile(r"\d{10,}")),
+    (SPECIAL_CHARS, re.compile(r"[|@#$%^&*]{2,}")),
+)
+
+
+class Issue:
+    """A detected anomaly: its kind and [start, end) character offsets."""
+
+    __slots__ = ("kind", "start", "end")
+
+    def __init__(self, kind, start, end):
+        self.kind = kind
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Issue({self.kind!r}, {self.start}, {self.end})"
+
+    def __eq__(self, other):
+        return isinstance(other, Issue) and (self.kind, self.start, self.end) == (
+            other.kind,
+            other.start,
+            other.end,
+        )
+
+    def to_dict(self):
+        return {"kind": self.kind, "start": self.start, "end": self.end}
+
+
+class ScanResult:
+    """Issues found in a text plus the word counts used for fragmentation."""
+
+    __slots__ = ("issues", "word_count", "single_letter_count")
+
+    def __init__(self, issues, word_count, single_letter_count):
+        self.issues = issues
+        self.word_count = word_count
+        self.single_letter_count = single_letter_count
+
+    def kinds(self):
+        """Returns the set of issue kinds present."""
+        return {issue.kind for issue in self.issues}
+
+    @property
+    def fragmented(self):
+        return self.single_letter_count > self.word_count * FRAGMENTATION_RATIO
+
+    @classmethod
+    def merge(cls, results):
+        """
+        Combines the results of consecutive, whitespace-separated parts of a
+        text (e.g. its pages) into the result for the whole text. Issue
+        offsets stay relative to each part, so use it for kinds and messages.
+        """
+        issues = []
+        word_count = 0
+        single_letter_count = 0
+        for result in results:
+            issues.extend(result.issues)
+            word_count += result.word_count
+            single_letter_count += result.single_letter_count
+        return cls(issues, word_count, single_letter_count)
+
+    def messages(self):
+        """Returns the detect_anomalies issue messages for this result."""
+        kinds = self.kinds()
+        messages = [ISSUE_MESSAGES[kind] for kind in ISSUE_MESSAGES if kind in kinds]
+        if self.fragmented:
+            messages.append(FRAGMENTATION_MESSAGE)
+        return messages
+
+
+def count_words(text, window=1 << 20):
+    """
+    Returns (words, single-letter words) of a text, splitting it on
+    whitespace a window at a time so a long text is never split at once.
+    """
+    words = 0
+    single_letters = 0
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + window, length)
+        while end < length and not text[end].isspace():
+            end += 1
+        parts = text[start:end].split()
+        words += len(parts)
+        single_letters += len([word for word in parts if len(word) == 1 and word.isalpha()])
+        start = end
+    return words, single_letters
+
+
+def find_issues(text, kinds=None, first_only=False):
+    """
+    Returns the Issues of the given kinds (all by default) ordered by offset.
+
+    first_only is True, or a collection of kinds, for which each pattern
+    stops at its first hit. Presence is all detect_anomalies needs, and it
+    is much cheaper than finding every hit on garbled text.
+    """
+    issues = []
+    for kind, pattern in _PATTERNS:
+        if kinds is not None and kind not in kinds:
+            continue
+        if first_only is True or (first_only and kind in first_only):
+            match = pattern.search(text)
+            if match:
+                issues.append(Issue(kind, *match.span()))
+        else:
+            issues.extend(Issue(kind, *match.span()) for match in pattern.finditer(text))
+    issues.sort(key=lambda issue: issue.start)
+    return issues
+
+
+def scan(text, first_only=False):
+    """
+    Scans text and returns a ScanResult with issues ordered by offset.
+    first_only is passed on to find_issues.
+    """
+    return ScanResult(find_issues(text, first_only=first_only), *count_words(text))
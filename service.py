@@ -0,0 +1,424 @@
+"""
+Local HTTP service: submit PDFs, poll jobs, fetch results.
+
+A long-running process keeps the model client, rate limits, upload
+registry, result cache and translation memory warm across documents,
+instead of paying for them on every main.py run. Built on the standard
+library's ThreadingHTTPServer; documents run on a bounded worker pool and
+submissions beyond --max-queued waiting jobs are refused with 503.
+
+    POST   /jobs?format=docx&filename=a.pdf   PDF bytes as the body -> 202 {"id", ...}
+    GET    /jobs                              all jobs
+    GET    /jobs/<id>                         status: queued, running, done or failed
+    GET    /jobs/<id>/result                  the result JSON (see result.py)
+    GET    /jobs/<id>/download?format=pdf     the output as txt, docx or pdf
+    DELETE /jobs/<id>                         forget a finished job and its files
+    GET    /health
+
+Other POST parameters: chunk_pages, optimize, translation_memory,
+dedup_pages, text_layer=0, use_cache=0 and refresh. Jobs live in memory; their files
+are kept under --data-dir until deleted.
+
+    python service.py --port 8080 --workers 4
+    curl --data-binary @convenio.pdf 'http://127.0.0.1:8080/jobs?format=docx'
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import metrics
+from batch import DEFAULT_WORKERS
+from cache import DEFAULT_CACHE_DIR
+from result import result_path_for
+from work_queue import ProgressStats
+
+FORMATS = {
+    "txt": "text/plain; charset=utf-8",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+DEFAULT_MAX_QUEUED = 100
+DEFAULT_MAX_UPLOAD_MB = 100
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ServiceError(Exception):
+    """A request error, answered with status and a JSON {"error": message}."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def safe_filename(filename):
+    """The base name of an uploaded file, reduced to safe characters."""
+    name = re.sub(r"[^\w.-]+", "_", os.path.basename(filename or "")).lstrip(".")
+    return name or "document.pdf"
+
+
+def _flag(params, name, default=False):
+    value = params.get(name)
+    if value is None:
+        return default
+    return value.lower() not in ("0", "false", "no", "")
+
+
+class OCRService:
+    """Jobs, their worker pool and files; shared by all request threads."""
+
+    def __init__(self, data_dir, workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED):
+        self.data_dir = data_dir
+        self.workers = workers
+        self.max_queued = max_queued
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        os.makedirs(data_dir, exist_ok=True)
+
+    def warm_up(self):
+        """Imports the pipeline and connects the model client before the first request."""
+        import processor
+
+        processor.get_backend().warm_up()
+
+    def counts(self):
+        with self._lock:
+            states = [job["status"] for job in self.jobs.values()]
+        return {state: states.count(state) for state in (QUEUED, RUNNING, DONE, FAILED)}
+
+    def submit(self, data, params):
+        """Stores an uploaded PDF and queues it; returns the job's status."""
+        output_format = params.get("format", "txt")
+        if output_format not in FORMATS:
+            raise ServiceError(400, f"Unknown format '{output_format}' (expected txt, docx or pdf)")
+        if not data.startswith(b"%PDF"):
+            raise ServiceError(400, "The request body is not a PDF")
+        try:
+            chunk_pages = int(params["chunk_pages"]) if params.get("chunk_pages") else None
+        except ValueError:
+            raise ServiceError(400, "chunk_pages must be an integer")
+        options = {
+            "use_cache": _flag(params, "use_cache", True),
+            "refresh": _flag(params, "refresh"),
+            "chunk_pages": chunk_pages,
+            "optimize": _flag(params, "optimize"),
+            "text_layer": _flag(params, "text_layer", True),
+            "translation_memory": _flag(params, "translation_memory"),
+            "dedup_pages": _flag(params, "dedup_pages"),
+        }
+
+        with self._lock:
+            queued = sum(1 for job in self.jobs.values() if job["status"] == QUEUED)
+            if queued >= self.max_queued:
+                raise ServiceError(
+                    503, f"{queued} jobs are already waiting; retry later", {"Retry-After": "30"}
+                )
+            job_id = uuid.uuid4().hex
+            job_dir = os.path.join(self.data_dir, job_id)
+            job = {
+                "id": job_id,
+                "status": QUEUED,
+                "filename": safe_filename(params.get("filename")),
+                "format": output_format,
+                "options": options,
+                "stage": None,
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "error": None,
+                "pages": None,
+                "confidence": None,
+                "dir": job_dir,
+                "outputs": {},
+                "render_lock": threading.Lock(),  # One render of a job's outputs at a time
+            }
+            self.jobs[job_id] = job
+
+        os.makedirs(job_dir, exist_ok=True)
+        with open(os.path.join(job_dir, "input.pdf"), "wb") as f:
+            f.write(data)
+        self._executor.submit(self._run, job)
+        return self.status(job_id)
+
+    def _run(self, job):
+        from processor import transcribe_result
+
+        input_path = os.path.join(job["dir"], "input.pdf")
+        with self._lock:
+            job.update(status=RUNNING, started=time.time())
+
+        def on_stage(stage):
+            with self._lock:
+                job["stage"] = stage
+
+        try:
+            stats = ProgressStats(input_path, on_stage)
+            result = transcribe_result(input_path, stats=stats, **job["options"])
+            result.source = job["filename"]
+            with job["render_lock"]:
+                self._render(job, result, job["format"], stats)
+            result.update_stats(stats).write_json(self._output_path(job, "json"))
+            metrics.record_document(result)
+        except Exception as e:
+            metrics.record_failure(job["filename"], e)
+            with self._lock:
+                job.update(status=FAILED, error=str(e), finished=time.time())
+            print(f"Job {job['id']} ({job['filename']}) failed: {e}")
+            return
+        with self._lock:
+            job.update(
+                status=DONE,
+                finished=time.time(),
+                pages=len(result.pages),
+                confidence=result.confidence,
+            )
+        print(f"Job {job['id']} ({job['filename']}) done")
+
+    def _output_path(self, job, output_format):
+        name = "ocr-" + os.path.splitext(job["filename"])[0]
+        if output_format == "json":
+            return result_path_for(os.path.join(job["dir"], name))
+        return os.path.join(job["dir"], f"{name}.{output_format}")
+
+    def _render(self, job, result, output_format, stats=None):
+        """
+        Writes the result in output_format (once per format) and returns the
+        path. Callers hold the job's render_lock.
+        """
+        from processor import save_to_file
+
+        path = self._output_path(job, output_format)
+        if output_format == "txt":
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(result.to_text())
+        else:
+            save_to_file(result, path, output_format, stats)
+        with self._lock:
+            job["outputs"][output_format] = path
+        return path
+
+    def _job(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"No job '{job_id}'")
+        return job
+
+    def _finished_job(self, job_id):
+        job = self._job(job_id)
+        if job["status"] == FAILED:
+            raise ServiceError(409, f"Job failed: {job['error']}")
+        if job["status"] != DONE:
+            raise ServiceError(409, f"Job is {job['status']}")
+        return job
+
+    def list(self):
+        with self._lock:
+            job_ids = list(self.jobs)
+        return [self.status(job_id) for job_id in job_ids]
+
+    def status(self, job_id):
+        job = self._job(job_id)
+        with self._lock:
+            status = {
+                key: job[key]
+                for key in (
+                    "id", "status", "filename", "format", "stage", "created", "started",
+                    "finished", "error", "pages", "confidence",
+                )
+            }
+        base = f"/jobs/{job_id}"
+        status["links"] = {
+            "status": base,
+            "result": f"{base}/result",
+            "download": f"{base}/download",
+        }
+        return status
+
+    def result(self, job_id):
+        job = self._finished_job(job_id)
+        with open(self._output_path(job, "json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def download(self, job_id, output_format=None):
+        """
+        Returns the path of the job's output in output_format, rendering it if
+        needed. Concurrent requests for a format not rendered yet wait for
+        one render instead of writing the same file at once.
+        """
+        from result import load_result
+
+        job = self._finished_job(job_id)
+        output_format = output_format or job["format"]
+        if output_format not in FORMATS:
+            raise ServiceError(400, f"Unknown format '{output_format}' (expected txt, docx or pdf)")
+        with job["render_lock"]:
+            with self._lock:
+                path = job["outputs"].get(output_format)
+            if path is None:
+                result = load_result(self._output_path(job, "json"))
+                path = self._render(job, result, output_format)
+        return path
+
+    def delete(self, job_id):
+        job = self._job(job_id)
+        if job["status"] in (QUEUED, RUNNING):
+            raise ServiceError(409, f"Job is {job['status']}")
+        with self._lock:
+            self.jobs.pop(job_id, None)
+        shutil.rmtree(job["dir"], ignore_errors=True)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's OCRService."""
+
+    max_upload_bytes = DEFAULT_MAX_UPLOAD_MB * 1024 * 1024
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, path, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.send_header(
+            "Content-Disposition", f'attachment; filename="{os.path.basename(path)}"'
+        )
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if method == "GET" and parts == ["health"]:
+                return self._send_json(
+                    200, {"status": "ok", "workers": self.service.workers, **self.service.counts()}
+                )
+            if parts[:1] != ["jobs"] or len(parts) > 3:
+                raise ServiceError(404, f"No route for {method} {url.path}")
+            if method == "POST" and len(parts) == 1:
+                return self._send_json(202, self.service.submit(self._read_body(), params))
+            if method == "GET" and len(parts) == 1:
+                return self._send_json(200, {"jobs": self.service.list()})
+            if method == "GET" and len(parts) == 2:
+                return self._send_json(200, self.service.status(parts[1]))
+            if method == "GET" and parts[2:] == ["result"]:
+                return self._send_json(200, self.service.result(parts[1]))
+            if method == "GET" and parts[2:] == ["download"]:
+                output_format = params.get("format")
+                path = self.service.download(parts[1], output_format)
+                return self._send_file(path, FORMATS[os.path.splitext(path)[1][1:]])
+            if method == "DELETE" and len(parts) == 2:
+                self.service.delete(parts[1])
+                return self._send_json(200, {"id": parts[1], "deleted": True})
+            raise ServiceError(405, f"{method} not allowed on {url.path}")
+        except ServiceError as e:
+            self._send_json(e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise ServiceError(400, "Send the PDF as the request body")
+        if length > self.max_upload_bytes:
+            raise ServiceError(413, f"Uploads are limited to {self.max_upload_bytes // 2**20} MB")
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+def make_server(service, host="127.0.0.1", port=8080):
+    """Returns a ThreadingHTTPServer serving service (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the OCR pipeline over HTTP.")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)."
+    )
+    parser.add_argument("--port", "-p", type=int, default=8080, help="Port (default: 8080).")
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Documents processed concurrently (default: {DEFAULT_WORKERS}).",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=DEFAULT_MAX_QUEUED,
+        help=f"Waiting jobs beyond which uploads get 503 (default: {DEFAULT_MAX_QUEUED}).",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=int,
+        default=DEFAULT_MAX_UPLOAD_MB,
+        help=f"Largest accepted upload (default: {DEFAULT_MAX_UPLOAD_MB} MB).",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(DEFAULT_CACHE_DIR, "service"),
+        help="Where uploads and outputs are kept (default: 'service' in the cache directory).",
+    )
+    args = parser.parse_args()
+
+    service = OCRService(args.data_dir, args.workers, args.max_queued)
+    service.warm_up()
+    ServiceHandler.max_upload_bytes = args.max_upload_mb * 1024 * 1024
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        service.shutdown(wait=False)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import processor
+from backends import FakeBackend, FakeBackendError, set_backend
+from benchmarks.corpus import write_synthetic_pdf
+from result import OCRResult
+
+
+def test_fake_backend_pipeline():
+    print("Testing fake backend...")
+
+    backend = FakeBackend(processing_delay=0.05, tokens_per_second=1_000_000, seed=0)
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "doc.pdf")
+            write_synthetic_pdf(pdf_path, 3)
+
+            sections = []
+            parses = []
+            original_parse_sections = processor.parse_sections
+
+            def counting_parse_sections(text):
+                parses.append(text)
+                return original_parse_sections(text)
+
+            processor.parse_sections = counting_parse_sections
+            try:
+                result = processor.transcribe_result(
+                    pdf_path,
+                    use_cache=False,
+                    text_layer=False,
+                    on_section=lambda name, content: sections.append(name),
+                )
+            finally:
+                processor.parse_sections = original_parse_sections
+            # The result is built from the pipeline's own parse of the response,
+            # without parsing the returned text again
+            assert not [text for text in parses if "TRANSCRIPCIÓN" in text and "AUTOMATED" in text]
+            expected = OCRResult.from_text(result.to_text(), source=pdf_path, model=result.model)
+            assert expected.to_dict() == dict(result.to_dict(), timings={}, usage={})
+            assert "parse" in result.timings and "index" in result.timings
+            assert sections == [
+                "TRANSCRIPCIÓN",
+                "TRADUCCIÓN",
+                "QUALITY ASSESSMENT",
+                "AUTOMATED ANALYSIS",
+            ]
+            assert [page["page"] for page in result.pages] == [1, 2, 3]
+            assert result.usage["requests"] == 1
+            assert result.usage["prompt_tokens"] == 3 * 258
+            assert backend.calls["upload"] == 1 and backend.calls["get_file"] >= 2
+
+            # Text-only requests echo their text
+            assert processor.translate_text("[[1]]\nhola") == "[[1]]\nhola"
+
+            backend.error_rate = 1.0
+            try:
+                processor.generate_response(pdf_path)
+                raise AssertionError("expected an injected failure")
+            except FakeBackendError:
+                pass
+    finally:
+        set_backend(previous)
+    print("✅ SUCCESS: pipeline runs offline against the fake backend")
+
+
+if __name__ == "__main__":
+    test_fake_backend_pipeline()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+import time
+
+from batch import collect_pdfs, format_summary, output_paths_for, run_batch
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4")
+
+
+def test_collect_pdfs():
+    print("Testing batch input expansion...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("a.pdf", "B.PDF", "notes.txt", os.path.join("sub", "c.pdf")):
+            _touch(os.path.join(tmp, name))
+        _touch(os.path.join(tmp, "other", "d.pdf"))
+
+        # Directories are walked recursively and only PDFs are kept
+        names = ("a.pdf", "B.PDF", os.path.join("sub", "c.pdf"), os.path.join("other", "d.pdf"))
+        assert collect_pdfs([tmp]) == sorted(os.path.join(tmp, name) for name in names)
+
+        # Globs, plain files and overlapping inputs are de-duplicated
+        single = os.path.join(tmp, "a.pdf")
+        pattern = os.path.join(tmp, "**", "*.pdf")
+        paths = collect_pdfs(
+            [single, os.path.relpath(single), pattern, os.path.join(tmp, "missing.pdf")]
+        )
+        assert len(paths) == len({os.path.abspath(path) for path in paths})
+        assert sorted(os.path.abspath(path) for path in paths) == sorted(
+            os.path.join(tmp, name)
+            for name in ("a.pdf", os.path.join("sub", "c.pdf"), os.path.join("other", "d.pdf"))
+        )
+        assert collect_pdfs([os.path.join(tmp, "*.txt")]) == []
+    print("✅ SUCCESS: directories, globs and duplicates")
+
+
+def test_output_paths_for():
+    print("Testing batch output names...")
+
+    paths = [
+        os.path.join("x", "convenio.pdf"),
+        os.path.join("y", "convenio.pdf"),
+        os.path.join("z", "otro.pdf"),
+        os.path.join("w", "convenio.pdf"),
+    ]
+    mapping = output_paths_for(paths, "out", "docx")
+    assert [os.path.basename(mapping[path]) for path in paths] == [
+        "convenio_processed.docx",
+        "convenio_processed_2.docx",
+        "otro_processed.docx",
+        "convenio_processed_3.docx",
+    ]
+    assert all(os.path.dirname(path) == "out" for path in mapping.values())
+    print("✅ SUCCESS: base-name collisions get numeric suffixes")
+
+
+def test_run_batch():
+    print("Testing batch runner...")
+
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    finished = []
+
+    def process(path):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        try:
+            time.sleep(0.05)
+            if "bad" in path:
+                raise ValueError(f"cannot read {path}")
+            return f"{path}.txt"
+        finally:
+            with lock:
+                running["now"] -= 1
+
+    paths = ["a.pdf", "bad.pdf", "c.pdf", "d.pdf", "e.pdf"]
+    results = run_batch(paths, process, workers=2, on_done=lambda r: finished.append(r["path"]))
+    # Results come back in input order; one failure does not stop the others
+    assert [r["path"] for r in results] == paths
+    assert [r["status"] for r in results] == ["ok", "error", "ok", "ok", "ok"]
+    assert results[0]["output"] == "a.pdf.txt" and results[0]["error"] is None
+    assert results[1]["error"] == "cannot read bad.pdf" and results[1]["output"] is None
+    assert sorted(finished) == sorted(paths)
+    assert running["max"] == 2
+
+    summary = format_summary(results, wall_seconds=0.2)
+    assert "4/5 succeeded in 0.2s wall time" in summary
+    assert "cannot read bad.pdf" in summary and "a.pdf.txt" in summary
+    print("✅ SUCCESS: failures are isolated and summarized")
+
+
+if __name__ == "__main__":
+    test_collect_pdfs()
+    test_output_paths_for()
+    test_run_batch()
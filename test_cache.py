@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+
+from cache import ResultCache
+
+
+def test_cache():
+    print("Testing result cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "sample.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 sample")
+
+        cache = ResultCache(os.path.join(tmp, "cache"), max_bytes=10_000)
+        key = cache.make_key(pdf_path, "model-a", "prompt")
+
+        # Key depends on model and prompt
+        assert key != cache.make_key(pdf_path, "model-b", "prompt")
+        assert key != cache.make_key(pdf_path, "model-a", "other prompt")
+
+        assert cache.get(key) is None
+        cache.put(key, {"response": "texto", "analysis": "\nanálisis"})
+        entry = cache.get(key)
+        assert entry["response"] == "texto"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+        # Expired entries are misses
+        cache.max_age = 0
+        time.sleep(0.01)
+        assert cache.get(key) is None
+
+        # Size bound evicts the least recently used entry first
+        cache.max_age = 3600
+        cache.max_bytes = 0
+        cache.put("a", {"response": "x" * 100})
+        assert cache.get("a") is None
+
+        # A recently read entry survives; the least recently used one goes
+        cache.max_bytes = 10_000
+        now = time.time()
+        for age, key in ((30, "old"), (20, "middle"), (10, "new")):
+            cache.put(key, {"response": "x" * 100})
+            os.utime(cache._path(key), (now - age, now - age))
+        assert cache.get("old") is not None
+        # Room for three entries, whose sizes differ by a few bytes
+        cache.max_bytes = 3 * os.path.getsize(cache._path("old")) + 50
+        cache.put("latest", {"response": "x" * 100})
+        remaining = sorted(name[:-5] for name in os.listdir(cache.cache_dir))
+        assert remaining == ["latest", "new", "old"]
+        print("✅ SUCCESS: cache hit/miss, expiry and eviction")
+
+
+if __name__ == "__main__":
+    test_cache()
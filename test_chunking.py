@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from backends import FakeBackend, FakeBackendError, set_backend
+from benchmarks.corpus import write_synthetic_pdf
+from chunking import _transcribe_chunk, run_cached
+
+
+class FlakyBackend(FakeBackend):
+    """Fails the first generation with an error the rate limiter does not retry."""
+
+    def __init__(self, failures):
+        super().__init__(seed=0)
+        self.failures = failures
+
+    def generate_content(self, contents, stream=False):
+        if self.failures:
+            self.failures -= 1
+            self._count("generate")
+            raise FakeBackendError("Empty response")
+        return super().generate_content(contents, stream=stream)
+
+
+class ServerError(Exception):
+    code = 503
+
+
+def test_chunk_retries():
+    print("Testing chunk retries...")
+
+    backend = FlakyBackend(failures=1)
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chunk_path = os.path.join(tmp_dir, "convenio_p1-2.pdf")
+            write_synthetic_pdf(chunk_path, 2)
+            response = _transcribe_chunk(chunk_path, None, None, False, retries=2)
+        assert "=== Página 2 ===" in response
+        # The retry generates again from the same upload
+        assert backend.calls["generate"] == 2
+        assert backend.calls["upload"] == 1
+    finally:
+        set_backend(previous)
+
+    # Throttling and server errors were already retried by ratelimit.call_with_retry
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ServerError("503 Service Unavailable")
+
+    try:
+        run_cached("chunk", failing, None, None, False, retries=2)
+    except ServerError:
+        pass
+    else:
+        raise AssertionError("the server error should propagate")
+    assert len(calls) == 1
+    print("✅ SUCCESS: chunks retry once per failure and reuse their upload")
+
+
+if __name__ == "__main__":
+    test_chunk_retries()
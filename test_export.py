@@ -36,5 +36,28 @@ def test_exports():
     except ValueError:
         print("✅ SUCCESS: TXT export raised ValueError as expected")
 
+def test_pdf_layout():
+    print("Testing PDF line wrapping...")
+    from reportlab.lib.utils import simpleSplit
+    from pdf_export import iter_wrapped_lines
+
+    text = "Artículo 1 (objeto)\n\n" + "palabra larga " * 80 + "\n" + "x" * 200
+    assert list(iter_wrapped_lines(text, 532)) == simpleSplit(text, "Helvetica", 10, 532)
+    print("✅ SUCCESS: wrapping matches simpleSplit")
+
+def test_import_without_sdk():
+    print("Testing that exports import without the Gemini SDK...")
+    import subprocess
+
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    code = (
+        "import sys, processor, review_tool; "
+        "assert 'google.generativeai' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    print("✅ SUCCESS: processor imports lazily")
+
 if __name__ == "__main__":
     test_exports()
+    test_pdf_layout()
+    test_import_without_sdk()
@@ -0,0 +1,93 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import processor
+from backends import FakeBackend, set_backend
+
+
+class PollingBackend(FakeBackend):
+    """Files turn ACTIVE (or FAILED) after a set number of status checks."""
+
+    def __init__(self, polls, failed=()):
+        super().__init__(seed=0)
+        self.polls = dict(polls)
+        self.failed = set(failed)
+        self.checking = 0
+        self.max_checking = 0
+        self._poll_lock = threading.Lock()
+
+    def get_file(self, name):
+        self._count("get_file")
+        with self._poll_lock:
+            self.checking += 1
+            self.max_checking = max(self.max_checking, self.checking)
+        time.sleep(0.02)
+        with self._poll_lock:
+            self.checking -= 1
+            self.polls[name] -= 1
+            done = self.polls[name] <= 0
+        state = "PROCESSING"
+        if done:
+            state = "FAILED" if name in self.failed else "ACTIVE"
+        return SimpleNamespace(name=name, state=SimpleNamespace(name=state))
+
+
+def _files(*names):
+    return [SimpleNamespace(name=name) for name in names]
+
+
+def test_wait_for_files_active():
+    print("Testing file activation polling...")
+
+    clock = {"now": 0.0}
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(round(seconds, 3))
+        clock["now"] += seconds
+
+    previous = set_backend(PollingBackend({}))
+    original_time, original_random = processor.time, processor.random
+    # A virtual clock and the upper end of the jitter range make the schedule exact
+    processor.time = SimpleNamespace(monotonic=lambda: clock["now"], sleep=sleep)
+    processor.random = SimpleNamespace(uniform=lambda low, high: high)
+    try:
+        backend = PollingBackend({"files/a": 1, "files/b": 3, "files/c": 6})
+        set_backend(backend)
+        processing = processor.wait_for_files_active(
+            _files("files/a", "files/b", "files/c"), initial_delay=0.25, max_delay=1.0
+        )
+        # Pending files are checked together; the delay doubles up to max_delay
+        assert backend.max_checking == 3
+        assert sleeps == [0.375, 0.75, 1.5, 1.5, 1.5]
+        assert processing == {"files/a": 0.0, "files/b": 1.125, "files/c": 5.625}
+        assert backend.calls["get_file"] == 1 + 3 + 6
+
+        set_backend(PollingBackend({"files/a": 2, "files/b": 2}, failed={"files/b"}))
+        try:
+            processor.wait_for_files_active(_files("files/a", "files/b"))
+        except Exception as e:
+            assert "files/b failed to process" in str(e)
+        else:
+            raise AssertionError("a FAILED file should raise")
+
+        del sleeps[:]
+        clock["now"] = 0.0
+        set_backend(PollingBackend({"files/a": 1000}))
+        try:
+            processor.wait_for_files_active(_files("files/a"), timeout=10, max_delay=4.0)
+        except TimeoutError as e:
+            assert "files/a" in str(e)
+        else:
+            raise AssertionError("polling should time out")
+        # The last sleep is cut short so the timeout is not overshot
+        assert clock["now"] == 10
+    finally:
+        processor.time, processor.random = original_time, original_random
+        set_backend(previous)
+    print("✅ SUCCESS: concurrent polling with backoff, FAILED files and timeouts")
+
+
+if __name__ == "__main__":
+    test_wait_for_files_active()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+
+from chunking import run_cached
+from jobs import ACTIVE, EXPORTED, GENERATED, PENDING, UPLOADED, JobStore
+
+
+def test_resume_from_job_store():
+    print("Testing job store...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "doc.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 one")
+        output_path = os.path.join(tmp_dir, "doc_processed.txt")
+
+        store = JobStore(os.path.join(tmp_dir, "jobs.sqlite3"))
+        run_id = store.create_run("key", ["in", "--chunk-pages", "2"])
+        job = store.document(run_id, pdf_path)
+        assert job.state == PENDING
+
+        step = job.step("pages 1-2")
+        step.set_state(UPLOADED, file="files/abc")
+        step.set_state(ACTIVE)
+        assert job.state == ACTIVE
+        assert step.response is None
+
+        calls = []
+
+        def generate():
+            calls.append(1)
+            return "response"
+
+        assert run_cached("chunk", generate, None, None, False, 0, step) == "response"
+        # A resumed run gets the stored response without calling the model again
+        assert run_cached("chunk", generate, None, None, True, 0, step) == "response"
+        assert len(calls) == 1
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("done")
+        job.set_state(EXPORTED, output=output_path)
+        assert store.document(run_id, pdf_path).is_exported()
+        assert store.summary(run_id) == {"documents": {EXPORTED: 1}, "steps": {GENERATED: 1}}
+        assert store.find_run("key")["argv"] == ["in", "--chunk-pages", "2"]
+
+        # A newer GUI run (no argv) is not offered to a bare --resume
+        gui_run_id = store.create_run("gui key")
+        assert store.find_run("gui key")["id"] == gui_run_id
+        assert store.find_run()["id"] == run_id
+
+        # Removed outputs are exported again; a changed input starts over
+        os.remove(output_path)
+        assert not job.is_exported()
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 two")
+        assert store.document(run_id, pdf_path).state == PENDING
+        assert step.response is None
+
+        store.finish_run(run_id)
+        assert store.find_run("key") is None
+        store.close()
+    print("✅ SUCCESS: job store tracks and resumes documents and steps")
+
+
+if __name__ == "__main__":
+    test_resume_from_job_store()
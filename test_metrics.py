@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+
+import metrics
+from result import OCRResult, RunStats
+
+
+def test_metrics_outputs():
+    print("Testing metrics export...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, "metrics.jsonl")
+        prom_path = os.path.join(tmp_dir, "ocr.prom")
+        metrics.reset()
+        metrics.configure(log_path, prom_path)
+        try:
+            stats = RunStats(source="doc.pdf")
+            stats.add_time("upload", 0.5)
+            # Two chunks uploading at once: busy time exceeds the wall time
+            stats.add_time("upload", 0.5)
+            stats.add_time("total", 0.75)
+            stats.add_upload(2048)
+            result = OCRResult(source="doc.pdf", pages=[{"page": 1}, {"page": 2}])
+            result.update_stats(stats)
+            assert result.usage["upload_bytes"] == 2048
+            metrics.record_document(result)
+            metrics.record_failure("bad.pdf", ValueError("boom"))
+        finally:
+            metrics.configure("", "")
+            metrics.reset()
+
+        with open(log_path, "r", encoding="utf-8") as f:
+            events = [json.loads(line) for line in f]
+        assert [event["event"] for event in events] == ["span"] * 3 + ["document"] * 2
+        assert events[0]["stage"] == "upload" and events[0]["source"] == "doc.pdf"
+        assert events[3]["pages"] == 2 and events[4]["status"] == "error"
+
+        with open(prom_path, "r", encoding="utf-8") as f:
+            prom = f.read()
+        assert 'ocr_documents_total{status="ok"} 1' in prom
+        assert 'ocr_documents_total{status="error"} 1' in prom
+        assert 'ocr_stage_seconds_total{stage="upload"} 1.0' in prom
+        assert 'stage="total"' not in prom
+        assert "ocr_document_seconds_total 0.75" in prom
+        assert "ocr_upload_bytes_total 2048" in prom
+        assert "ocr_pages_total 2" in prom
+    print("✅ SUCCESS: spans, document lines and Prometheus textfile written")
+
+
+if __name__ == "__main__":
+    test_metrics_outputs()
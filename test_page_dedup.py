@@ -0,0 +1,156 @@
+import io
+import os
+import random
+import tempfile
+
+from PIL import Image, ImageDraw
+
+from backends import FakeBackend, set_backend
+from cache import text_sha256
+from page_dedup import PageHashIndex, page_digests, transcribe_with_dedup
+from page_index import parse_page_sources
+from processor import MODEL_NAME, TRANSCRIBE_PROMPT, parse_sections
+
+WORDS = "el trabajador tendrá derecho a treinta días de vacaciones retribuidas al año".split()
+
+
+def _page_image(seed, quality=None):
+    rng = random.Random(seed)
+    image = Image.new("L", (612, 792), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(40):
+        text = " ".join(rng.choice(WORDS) for _ in range(12))
+        draw.text((60, 60 + 16 * line), text, fill=0)
+    if quality is not None:
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        image = Image.open(buffer)
+    return image
+
+
+def _write_pages(path, pages):
+    """Writes one PDF page per list of lines, or per PIL image (a scanned page)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=letter)
+    for page in pages:
+        if isinstance(page, Image.Image):
+            c.drawImage(ImageReader(page), 0, 0, *letter)
+        else:
+            c.setFont("Helvetica", 10)
+            for number, line in enumerate(page):
+                c.drawString(40, 740 - 14 * number, line)
+        c.showPage()
+    c.save()
+
+
+def _clause_lines(seed):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(40)]
+
+
+def test_page_digests():
+    print("Testing page digests...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        first, second = os.path.join(tmp_dir, "a.pdf"), os.path.join(tmp_dir, "b.pdf")
+        table = _clause_lines(1)[:20]
+        _write_pages(first, [table + ["Salario base: 1.200 euros"], _page_image(1)])
+        _write_pages(
+            second,
+            [
+                table + ["Salario base: 1.200 euros"],
+                table + ["Salario base: 1.250 euros"],
+                _page_image(1),
+                _page_image(1, quality=75),
+                _page_image(2),
+            ],
+        )
+        a = page_digests(first, [1, 2])
+        b = page_digests(second, range(1, 6))
+
+        # The same content in another document shares the digest; a changed
+        # figure, another scan or a recompressed scan does not
+        assert a[1] == b[1] and a[2] == b[3]
+        assert len({a[1], a[2], b[2], b[4], b[5]}) == 5
+
+        index = PageHashIndex(os.path.join(tmp_dir, "pages.sqlite3"))
+        index.store([(a[1], "Tabla", "Tabla (es)", "a.pdf", 1)], MODEL_NAME, "p")
+        index.store([(None, "Sin digest", None, "a.pdf", 2)], MODEL_NAME, "p")
+        assert len(index) == 1  # Pages without a digest are not indexed
+        match = index.lookup(b[1], MODEL_NAME, "p")
+        assert match["transcription"] == "Tabla" and match["translation"] == "Tabla (es)"
+        assert (match["source"], match["page"]) == ("a.pdf", 1)
+        assert index.lookup(b[2], MODEL_NAME, "p") is None
+        assert index.lookup(b[1], MODEL_NAME, "other prompt") is None
+        assert index.lookup(None, MODEL_NAME, "p") is None
+        index.close()
+    print("✅ SUCCESS: page digests match identical content only")
+
+
+def test_dedup_pipeline():
+    print("Testing page deduplication...")
+
+    backend = FakeBackend(seed=0)
+    previous = set_backend(backend)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = PageHashIndex(os.path.join(tmp_dir, "pages.sqlite3"))
+            first, second = os.path.join(tmp_dir, "2023.pdf"), os.path.join(tmp_dir, "2024.pdf")
+            clauses = {page: _clause_lines(page) for page in range(1, 7)}
+            _write_pages(first, [clauses[page] for page in range(1, 5)])
+            # Page 1 repeats 2023's page 3; pages 4-5 repeat 2023's pages 4 and 1
+            _write_pages(second, [clauses[page] for page in (3, 5, 6, 4, 1)])
+
+            options = {"chunk_pages": 2, "use_cache": False, "index": index}
+            result = transcribe_with_dedup(first, **options)
+            assert backend.calls["generate"] == 2
+            assert len(index) == 4
+            assert "Page sources: OCR 1-4" in result
+
+            digest = page_digests(second, [4])[4]
+            entry = (digest, "Tabla salarial", "Tabla salarial (es)", "x.pdf", 1)
+            index.store([entry], MODEL_NAME, text_sha256(TRANSCRIBE_PROMPT))
+            result = transcribe_with_dedup(second, **options)
+            # Only the novel pages 2-3 go to the model, as one run
+            assert backend.calls["generate"] == 3
+            assert parse_page_sources(result) == {
+                1: "reused", 2: "ocr", 3: "ocr", 4: "reused", 5: "reused"
+            }
+            sections = parse_sections(result)
+            transcription = sections["TRANSCRIPCIÓN"]
+            assert [f"=== Página {p} ===" in transcription for p in range(1, 6)] == [True] * 5
+            # The newest entry for a page wins
+            assert "=== Página 4 ===\nTabla salarial\n\n=== Página 5 ===" in transcription
+            assert "=== Página 4 ===\nTabla salarial (es)" in sections["TRADUCCIÓN"]
+            assert len(index) == 7
+
+            # A salary table differing by one figure is not reused
+            tables = [os.path.join(tmp_dir, name) for name in ("t2023.pdf", "t2024.pdf")]
+            for path, salary in zip(tables, ("1.200", "1.250")):
+                _write_pages(path, [clauses[2][:20] + [f"Salario base: {salary} euros"]])
+            transcribe_with_dedup(tables[0], **options)
+            assert backend.calls["generate"] == 4
+            result = transcribe_with_dedup(tables[1], **options)
+            assert backend.calls["generate"] == 5
+            assert parse_page_sources(result) == {1: "ocr"}
+            # The unchanged table is still reused
+            transcribe_with_dedup(tables[0], **options)
+            assert backend.calls["generate"] == 5
+
+            # A PDF pypdf cannot read takes the regular path
+            malformed = os.path.join(tmp_dir, "malformed.pdf")
+            with open(malformed, "wb") as f:
+                f.write(b"%PDF-1.4\n1 0 obj << /Type /Catalog")
+            assert transcribe_with_dedup(malformed, **options) is None
+            index.close()
+    finally:
+        set_backend(previous)
+    print("✅ SUCCESS: only novel pages are transcribed and cached pages are spliced in order")
+
+
+if __name__ == "__main__":
+    test_page_digests()
+    test_dedup_pipeline()
@@ -0,0 +1,60 @@
+from page_index import (
+    OCR,
+    TEXT_LAYER,
+    build_page_index,
+    format_page_spec,
+    low_confidence_pages,
+    parse_page_spec,
+    worst_pages,
+)
+
+CLEAN = "El trabajador tendrá derecho a treinta días de vacaciones retribuidas al año."
+NOISY = "holaMundo adiósMundo ¤¤¤ 12345678901 ||"
+
+
+def test_page_index():
+    print("Testing page index...")
+
+    transcription = (
+        f"=== Página 1 ===\n{CLEAN}\n\n=== Página 2 ===\n{NOISY}\n\n=== Página 3 ===\n{CLEAN}"
+    )
+    index = build_page_index(transcription, source="a.pdf", page_sources={3: TEXT_LAYER})
+    assert index["source"] == "a.pdf"
+    pages = index["pages"]
+    assert [page["page"] for page in pages] == [1, 2, 3]
+    assert [page["path"] for page in pages] == [OCR, OCR, TEXT_LAYER]
+    # Offsets point into the transcription; the markers themselves are not scanned
+    assert transcription[pages[0]["start"] : pages[0]["end"]].strip() == CLEAN
+    assert pages[0]["issues"] == [] and pages[0]["confidence"] >= 70
+    assert pages[1]["confidence"] < 70 and pages[1]["issues"]
+    for kind, start, end in pages[1]["issues"]:
+        assert pages[1]["start"] <= start < end <= pages[1]["end"]
+    assert low_confidence_pages(index) == [2]
+
+    # Text without markers is one page, numbered first_page
+    single = build_page_index(CLEAN, first_page=4)["pages"]
+    assert [(page["page"], page["start"], page["end"]) for page in single] == [(4, 0, len(CLEAN))]
+
+    ranked = [
+        {"page": 1, "confidence": 90, "issues": []},
+        {"page": 2, "confidence": 40, "issues": [["a", 0, 1]]},
+        {"page": 3, "confidence": 40, "issues": [["a", 0, 1], ["b", 2, 3]]},
+        {"page": 4, "confidence": 60, "issues": []},
+    ]
+    assert [page["page"] for page in worst_pages({"pages": ranked}, limit=3)] == [3, 2, 4]
+    assert worst_pages({"pages": []}) == []
+
+    assert parse_page_spec("3, 7-9,,") == [(3, 3), (7, 9)]
+    assert parse_page_spec("") == []
+    for spec in ("0", "5-3", "-2", "a", "1-2-3", "2-x"):
+        try:
+            parse_page_spec(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"'{spec}' should be rejected")
+    assert format_page_spec([9, 3, 7, 8, 3]) == "3,7-9"
+    print("✅ SUCCESS: page index, worst pages and page specs")
+
+
+if __name__ == "__main__":
+    test_page_index()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+import rasterize
+from preprocess import (
+    DEFAULT_JPEG_QUALITY,
+    DEFAULT_MODE,
+    DEFAULT_TARGET_DPI,
+    prepared_for_upload,
+)
+
+
+def test_prepared_for_upload():
+    print("Testing pre-upload optimization...")
+
+    calls = []
+    output_bytes = {"size": 0}
+
+    def fake_rasterize_pdf(input_path, output_path, dpi, workers, mode, jpeg_quality):
+        calls.append({"dpi": dpi, "mode": mode, "jpeg_quality": jpeg_quality})
+        if output_bytes["size"] is None:
+            return None  # Rasterization failed
+        with open(output_path, "wb") as f:
+            f.write(b"x" * output_bytes["size"])
+        return {"pages": 1, "bytes": output_bytes["size"], "seconds": 0.1}
+
+    original_rasterize_pdf = rasterize.rasterize_pdf
+    rasterize.rasterize_pdf = fake_rasterize_pdf
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "scan.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF" + b"0" * 10_000)
+
+            # Disabled, or below the size threshold: the original is uploaded as-is
+            with prepared_for_upload(pdf_path, enabled=False) as path:
+                assert path == pdf_path
+            with prepared_for_upload(pdf_path) as path:
+                assert path == pdf_path
+            assert calls == []
+
+            # Large enough and smaller once downsampled: the optimized copy is uploaded
+            output_bytes["size"] = 2_000
+            with prepared_for_upload(pdf_path, min_bytes=1_000) as path:
+                assert path != pdf_path and os.path.getsize(path) == 2_000
+                optimized_path = path
+            assert not os.path.exists(optimized_path)  # The temporary copy is removed
+            assert calls == [
+                {
+                    "dpi": DEFAULT_TARGET_DPI,
+                    "mode": DEFAULT_MODE,
+                    "jpeg_quality": DEFAULT_JPEG_QUALITY,
+                }
+            ]
+
+            # Passed through when optimizing would not shrink the file, or fails
+            for size in (20_000, 10_004, None):
+                output_bytes["size"] = size
+                with prepared_for_upload(pdf_path, min_bytes=1_000, mode="bilevel") as path:
+                    assert path == pdf_path
+            assert len(calls) == 4 and calls[-1]["mode"] == "bilevel"
+            assert os.path.getsize(pdf_path) == 10_004
+    finally:
+        rasterize.rasterize_pdf = original_rasterize_pdf
+    print("✅ SUCCESS: scans are downsampled only when that makes them smaller")
+
+
+if __name__ == "__main__":
+    test_prepared_for_upload()
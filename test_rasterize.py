@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+from PIL import Image, ImageDraw
+from pypdf import PdfReader
+
+from rasterize import MODES, ImagePdfWriter, encode_page
+
+
+def _page_image(width, height):
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([10, 10, width // 2, height // 3], fill=(200, 30, 30))
+    draw.line([0, height - 20, width, height - 20], fill="black", width=4)
+    return image
+
+
+def test_image_pdf_writer():
+    print("Testing streamed image PDF writing...")
+
+    image = _page_image(200, 300)
+    expected = {
+        "color": ("/DeviceRGB", 8, "/DCTDecode", "RGB"),
+        "gray": ("/DeviceGray", 8, "/DCTDecode", "L"),
+        "bilevel": ("/DeviceGray", 1, "/FlateDecode", "1"),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "pages.pdf")
+        writer = ImagePdfWriter(path, dpi=144)
+        for mode in MODES:
+            writer.add_page(encode_page(image, mode))
+        # Pages of different sizes keep their own MediaBox
+        writer.add_page(encode_page(_page_image(288, 144), "color"))
+        assert writer.page_count == 4
+        writer.close()
+
+        reader = PdfReader(path)
+        assert len(reader.pages) == 4
+        for page, mode in zip(reader.pages, MODES):
+            assert [float(v) for v in page.mediabox] == [0, 0, 100, 150]
+            xobject = page["/Resources"]["/XObject"]["/Im0"].get_object()
+            color_space, bits, filter, pil_mode = expected[mode]
+            assert xobject["/ColorSpace"] == color_space
+            assert xobject["/BitsPerComponent"] == bits
+            assert xobject["/Filter"] == filter
+
+            decoded = page.images[0].image
+            assert decoded.size == (200, 300)
+            assert decoded.mode == pil_mode
+            # The red block and the black rule survive each encoding
+            gray = decoded.convert("L")
+            assert gray.getpixel((150, 250)) > 200  # white background
+            assert gray.getpixel((50, 280)) < 60  # black rule
+            if mode == "color":
+                red, green, _ = decoded.getpixel((40, 40))
+                assert red > 150 and green < 80
+
+        assert [float(v) for v in reader.pages[3].mediabox] == [0, 0, 144, 72]
+    print("✅ SUCCESS: color, gray and bilevel pages written and read back")
+
+
+if __name__ == "__main__":
+    test_image_pdf_writer()
@@ -0,0 +1,156 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import processor
+import ratelimit
+from backends import FakeBackend, FakeQuotaError, set_backend
+from benchmarks.corpus import write_synthetic_pdf
+from ratelimit import (
+    RateLimiter,
+    TokenBucket,
+    call_with_retry,
+    estimate_tokens,
+    is_throttle,
+    retry_after,
+)
+
+
+class ResourceExhausted(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted."""
+
+
+class ServiceUnavailable(Exception):
+    """Stands in for google.api_core.exceptions.ServiceUnavailable."""
+
+
+class BrokenStreamBackend(FakeBackend):
+    """Fake whose streamed responses break off after the first chunk."""
+
+    def _stream(self, parts, usage):
+        yield SimpleNamespace(text=parts[0], usage_metadata=None)
+        raise ConnectionError("stream reset")
+
+
+def test_rate_limiter():
+    print("Testing rate limiter...")
+
+    # Quota errors are recognised and their retry hints honoured
+    error = ResourceExhausted("Quota exceeded. retry_delay { seconds: 7 }")
+    assert is_throttle(error) and retry_after(error) == 7
+    assert is_throttle(FakeQuotaError(1.5)) and retry_after(FakeQuotaError(1.5)) == 1.5
+    assert not is_throttle(ValueError("bad prompt"))
+
+    # A bucket serves its burst at once, then makes callers wait their turn
+    bucket = TokenBucket(rate_per_minute=600)
+    assert sum(bucket.reserve(1) for _ in range(600)) == 0
+    assert 0.09 < bucket.reserve(1) < 0.11
+    assert 0.19 < bucket.reserve(1) < 0.21
+
+    # A throttled call waits for the hint, halves the rate and is retried
+    limiter = RateLimiter("test", rpm=600)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ResourceExhausted("429 Please retry in 0.05s")
+        return "ok"
+
+    assert call_with_retry(flaky, limiter, retries=2) == "ok"
+    assert limiter.stats["throttled"] == 1 and limiter.stats["retries"] == 1
+    assert limiter.requests.rate == 301  # Halved, plus one step for the success
+
+    # Estimated tokens are reserved before the request, so concurrent
+    # full-size requests wait instead of all starting at once
+    limiter = RateLimiter("tpm", tpm=60_000)
+    assert limiter.tokens.reserve(60_000) == 0  # Another worker's request in flight
+    assert 0.09 < limiter.tokens.reserve(100) < 0.11
+    limiter.settle_tokens(60_100, 30_000)  # It used less than estimated
+    assert limiter.tokens.reserve(30_000) == 0
+    limiter.settle_tokens(30_000, 0)  # No usage reported: the reservation stands
+    assert limiter.tokens.reserve(1) > 0
+    assert estimate_tokens("p" * 40, pages=2) == 10 + 2 * (258 + 1200)
+    assert estimate_tokens("p" * 40, text="t" * 40) == 30
+
+    # A failed request gives its reservation back
+    limiter = RateLimiter("tpm", tpm=6_000)
+
+    def rejected():
+        raise ValueError("bad prompt")
+
+    try:
+        call_with_retry(rejected, limiter, tokens=6_000)
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+    assert limiter.tokens.reserve(6_000) == 0
+
+    # Calls that may have gone through (uploads) are not retried on transient errors
+    calls = []
+
+    def unavailable():
+        calls.append(1)
+        raise ServiceUnavailable("503")
+
+    limiter = RateLimiter("files", rpm=600)
+    try:
+        call_with_retry(unavailable, limiter, retry_transient=False)
+        raise AssertionError("expected ServiceUnavailable")
+    except ServiceUnavailable:
+        pass
+    assert len(calls) == 1
+    attempts.clear()
+    assert call_with_retry(flaky, limiter, retries=1, retry_transient=False) == "ok"
+    assert len(attempts) == 2  # Throttled uploads were rejected, so they are retried
+
+    # Errors that are not throttling are raised at once
+    def broken():
+        raise ValueError("bad prompt")
+
+    try:
+        call_with_retry(broken, limiter)
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+
+    # The fake enforces its quota with retryable 429s
+    backend = FakeBackend(quota_rpm=2)
+    backend.generate_content(["prompt", "uno"])
+    backend.generate_content(["prompt", "dos"])
+    try:
+        backend.generate_content(["prompt", "tres"])
+        raise AssertionError("expected FakeQuotaError")
+    except FakeQuotaError as e:
+        assert 59 < retry_after(e) <= 60
+    assert backend.calls["throttled"] == 1
+    print("✅ SUCCESS: rate limiter throttles, adapts and retries")
+
+
+def test_failed_stream_releases_tokens():
+    print("Testing token reservations of failed streams...")
+
+    ratelimit.configure(tpm=20_000)
+    previous = set_backend(BrokenStreamBackend())
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "doc.pdf")
+            write_synthetic_pdf(pdf_path, 1)
+            chunks = []
+            try:
+                processor.generate_response(pdf_path, on_text=chunks.append)
+                raise AssertionError("expected ConnectionError")
+            except ConnectionError:
+                pass
+            assert len(chunks) == 1
+            # The stream failed midway, so its reservation was given back
+            assert ratelimit.get_limiter("generate").tokens.reserve(20_000) == 0
+    finally:
+        set_backend(previous)
+        ratelimit.configure()
+    print("✅ SUCCESS: a stream failing midway gives back its tokens")
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
+    test_failed_stream_releases_tokens()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+
+from result import OCRResult, RunStats, iter_results, load_result
+
+
+def test_result_roundtrip():
+    print("Testing result model...")
+
+    text = (
+        "--- TRANSCRIPCIÓN ---\n=== Página 1 ===\nholaMundo\n\n=== Página 2 ===\nTexto limpio.\n\n"
+        "--- TRADUCCIÓN ---\n=== Página 1 ===\nhello world\n\n"
+        "--- QUALITY ASSESSMENT ---\nConfidence Score: 90%\n\n"
+        "--- AUTOMATED ANALYSIS ---\nConfidence Score: 75%\n"
+    )
+    stats = RunStats()
+    stats.add_time("generate", 1.23456)
+    result = OCRResult.from_text(text, source="doc.pdf", model="m", stats=stats)
+
+    assert result.translation == "=== Página 1 ===\nhello world"
+    assert result.confidence == 75
+    assert result.issues == ["Missing spaces between words detected"]
+    assert [page["page"] for page in result.pages] == [1, 2]
+    assert result.timings == {"generate": 1.235}
+    assert OCRResult.from_text(result.to_text()).transcription == result.transcription
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, "doc.result.json")
+        result.write_json(json_path)
+        assert load_result(json_path).to_dict() == result.to_dict()
+
+        jsonl_path = os.path.join(tmp_dir, "results.jsonl")
+        result.append_jsonl(jsonl_path)
+        result.append_jsonl(jsonl_path)
+        assert [r.source for r in iter_results(jsonl_path)] == ["doc.pdf", "doc.pdf"]
+    print("✅ SUCCESS: result JSON and JSONL round trip")
+
+
+if __name__ == "__main__":
+    test_result_roundtrip()
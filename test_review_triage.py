@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+from result import OCRResult
+from review_tool import format_triage_report, iter_review_items, run_corpus_review
+
+CLEAN = "El trabajador tendrá derecho a treinta días de vacaciones retribuidas."
+NOISY = "holaMundo adiósMundo ¤¤¤ Lorem ipsum dolor sit amet."
+
+
+def sectioned(transcription):
+    return (
+        f"--- TRANSCRIPCIÓN ---\n=== Página 1 ===\n{transcription}\n\n"
+        f"--- TRADUCCIÓN ---\n{transcription}\n"
+    )
+
+
+def test_corpus_triage():
+    print("Testing corpus triage...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = os.path.join(tmp_dir, "corpus")
+        batch = os.path.join(corpus, "batch")
+        os.makedirs(batch)
+        reports = os.path.join(tmp_dir, "reports")
+
+        clean = OCRResult.from_text(sectioned(CLEAN), source="clean.pdf")
+        noisy = OCRResult.from_text(sectioned(NOISY * 5), source="noisy.pdf")
+        assert noisy.confidence < 70 <= clean.confidence
+
+        clean.write_json(os.path.join(corpus, "clean.result.json"))
+        with open(os.path.join(corpus, "loose.txt"), "w", encoding="utf-8") as f:
+            f.write(sectioned(NOISY))
+        # A text output with a result JSON is only reviewed once
+        with open(os.path.join(corpus, "clean.txt"), "w", encoding="utf-8") as f:
+            f.write(clean.to_text())
+        noisy.append_jsonl(os.path.join(batch, "results.jsonl"))
+        clean.append_jsonl(os.path.join(batch, "results.jsonl"))
+        # Batch text outputs are covered by the batch's JSONL
+        with open(os.path.join(batch, "noisy_processed.txt"), "w", encoding="utf-8") as f:
+            f.write(noisy.to_text())
+        with open(os.path.join(corpus, "broken.result.json"), "w", encoding="utf-8") as f:
+            f.write("{not json")
+
+        ids = [item_id for item_id, _, _ in iter_review_items(corpus)]
+        assert sorted(ids) == sorted(
+            [
+                "broken.result.json",
+                "clean.result.json",
+                "loose.txt",
+                os.path.join("batch", "results.jsonl") + ":1",
+                os.path.join("batch", "results.jsonl") + ":2",
+            ]
+        )
+
+        summaries = run_corpus_review(corpus, reports, threshold=70, workers=2)
+        ranked = [summary["id"] for summary in summaries if "error" not in summary]
+        # Lowest confidence first; the noisier of the two flagged files leads
+        assert ranked[0] == os.path.join("batch", "results.jsonl") + ":1"
+        assert ranked[1] == "loose.txt"
+        assert summaries[-1]["id"] == "broken.result.json" and "error" in summaries[-1]
+        assert sorted(os.listdir(reports)) == ["batch_noisy-1_review.md", "loose_review.md"]
+
+        report = format_triage_report(summaries, corpus, threshold=70)
+        assert "5 files · 2 below 70% confidence · 1 unreadable" in report
+        assert "[review](batch_noisy-1_review.md)" in report
+    print("✅ SUCCESS: corpus triage ranks files and reports only low-confidence ones")
+
+
+if __name__ == "__main__":
+    test_corpus_triage()
@@ -0,0 +1,54 @@
+from scanner import (
+    LONG_NUMBER,
+    MISSING_SPACE,
+    REPEATED,
+    SPECIAL_CHARS,
+    UNUSUAL_CHARS,
+    Issue,
+    ScanResult,
+    scan,
+)
+from page_index import scan_pages, strip_page_markers
+from processor import detect_anomalies
+from review_tool import highlight_suspicious_text
+
+
+def test_scanner():
+    print("Testing anomaly scanner...")
+
+    text = "holaMundo ---- ok 12345678901 ||"
+    result = scan(text)
+    assert result.issues == [
+        Issue(MISSING_SPACE, 3, 5),
+        Issue(REPEATED, 10, 14),
+        Issue(UNUSUAL_CHARS, 10, 14),
+        Issue(LONG_NUMBER, 18, 29),
+        Issue(SPECIAL_CHARS, 30, 32),
+    ]
+    assert result.messages() == scan(text, first_only=True).messages()
+
+    # Single-letter words count towards fragmentation
+    assert scan("a b c palabra").fragmented
+    assert not scan("una palabra y otra más en el mismo texto largo").fragmented
+    assert scan("Texto limpio sin problemas.").messages() == []
+    counted = scan("a, b\tc: 7")
+    assert (counted.word_count, counted.single_letter_count) == (4, 1)
+
+    # Merged page scans give the same issues as scanning the whole text
+    for transcription in (
+        "=== Página 1 ===\nTexto limpio.\n=== Página 2 ===\nholaMundo a b c d\n",
+        "Preámbulo\n=== Página 2 ===\nok ----\n=== Página 3 ===\ne f g h i j\n",
+        "Sin marcadores de página",
+    ):
+        merged = ScanResult.merge(result for *_, result in scan_pages(transcription))
+        assert merged.messages() == detect_anomalies(strip_page_markers(transcription))
+
+    assert (
+        highlight_suspicious_text("holaMundo y !!!")
+        == "hol**aM**undo y ***!!!***"
+    )
+    print("✅ SUCCESS: scanner spans and highlighting")
+
+
+if __name__ == "__main__":
+    test_scanner()
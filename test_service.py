@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import processor
+from backends import FakeBackend, set_backend
+from benchmarks.corpus import write_synthetic_pdf
+from service import OCRService, make_server
+
+
+def request(base, method, path, data=None):
+    req = urllib.request.Request(base + path, data=data, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_http_service():
+    print("Testing HTTP service...")
+
+    backend = FakeBackend(processing_delay=0.05, seed=0)
+    previous = set_backend(backend)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "convenio.pdf")
+        write_synthetic_pdf(pdf_path, 3)
+        with open(pdf_path, "rb") as f:
+            pdf = f.read()
+
+        service = OCRService(os.path.join(tmp_dir, "service"), workers=2, max_queued=10)
+        service.warm_up()
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        try:
+            params = "format=docx&filename=convenio.pdf&use_cache=0&text_layer=0"
+            status, _, body = request(base, "POST", f"/jobs?{params}", pdf)
+            assert status == 202
+            job = json.loads(body)
+            assert job["status"] in ("queued", "running")
+
+            deadline = time.monotonic() + 10
+            while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+                time.sleep(0.05)
+                job = json.loads(request(base, "GET", f"/jobs/{job['id']}")[2])
+            assert job["status"] == "done", job
+            assert job["pages"] == 3
+
+            status, _, body = request(base, "GET", f"/jobs/{job['id']}/result")
+            assert status == 200 and json.loads(body)["source"] == "convenio.pdf"
+
+            status, headers, body = request(base, "GET", f"/jobs/{job['id']}/download")
+            assert status == 200 and body[:2] == b"PK"  # docx is a zip
+            assert "ocr-convenio.docx" in headers["Content-Disposition"]
+            # Other formats are rendered on demand from the stored result
+            status, _, body = request(base, "GET", f"/jobs/{job['id']}/download?format=txt")
+            assert status == 200 and "--- TRANSCRIPCIÓN ---" in body.decode("utf-8")
+
+            # Concurrent downloads of a format not rendered yet share one render
+            renders = []
+            original_save_to_file = processor.save_to_file
+
+            def slow_save_to_file(result, path, output_format, stats=None):
+                renders.append(output_format)
+                time.sleep(0.1)
+                original_save_to_file(result, path, output_format, stats)
+
+            responses = []
+
+            def download_pdf():
+                responses.append(request(base, "GET", f"/jobs/{job['id']}/download?format=pdf"))
+
+            processor.save_to_file = slow_save_to_file
+            try:
+                threads = [threading.Thread(target=download_pdf) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            finally:
+                processor.save_to_file = original_save_to_file
+            assert renders == ["pdf"]
+            assert [status for status, _, _ in responses] == [200] * 4
+            assert len({body for _, _, body in responses}) == 1
+            pdf_body = responses[0][2]
+            assert pdf_body.startswith(b"%PDF") and pdf_body.rstrip().endswith(b"%%EOF")
+
+            assert request(base, "POST", "/jobs", b"not a pdf")[0] == 400
+            assert request(base, "POST", "/jobs?format=odt", pdf)[0] == 400
+            assert request(base, "GET", "/jobs/missing")[0] == 404
+            health = json.loads(request(base, "GET", "/health")[2])
+            assert health["done"] == 1 and health["workers"] == 2
+
+            assert request(base, "DELETE", f"/jobs/{job['id']}")[0] == 200
+            assert request(base, "GET", f"/jobs/{job['id']}")[0] == 404
+            assert backend.calls["upload"] == 1
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.shutdown()
+            set_backend(previous)
+    print("✅ SUCCESS: HTTP service accepts PDFs and serves job status, results and downloads")
+
+
+if __name__ == "__main__":
+    test_http_service()
@@ -0,0 +1,38 @@
+from processor import SectionStreamParser, iter_stream_sections, parse_sections
+
+RESPONSE = (
+    "--- TRANSCRIPCIÓN ---\n=== Página 1 ===\nArtículo 1. Jornada --- anual.\n\n"
+    "--- TRADUCCIÓN ---\n=== Página 1 ===\nArtículo 1. Jornada anual.\n\n"
+    "--- QUALITY ASSESSMENT ---\nConfidence Score: 95%"
+)
+
+
+def test_stream_parser():
+    print("Testing streamed section parsing...")
+
+    expected = list(parse_sections(RESPONSE).items())
+    assert [name for name, _ in expected] == ["TRANSCRIPCIÓN", "TRADUCCIÓN", "QUALITY ASSESSMENT"]
+
+    # A header split inside its name only completes the previous section once whole
+    parser = SectionStreamParser()
+    head, tail = RESPONSE.split("UCCIÓN ---\n")
+    assert parser.feed(head[:-4]) == []
+    assert parser.feed(head[-4:] + "UCC") == []
+    completed = parser.feed("IÓN ---\n" + tail[:10])
+    assert completed == expected[:1]
+
+    # Any two-way split, and one character at a time, give the same sections
+    for cut in range(1, len(RESPONSE)):
+        assert list(iter_stream_sections([RESPONSE[:cut], RESPONSE[cut:]])) == expected, cut
+    seen = []
+    parser = SectionStreamParser(on_section=lambda name, content: seen.append((name, content)))
+    for char in RESPONSE:
+        parser.feed(char)
+    parser.close()
+    assert seen == expected
+    assert parser.text == RESPONSE
+    print("✅ SUCCESS: section headers split across stream chunks")
+
+
+if __name__ == "__main__":
+    test_stream_parser()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+from page_index import OCR, TEXT_LAYER, format_page_sources, parse_page_sources
+from textlayer import classify_pages, extract_page_texts, page_runs, transcribe_with_text_layer
+
+
+def _write_pdf(path, pages):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=A4)
+    for text in pages:
+        y = 800
+        for line in text:
+            c.drawString(50, y, line)
+            y -= 14
+        c.showPage()
+    c.save()
+
+
+def test_textlayer():
+    print("Testing text-layer detection...")
+
+    sentence = "El presente convenio regula las condiciones de trabajo del sector."
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "mixed.pdf")
+        _write_pdf(path, [[sentence] * 3, [], [sentence] * 3, ["12 34"]])
+        texts = extract_page_texts(path, range(1, 5))
+
+    assert sentence in texts[1]
+    paths = classify_pages(texts)
+    assert paths == {1: TEXT_LAYER, 2: OCR, 3: TEXT_LAYER, 4: OCR}
+
+    paths.update({5: TEXT_LAYER, 6: TEXT_LAYER, 7: TEXT_LAYER})
+    assert page_runs(paths, max_pages=2) == [
+        (TEXT_LAYER, 1, 1),
+        (OCR, 2, 2),
+        (TEXT_LAYER, 3, 3),
+        (OCR, 4, 4),
+        (TEXT_LAYER, 5, 6),
+        (TEXT_LAYER, 7, 7),
+    ]
+
+    line = format_page_sources(paths)
+    assert line == "Page sources: text layer 1,3,5-7; OCR 2,4"
+    assert parse_page_sources(f"analysis\n{line}\n") == paths
+    print("✅ SUCCESS: page classification and page sources")
+
+
+def test_unreadable_pdf_falls_back():
+    print("Testing text layer on unreadable PDFs...")
+
+    from pypdf import PdfReader, PdfWriter
+
+    sentence = "El presente convenio regula las condiciones de trabajo del sector."
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain = os.path.join(tmp_dir, "plain.pdf")
+        _write_pdf(plain, [[sentence] * 3])
+        writer = PdfWriter()
+        writer.append(PdfReader(plain))
+        writer.encrypt("secreto")
+        encrypted = os.path.join(tmp_dir, "encrypted.pdf")
+        writer.write(encrypted)
+        malformed = os.path.join(tmp_dir, "malformed.pdf")
+        with open(malformed, "wb") as f:
+            f.write(b"%PDF-1.4\n1 0 obj << /Type /Catalog")
+
+        # pypdf cannot read them, so the caller falls back to uploading for OCR
+        for path in (encrypted, malformed):
+            assert transcribe_with_text_layer(path, use_cache=False) is None
+    print("✅ SUCCESS: unreadable PDFs fall back to the OCR path")
+
+
+if __name__ == "__main__":
+    test_textlayer()
+    test_unreadable_pdf_falls_back()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+
+import processor
+import translation_memory
+from translation_memory import (
+    TRANSLATE_PARAGRAPH_PROMPT,
+    TranslationMemory,
+    format_stats,
+    parse_segments,
+    split_paragraphs,
+    translate_batch,
+    translate_response,
+)
+
+
+def test_translation_memory():
+    print("Testing translation memory...")
+
+    assert split_paragraphs("=== Página 1 ===\nUno.\n\n  Dos.\n=== Página 2 ===\n3") == [
+        "=== Página 1 ===",
+        "Uno.",
+        "Dos.",
+        "=== Página 2 ===",
+        "3",
+    ]
+    assert parse_segments("[[1]]\nuno\n\n[[2]]\ndos", 2) == ["uno", "dos"]
+    assert parse_segments("[[1]]\nuno y dos", 2) is None
+
+    requested = []
+
+    def fake_batch(paragraphs, stats=None):
+        requested.extend(paragraphs)
+        return [p.upper() for p in paragraphs]
+
+    original_batch = translation_memory.translate_batch
+    translation_memory.translate_batch = fake_batch
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            memory = TranslationMemory(os.path.join(tmp_dir, "memory.sqlite3"))
+            response = (
+                "--- TRANSCRIPCIÓN ---\n=== Página 1 ===\nclause one\n\nclause  two\n\n"
+                "clause one\n\n--- QUALITY ASSESSMENT ---\nConfidence Score: 90%"
+            )
+            translated, stats = translate_response(response, memory)
+            assert "--- TRADUCCIÓN ---\n=== Página 1 ===\nCLAUSE ONE\n\nCLAUSE  TWO\n\nCLAUSE ONE" in translated
+            assert translated.endswith("--- QUALITY ASSESSMENT ---\nConfidence Score: 90%")
+            assert requested == ["clause one", "clause  two"]
+            assert stats == {"paragraphs": 3, "hits": 0}
+
+            # Whitespace differences still hit the memory
+            _, stats = translate_response(
+                "--- TRANSCRIPCIÓN ---\nclause two\n\nclause three", memory
+            )
+            assert requested[2:] == ["clause three"]
+            assert format_stats(stats) == "Translation memory: 1/2 paragraphs reused (50%)"
+            assert len(memory) == 3
+
+            # Another model does not reuse the first model's translations
+            _, stats = translate_response(
+                "--- TRANSCRIPCIÓN ---\nclause two", memory, model="other-model"
+            )
+            assert stats["hits"] == 0 and requested[3:] == ["clause two"]
+            memory.close()
+    finally:
+        translation_memory.translate_batch = original_batch
+
+    # A batch that comes back merged is translated one paragraph at a time
+    prompts = []
+
+    def fake_translate_text(text, prompt, stats=None):
+        prompts.append(prompt)
+        return "[[1]]\nuno y dos" if len(prompts) == 1 else text.upper()
+
+    original_translate_text = processor.translate_text
+    processor.translate_text = fake_translate_text
+    try:
+        assert translate_batch(["uno", "dos"]) == ["UNO", "DOS"]
+        assert prompts[1:] == [TRANSLATE_PARAGRAPH_PROMPT] * 2
+    finally:
+        processor.translate_text = original_translate_text
+    print("✅ SUCCESS: translation memory reuse")
+
+
+if __name__ == "__main__":
+    test_translation_memory()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import time
+
+import upload_registry
+from backends import FakeBackend, set_backend
+from benchmarks.corpus import write_synthetic_pdf
+from cache import file_sha256
+from processor import upload_file
+from upload_registry import EXPIRY_MARGIN, UploadRegistry
+
+
+class PersistentFakeBackend(FakeBackend):
+    """Keeps uploads around like Gemini does, so they can be reused."""
+
+    persistent_files = True
+
+
+def test_upload_registry():
+    print("Testing upload registry...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "registry.sqlite3")
+
+        # Two processes sharing the registry keep each other's entries
+        first, second = UploadRegistry(path), UploadRegistry(path)
+        first.record("a", "files/a", "uri-a")
+        second.record("b", "files/b", "uri-b")
+        first.record("c", "files/c", "uri-c")
+        assert second.lookup("a")["name"] == "files/a"
+        assert first.lookup("b")["uri"] == "uri-b"
+        assert len(second) == 3
+
+        # Entries about to expire are not handed out, and are dropped on the next write
+        first.record("d", "files/d", "uri-d", expires_at=time.time() + EXPIRY_MARGIN / 2)
+        assert first.lookup("d") is None
+        first.forget("a")
+        assert second.lookup("a") is None and len(second) == 2
+        first.close()
+        second.close()
+
+        pdf_path = os.path.join(tmp_dir, "convenio.pdf")
+        write_synthetic_pdf(pdf_path, 2)
+        digest = file_sha256(pdf_path)
+        backend = PersistentFakeBackend(seed=0)
+        previous_backend = set_backend(backend)
+        previous_registry = upload_registry._default_registry
+        registry = upload_registry._default_registry = UploadRegistry(path)
+        try:
+            uploaded = upload_file(pdf_path, mime_type="application/pdf")
+            assert upload_file(pdf_path, mime_type="application/pdf").name == uploaded.name
+            assert backend.calls["upload"] == 1
+
+            # A remote file that was deleted is uploaded again
+            del backend._files[uploaded.name]
+            again = upload_file(pdf_path, mime_type="application/pdf")
+            assert again.name != uploaded.name and backend.calls["upload"] == 2
+            assert registry.lookup(digest)["name"] == again.name
+
+            # So is one whose remote copy has (nearly) expired
+            registry.record(digest, again.name, again.uri, expires_at=time.time() + 60)
+            upload_file(pdf_path, mime_type="application/pdf")
+            assert backend.calls["upload"] == 3
+
+            upload_file(pdf_path, mime_type="application/pdf", reuse=False)
+            assert backend.calls["upload"] == 4
+        finally:
+            registry.close()
+            upload_registry._default_registry = previous_registry
+            set_backend(previous_backend)
+    print("✅ SUCCESS: uploads are reused until deleted or expired, across processes")
+
+
+if __name__ == "__main__":
+    test_upload_registry()
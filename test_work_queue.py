@@ -0,0 +1,63 @@
+import threading
+import time
+
+from work_queue import DocumentQueue, ProgressStats, drain_events, estimate_remaining
+
+
+def test_document_queue():
+    print("Testing GUI work queue...")
+
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def process(job_id, path, fail=False):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        try:
+            for i in range(100):
+                work_queue.log(job_id, f"{path}: line {i}")
+            stats = ProgressStats(path, lambda stage: work_queue.progress(job_id, stage))
+            with stats.timed("upload"):
+                time.sleep(0.02)
+            stats.add_time("generate", 0.0)
+            stats.add_time("upload", 0.0)  # Progress never moves backwards
+            if fail:
+                raise ValueError("broken PDF")
+        finally:
+            with lock:
+                running["now"] -= 1
+
+    work_queue = DocumentQueue(process, workers=2)
+    for i in range(6):
+        work_queue.submit(i, f"doc{i}.pdf", fail=i == 3)
+    work_queue.shutdown(wait=True)
+    assert running["max"] == 2
+
+    # The UI drains events in bounded batches
+    batches = []
+    while True:
+        batch = drain_events(work_queue.events, 250)
+        if not batch:
+            break
+        batches.append(batch)
+    events = [event for batch in batches for event in batch]
+    assert max(len(batch) for batch in batches) == 250
+    assert sum(1 for _, kind, _ in events if kind == "log") == 600
+
+    progress = [data["fraction"] for job_id, kind, data in events if job_id == 0 and kind == "progress"]
+    assert progress == [0.15, 0.8]
+    finished = {job_id: kind for job_id, kind, _ in events if kind in ("done", "failed")}
+    assert finished == {0: "done", 1: "done", 2: "done", 3: "failed", 4: "done", 5: "done"}
+    assert len(work_queue.durations) == 5
+
+    # The ETA blends progress so far with finished documents' durations
+    assert estimate_remaining(10, 0.5) == 10
+    assert estimate_remaining(10, 0.5, [30]) == 15
+    assert estimate_remaining(0, 0.0) is None
+    assert estimate_remaining(50, 0.9, [10]) == 0
+    print("✅ SUCCESS: work queue bounds workers, batches events and estimates ETA")
+
+
+if __name__ == "__main__":
+    test_document_queue()
@@ -0,0 +1,265 @@
+"""
+Text-layer fast path for born-digital PDFs.
+
+Many inputs already carry a selectable text layer. Each page's embedded
+text is extracted locally with pypdf; pages whose text looks usable are not
+sent for OCR at all, only their text is sent for translation. Image-only (or
+badly extracted) pages go through the usual upload-and-transcribe path in
+page-range chunks. Both kinds of run are stitched back in page order with
+the same section layout as a normal result, and the AUTOMATED ANALYSIS
+records which path each page took (see page_index.format_page_sources).
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import get_default_cache, text_sha256
+from chunking import (
+    DEFAULT_CHUNK_PAGES,
+    DEFAULT_CHUNK_WORKERS,
+    DEFAULT_RETRIES,
+    _transcribe_chunk,
+    page_count,
+    run_cached,
+    split_pdf,
+    stitch_chunks,
+    translate_and_stitch,
+)
+from jobs import job_step
+from page_index import OCR, PAGE_MARKER, TEXT_LAYER, format_page_sources
+from preprocess import prepared_for_upload
+from processor import (
+    MODEL_NAME,
+    TRANSCRIBE_ONLY_PROMPT,
+    TRANSCRIBE_PROMPT,
+    TRANSLATE_PROMPT,
+    calculate_confidence_score,
+    detect_anomalies,
+    translate_text,
+)
+
+MIN_TEXT_CHARS = 40  # Fewer non-space characters than this is treated as no text layer
+MIN_LETTER_RATIO = 0.5  # Share of letters among non-space characters
+MIN_CONFIDENCE = 70  # Same threshold as the low-confidence review warning
+TEXT_LAYER_ASSESSMENT = "Text taken from the PDF's text layer; no OCR was performed."
+
+
+def extract_page_texts(pdf_path, page_numbers):
+    """
+    Returns {page: text} with the embedded text of the given 1-based pages.
+    Pages whose text cannot be extracted map to an empty string.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    texts = {}
+    for page in page_numbers:
+        try:
+            texts[page] = reader.pages[page - 1].extract_text() or ""
+        except Exception:
+            texts[page] = ""
+    return texts
+
+
+def is_usable_text(text):
+    """
+    Decides whether a page's embedded text can replace OCR: enough
+    characters, mostly letters, and no anomalies that would drop its
+    confidence score below MIN_CONFIDENCE.
+    """
+    chars = "".join(text.split())
+    if len(chars) < MIN_TEXT_CHARS:
+        return False
+    letters = sum(1 for char in chars if char.isalpha())
+    if letters < len(chars) * MIN_LETTER_RATIO:
+        return False
+    return calculate_confidence_score(text, detect_anomalies(text)) >= MIN_CONFIDENCE
+
+
+def classify_pages(page_texts):
+    """Returns {page: TEXT_LAYER or OCR} for the extracted page texts."""
+    return {
+        page: TEXT_LAYER if is_usable_text(text) else OCR
+        for page, text in page_texts.items()
+    }
+
+
+def page_runs(page_paths, max_pages=DEFAULT_CHUNK_PAGES):
+    """
+    Groups pages into (path, first, last) runs of consecutive pages that take
+    the same path, each at most max_pages long.
+    """
+    runs = []
+    for page in sorted(page_paths):
+        path = page_paths[page]
+        if runs:
+            run_path, first, last = runs[-1]
+            if run_path == path and last == page - 1 and page - first < max_pages:
+                runs[-1] = (path, first, page)
+                continue
+        runs.append((path, page, page))
+    return runs
+
+
+def text_run_transcription(page_texts, first, last):
+    """Joins the texts of pages first..last, numbered from 1 like a chunk response."""
+    return "\n\n".join(
+        f"{PAGE_MARKER.format(page=page - first + 1)}\n{page_texts[page].strip()}"
+        for page in range(first, last + 1)
+    )
+
+
+def text_run_response(transcription, translation=None, assessment=TEXT_LAYER_ASSESSMENT):
+    """Wraps a text run as a response; without translation it is transcription-only."""
+    response = f"--- TRANSCRIPCIÓN ---\n{transcription}\n\n"
+    if translation is not None:
+        response += f"--- TRADUCCIÓN ---\n{translation.strip()}\n\n"
+    return response + f"--- QUALITY ASSESSMENT ---\n{assessment}"
+
+
+def _translate_run(
+    transcription, label, cache, cache_key, refresh, retries, stats=None, step=None
+):
+    """Translates a text run and returns it as a complete response."""
+    return run_cached(
+        label,
+        lambda: text_run_response(transcription, translate_text(transcription, stats=stats)),
+        cache,
+        cache_key,
+        refresh,
+        retries,
+        step,
+    )
+
+
+def transcribe_with_text_layer(
+    pdf_path,
+    chunk_pages=DEFAULT_CHUNK_PAGES,
+    workers=DEFAULT_CHUNK_WORKERS,
+    retries=DEFAULT_RETRIES,
+    use_cache=True,
+    refresh=False,
+    pages=None,
+    optimize=False,
+    translation_memory=False,
+    stats=None,
+    job=None,
+):
+    """
+    Transcribes and translates a PDF, using the embedded text of pages that
+    have a usable text layer and OCR for the rest.
+
+    Returns the stitched result, or None when no page has a usable text layer
+    or the PDF cannot be read locally (e.g. encrypted or malformed) so the
+    caller can fall back to the regular OCR path. With
+    translation_memory=True, OCR runs are only transcribed and every run is
+    translated through the translation memory instead. job, a
+    jobs.DocumentJob, tracks each run as a step (see transcribe_chunked).
+    """
+    name = os.path.basename(pdf_path)
+    try:
+        num_pages = page_count(pdf_path)
+    except Exception as e:
+        print(f"Text layer skipped for '{name}': {e}")
+        return None
+    if pages:
+        if any(last > num_pages for _, last in pages):
+            raise ValueError(f"Page range exceeds the document's {num_pages} pages")
+        page_numbers = sorted({p for first, last in pages for p in range(first, last + 1)})
+    else:
+        page_numbers = range(1, num_pages + 1)
+
+    try:
+        page_texts = extract_page_texts(pdf_path, page_numbers)
+    except Exception as e:
+        print(f"Text layer skipped for '{name}': {e}")
+        return None
+    page_paths = classify_pages(page_texts)
+    text_pages = [page for page, path in page_paths.items() if path == TEXT_LAYER]
+    if not text_pages:
+        return None
+
+    print(
+        f"'{name}': {len(text_pages)} of {len(page_paths)} pages have a text layer; "
+        f"OCR needed for {len(page_paths) - len(text_pages)}"
+    )
+
+    runs = page_runs(page_paths, max(1, chunk_pages))
+    ocr_prompt = TRANSCRIBE_ONLY_PROMPT if translation_memory else TRANSCRIBE_PROMPT
+    cache = get_default_cache() if use_cache else None
+    ocr_key = text_key = None
+    if cache is not None:
+        # OCR runs share keys with chunking.py, so cached chunks are reused
+        ocr_key = cache.make_key(pdf_path, MODEL_NAME, ocr_prompt, "chunked")
+        text_key = cache.make_key(pdf_path, MODEL_NAME, TRANSLATE_PROMPT, "text-layer")
+
+    ocr_ranges = [(first, last) for path, first, last in runs if path == OCR]
+    with tempfile.TemporaryDirectory(prefix="ocr-chunks-") as tmp_dir:
+        chunk_paths = {}
+        if ocr_ranges:
+            with prepared_for_upload(pdf_path, enabled=optimize) as upload_path:
+                paths = split_pdf(upload_path, ocr_ranges, tmp_dir)
+            chunk_paths = dict(zip(ocr_ranges, paths))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = []
+            for path, first, last in runs:
+                cache_key = None
+                if path == OCR:
+                    if ocr_key is not None:
+                        cache_key = text_sha256(f"{ocr_key}|pages {first}-{last}")
+                    future = executor.submit(
+                        _transcribe_chunk,
+                        chunk_paths[(first, last)],
+                        cache,
+                        cache_key,
+                        refresh,
+                        retries,
+                        ocr_prompt,
+                        stats,
+                        job_step(job, f"pages {first}-{last}"),
+                    )
+                elif translation_memory:
+                    transcription = text_run_transcription(page_texts, first, last)
+                    future = executor.submit(text_run_response, transcription)
+                else:
+                    transcription = text_run_transcription(page_texts, first, last)
+                    if text_key is not None:
+                        # Keyed on the text too, in case the extraction changes
+                        cache_key = text_sha256(
+                            f"{text_key}|pages {first}-{last}|{text_sha256(transcription)}"
+                        )
+                    future = executor.submit(
+                        _translate_run,
+                        transcription,
+                        f"{name} pages {first}-{last} (text layer)",
+                        cache,
+                        cache_key,
+                        refresh,
+                        retries,
+                        stats,
+                        job_step(job, f"pages {first}-{last} (text layer)"),
+                    )
+                futures.append(future)
+
+            responses = []
+            failed = []
+            for (path, first, last), future in zip(runs, futures):
+                try:
+                    responses.append(future.result())
+                except Exception as e:
+                    failed.append(f"pages {first}-{last}: {e}")
+
+    if failed:
+        message = f"{len(failed)} of {len(runs)} page runs failed ({'; '.join(failed)})."
+        if cache is not None:
+            message += " Completed runs are cached; re-run to retry only the failed ones."
+        raise RuntimeError(message)
+
+    ranges = [(first, last) for _, first, last in runs]
+    if translation_memory:
+        result = translate_and_stitch(pdf_path, ranges, responses, stats)
+    else:
+        result = stitch_chunks(ranges, responses)
+    return result + format_page_sources(page_paths) + "\n"
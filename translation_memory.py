@@ -0,0 +1,285 @@
+"""
+Paragraph-level translation memory.
+
+Collective agreements repeat the same boilerplate clauses across documents.
+With the translation memory enabled, transcription and translation run as
+separate stages: the model only transcribes, then the transcription is split
+into paragraphs and each one is looked up in a persistent SQLite store keyed
+by the SHA-256 of its normalized text, the model and the translation prompts,
+so changing either does not serve stale translations. Only paragraphs not
+found are sent for translation, in batched text-only requests, and the
+Spanish text is assembled from cached and new segments in the original order.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from cache import DEFAULT_CACHE_DIR, text_sha256
+from page_index import PAGE_MARKER_RE
+
+DEFAULT_MEMORY_PATH = os.getenv(
+    "OCR_TRANSLATION_MEMORY", os.path.join(DEFAULT_CACHE_DIR, "tm", "memory.sqlite3")
+)
+MAX_BATCH_CHARS = 12000  # Source characters per translation request
+SEGMENT_MARKER = "[[{n}]]"
+SEGMENT_MARKER_RE = re.compile(r"^[ \t]*\[\[(\d+)\]\][ \t]*$", re.MULTILINE)
+
+TRANSLATE_SEGMENTS_PROMPT = """
+    Translate each of the following numbered segments into Spanish.
+    Every segment starts with a line "[[N]]". Output the same "[[N]]" line
+    before each translation, keep the segments in order and do not merge,
+    split or add segments. Output only the translations.
+    """
+# Used one paragraph at a time when a batch comes back with the wrong segments
+TRANSLATE_PARAGRAPH_PROMPT = """
+    Translate the following paragraph of a PDF document, transcribed or taken
+    from its text layer, into Spanish. Output only the translation.
+    """
+PROMPT_KEY = text_sha256(TRANSLATE_SEGMENTS_PROMPT + TRANSLATE_PARAGRAPH_PROMPT)
+
+
+def normalize_paragraph(text):
+    """Normalizes a paragraph for lookup: Unicode NFKC and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def paragraph_key(text, model, prompt_key=PROMPT_KEY):
+    """Returns the memory key of a paragraph translated by model with the prompts' key."""
+    return text_sha256(f"{model}|{prompt_key}|{normalize_paragraph(text)}")
+
+
+def split_paragraphs(text):
+    """
+    Splits text into blank-line separated paragraphs. Page marker lines are
+    kept as paragraphs of their own so they pass through untranslated.
+    """
+    text = PAGE_MARKER_RE.sub(lambda m: f"\n\n{m.group(0).strip()}\n\n", text)
+    return [part.strip() for part in re.split(r"\n[ \t]*\n", text) if part.strip()]
+
+
+def join_paragraphs(paragraphs):
+    """Inverse of split_paragraphs: blank lines between paragraphs, none after page markers."""
+    parts = []
+    previous = None
+    for paragraph in paragraphs:
+        if previous is not None:
+            parts.append("\n" if PAGE_MARKER_RE.fullmatch(previous) else "\n\n")
+        parts.append(paragraph)
+        previous = paragraph
+    return "".join(parts)
+
+
+def needs_translation(paragraph):
+    """Page markers and paragraphs without letters are copied as they are."""
+    if PAGE_MARKER_RE.fullmatch(paragraph):
+        return False
+    return any(char.isalpha() for char in paragraph)
+
+
+class TranslationMemory:
+    """
+    Persistent paragraph store (paragraph_key -> Spanish text) in SQLite.
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                " key TEXT PRIMARY KEY, source TEXT NOT NULL, target TEXT NOT NULL,"
+                " model TEXT, created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.commit()
+
+    def lookup(self, keys):
+        """Returns {key: target} for the keys present in the memory."""
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, target FROM segments WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE segments SET hits = hits + 1 WHERE key = ?",
+                    [(key,) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def store(self, entries, model, prompt_key=PROMPT_KEY):
+        """Stores (source, target) pairs translated by model with the prompts' key."""
+        now = time.time()
+        rows = [
+            (
+                paragraph_key(source, model, prompt_key),
+                normalize_paragraph(source),
+                target,
+                model,
+                now,
+            )
+            for source, target in entries
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments (key, source, target, model, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_memory = None
+_default_memory_lock = threading.Lock()
+
+
+def get_default_memory():
+    """Returns the process-wide translation memory, creating it on first use."""
+    global _default_memory
+    with _default_memory_lock:
+        if _default_memory is None:
+            _default_memory = TranslationMemory()
+        return _default_memory
+
+
+def _batches(paragraphs, max_chars=MAX_BATCH_CHARS):
+    """Groups paragraphs into batches of at most max_chars source characters."""
+    batch = []
+    size = 0
+    for paragraph in paragraphs:
+        if batch and size + len(paragraph) > max_chars:
+            yield batch
+            batch = []
+            size = 0
+        batch.append(paragraph)
+        size += len(paragraph)
+    if batch:
+        yield batch
+
+
+def parse_segments(response_text, count):
+    """Parses a '[[N]]'-delimited response into a list of count translations, or None."""
+    markers = list(SEGMENT_MARKER_RE.finditer(response_text))
+    segments = {}
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(response_text)
+        segments[int(marker.group(1))] = response_text[marker.end() : end].strip()
+    if sorted(segments) != list(range(1, count + 1)):
+        return None
+    return [segments[n] for n in range(1, count + 1)]
+
+
+def translate_batch(paragraphs, stats=None):
+    """Translates a batch of paragraphs with one text-only request."""
+    from processor import translate_text
+
+    request = "\n\n".join(
+        f"{SEGMENT_MARKER.format(n=n)}\n{paragraph}"
+        for n, paragraph in enumerate(paragraphs, 1)
+    )
+    translations = parse_segments(
+        translate_text(request, prompt=TRANSLATE_SEGMENTS_PROMPT, stats=stats),
+        len(paragraphs),
+    )
+    if translations is None:
+        # The model merged or dropped segments; fall back to one request each
+        print(f"Segment mismatch in a batch of {len(paragraphs)}; translating one by one")
+        translations = [
+            translate_text(paragraph, prompt=TRANSLATE_PARAGRAPH_PROMPT, stats=stats).strip()
+            for paragraph in paragraphs
+        ]
+    return translations
+
+
+def translate_with_memory(text, memory=None, stats=None, model=None):
+    """
+    Translates text paragraph by paragraph through the translation memory.
+
+    Returns (translation, counts) where counts has the number of translatable
+    paragraphs and how many were found in the memory. stats, a
+    result.RunStats, collects the translation requests' timings and usage.
+    model defaults to processor.MODEL_NAME.
+    """
+    if model is None:
+        from processor import MODEL_NAME as model
+    if memory is None:
+        memory = get_default_memory()
+
+    paragraphs = split_paragraphs(text)
+    keys = [paragraph_key(p, model) if needs_translation(p) else None for p in paragraphs]
+    translatable = [key for key in keys if key is not None]
+    found = memory.lookup(translatable)
+    counts = {
+        "paragraphs": len(translatable),
+        "hits": sum(1 for key in translatable if key in found),
+    }
+
+    # Each new paragraph is translated once, even if it repeats in the document
+    missing = {}
+    for paragraph, key in zip(paragraphs, keys):
+        if key is not None and key not in found:
+            missing.setdefault(key, paragraph)
+
+    for batch in _batches(list(missing.values())):
+        translations = translate_batch(batch, stats)
+        memory.store(zip(batch, translations), model)
+        for paragraph, translation in zip(batch, translations):
+            found[paragraph_key(paragraph, model)] = translation
+
+    output = [p if key is None else found[key] for p, key in zip(paragraphs, keys)]
+    return join_paragraphs(output), counts
+
+
+def translate_response(response_text, memory=None, stats=None, model=None):
+    """
+    Adds a TRADUCCIÓN section, built through the translation memory, to a
+    transcription-only response. Returns (response_text, counts).
+    """
+    from processor import parse_sections
+
+    sections = parse_sections(response_text)
+    translation, counts = translate_with_memory(
+        sections.get("TRANSCRIPCIÓN", ""), memory, stats, model
+    )
+    response = f"--- TRANSCRIPCIÓN ---\n{sections.get('TRANSCRIPCIÓN', '')}\n\n"
+    response += f"--- TRADUCCIÓN ---\n{translation}"
+    for name, content in sections.items():
+        if name not in ("TRANSCRIPCIÓN", "TRADUCCIÓN"):
+            response += f"\n\n--- {name} ---\n{content}"
+    return response, counts
+
+
+def merge_stats(all_counts):
+    """Sums per-chunk translation memory counts."""
+    return {
+        "paragraphs": sum(counts["paragraphs"] for counts in all_counts),
+        "hits": sum(counts["hits"] for counts in all_counts),
+    }
+
+
+def format_stats(counts):
+    """Renders the per-document hit rate line appended to the automated analysis."""
+    total = counts["paragraphs"]
+    rate = counts["hits"] / total if total else 0.0
+    return f"Translation memory: {counts['hits']}/{total} paragraphs reused ({rate:.0%})"
@@ -0,0 +1,96 @@
+"""
+Local registry of files already uploaded to Gemini.
+
+Maps the SHA-256 of a file's bytes to the remote file name, URI and expiry
+time, so the same document is not uploaded again while the remote copy is
+still valid. The registry lives next to the result cache in a SQLite
+database, so concurrent processes (batch runs, the GUI, the service) share
+it without overwriting each other's entries.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from cache import DEFAULT_CACHE_DIR
+
+DEFAULT_REGISTRY_PATH = os.getenv(
+    "OCR_UPLOAD_REGISTRY", os.path.join(DEFAULT_CACHE_DIR, "uploads", "registry.sqlite3")
+)
+DEFAULT_TTL = 48 * 3600  # Gemini keeps uploaded files for 48 hours
+EXPIRY_MARGIN = 10 * 60  # Don't reuse files about to expire mid-request
+
+
+class UploadRegistry:
+    """
+    Content-hash to remote-file mapping persisted in SQLite.
+    """
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " digest TEXT PRIMARY KEY, name TEXT NOT NULL, uri TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def lookup(self, digest):
+        """Returns the entry for a content hash if it has not expired, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, uri, expires_at FROM uploads WHERE digest = ? AND expires_at > ?",
+                (digest, time.time() + EXPIRY_MARGIN),
+            ).fetchone()
+        if row is None:
+            return None
+        name, uri, expires_at = row
+        return {"name": name, "uri": uri, "expires_at": expires_at}
+
+    def record(self, digest, name, uri, expires_at=None):
+        """Records a fresh upload of the content with the given hash."""
+        if expires_at is None:
+            expires_at = time.time() + DEFAULT_TTL
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO uploads (digest, name, uri, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (digest, name, uri, expires_at),
+            )
+            self._conn.execute(
+                "DELETE FROM uploads WHERE expires_at <= ?", (time.time() + EXPIRY_MARGIN,)
+            )
+            self._conn.commit()
+
+    def forget(self, digest):
+        """Drops an entry whose remote file turned out to be gone or unusable."""
+        with self._lock:
+            self._conn.execute("DELETE FROM uploads WHERE digest = ?", (digest,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """Returns the process-wide registry instance, creating it on first use."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = UploadRegistry()
+        return _default_registry
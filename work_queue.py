@@ -0,0 +1,130 @@
+"""
+Multi-document work queue for the GUI.
+
+Documents run on a bounded thread pool. Workers never touch Tk: everything
+they report (log lines, stage progress, completion, errors) is put on an
+event queue as (job_id, kind, data) tuples, which the Tk main loop drains
+in batches with drain_events from an after() callback. A burst of output is
+so applied to the window in one update instead of one call per line.
+
+Progress is estimated from the stages a document has finished (see
+STAGE_PROGRESS), reported through ProgressStats; the ETA blends that with
+the average duration of the documents already finished.
+"""
+
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import DEFAULT_WORKERS
+from result import RunStats
+
+# Share of a document's processing done once each stage has finished
+STAGE_PROGRESS = {
+    "upload": 0.15,
+    "processing": 0.25,
+    "transcription": 0.55,  # Streamed transcription section complete
+    "generate": 0.8,
+    "translate": 0.85,
+    "parse": 0.9,
+    "index": 0.93,  # Result and page index built
+    "export": 0.97,
+}
+
+
+class ProgressStats(RunStats):
+    """RunStats that also calls on_stage(stage) whenever a stage finishes."""
+
+    __slots__ = ("_on_stage",)
+
+    def __init__(self, source, on_stage):
+        super().__init__(source)
+        self._on_stage = on_stage
+
+    def add_time(self, stage, seconds):
+        super().add_time(stage, seconds)
+        self._on_stage(stage)
+
+
+def drain_events(events, limit):
+    """Returns up to limit events waiting in the queue, without blocking."""
+    batch = []
+    while len(batch) < limit:
+        try:
+            batch.append(events.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def estimate_remaining(elapsed, fraction, durations=()):
+    """
+    Seconds left for a document elapsed seconds in and fraction done, given
+    the durations of finished documents; None when there is nothing to go on.
+    """
+    if fraction >= 1:
+        return 0.0
+    estimates = []
+    if fraction > 0:
+        estimates.append(elapsed / fraction)
+    if durations:
+        estimates.append(statistics.mean(durations))
+    if not estimates:
+        return None
+    return max(0.0, statistics.mean(estimates) - elapsed)
+
+
+class DocumentQueue:
+    """
+    Runs process(job_id, *args, **kwargs) for each submitted document on at
+    most `workers` threads. process reports through log() and progress();
+    'started', 'done' (with the duration) and 'failed' (with the error)
+    events are posted around it.
+    """
+
+    def __init__(self, process, workers=DEFAULT_WORKERS):
+        self.process = process
+        self.workers = max(1, workers)
+        self.events = queue.Queue()
+        self.durations = []  # Seconds taken by each finished document
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def post(self, job_id, kind, **data):
+        self.events.put((job_id, kind, data))
+
+    def log(self, job_id, message):
+        self.post(job_id, "log", message=message)
+
+    def progress(self, job_id, stage):
+        """Records that job_id finished stage; progress only moves forward."""
+        fraction = STAGE_PROGRESS.get(stage)
+        if fraction is None:
+            return
+        with self._lock:
+            if fraction <= self._progress.get(job_id, 0.0):
+                return
+            self._progress[job_id] = fraction
+        self.post(job_id, "progress", fraction=fraction)
+
+    def submit(self, job_id, *args, **kwargs):
+        return self._executor.submit(self._run, job_id, args, kwargs)
+
+    def _run(self, job_id, args, kwargs):
+        start = time.monotonic()
+        self.post(job_id, "started")
+        try:
+            self.process(job_id, *args, **kwargs)
+        except Exception as e:
+            self.post(job_id, "failed", error=str(e))
+            return
+        duration = time.monotonic() - start
+        with self._lock:
+            self.durations.append(duration)
+        self.post(job_id, "done", duration=duration)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)